@@ -1,9 +1,17 @@
 from __future__ import print_function
 
-import copy
-
 from ast_tool_box.controllers.tree_transform_controller import TreeTransformController
+from ast_tool_box.controllers.transform_task import TransformTask, TaskReceiver
+from ast_tool_box.controllers.parameter_sweep import run_sweep, sweep_arguments, argument_text
 import ast_tool_box.models.code_models.code_model as code_model
+from ast_tool_box.models.code_models.derivation_graph import DerivationGraph, transform_changed, recomputed_results
+from ast_tool_box.models.code_models.ast_clone import clone_ast
+from ast_tool_box.models.code_models.ast_diff import AstDiff
+from ast_tool_box.models.code_models.shared_tree import transform_copy
+from ast_tool_box.models.code_models.subtree_splice import node_path, splice
+from ast_tool_box.models.code_models.type_summary import pruned_transform_copy
+from ast_tool_box.models.code_models.code_generation import generate_code, write_code, ChunkBatcher
+from ast_tool_box.models.transform_models.transform_profile import TransformProfile
 import ast_tool_box.models.transform_models.transform_file as transform_model
 import ast_tool_box.controllers.transform_presenter as transform_controllers
 
@@ -12,6 +20,17 @@ import ast
 
 
 class CodePresenter(object):
+    # derived trees share the subtrees a transform left alone with their parent
+    share_unchanged_nodes = True
+    # transforms and code generators run on a worker thread behind a pending tab
+    run_in_background = True
+    # saving a transform file recomputes the trees derived with its changed transforms
+    recompute_on_save = True
+    # transforms run instrumented, bypassing the cache, and their items keep a TransformProfile
+    instrument_transforms = False
+    # transforms skip the subtrees that hold none of the node types they have visit_ methods for
+    prune_transforms = True
+
     def __init__(self, tree_transform_controller=None):
         print("tree_transform_controller %s" % tree_transform_controller)
         print("type is                   %s" % TreeTransformController)
@@ -20,6 +39,10 @@ class CodePresenter(object):
         self.code_items = []
         self.transform_presenter = None
         self.tree_transform_controller = tree_transform_controller
+        self.recompute_receiver = None
+        self.sweep_receivers = []
+        self.diff_receivers = []
+        self.summary_receivers = {}
 
         self.code_pane = CodePane(code_presenter=self)
 
@@ -74,6 +97,20 @@ class CodePresenter(object):
     def add_code_item(self, code_item):
         self.code_items.append(code_item)
         self.code_pane.add_code_item(code_item)
+        if self.prune_transforms and isinstance(code_item, code_model.AstTreeItem):
+            self.prepare_type_summary(code_item)
+
+    def prepare_type_summary(self, code_item):
+        """build the TypeSummary of code_item on a worker thread, unless it is built or being built"""
+        if code_item.built_type_summary() is not None or id(code_item) in self.summary_receivers:
+            return
+        task = TransformTask(code_item.type_summary)
+
+        def done(result):
+            self.summary_receivers.pop(id(code_item), None)
+
+        self.summary_receivers[id(code_item)] = TaskReceiver(task, done, done)
+        task.start()
 
     def resolve_transform_args(self, transform_thing):
         return self.code_pane.resolve_transform_arguments(transform_thing)
@@ -90,68 +127,14 @@ class CodePresenter(object):
         if transform_item is not None:
             assert isinstance(transform_item, transform_model.TransformThing), "bad type %s" % transform_item
 
-        def apply_codegen_transform(ast_root, argument_list):
-            """
-            Code generates each file in the project
-            """
-            import ctree.nodes
-            # assert isinstance(ast_root, ctree.nodes.Project), \
-            #     "apply_code_gen root of tree not Project is a %s" % ast_root
-
-            # TODO: stay more in line with ctree and use ResolveGeneratedPathRefs
-
-            # transform all files a combined source_text string
-            combined_source = ""
-            from ast_tool_box.transformers.NonCtreeNodeConverter import NonCtreeNodeConverter
-            converter = NonCtreeNodeConverter()
-            ast_root = converter.visit(ast_root)
-            if isinstance(ast_root, ctree.nodes.Project) and ast_root.files and len(ast_root.files) > 0:
-                for f in ast_root.files:
-                    combined_source += "File %s\n" % f.name
-                    combined_source += f.codegen()
-                return combined_source
-            else:
-                return ast_root.codegen()
-
         if isinstance(code_item, code_model.FileItem):
             self.show_error("Transformation cannot be applied to source_text code")
         elif isinstance(code_item, code_model.AstTreeItem):
-            if isinstance(transform_item, transform_model.AstTransformItem):
-                argument_values = []
-                if transform_item.has_args():
-                    argument_values = self.resolve_transform_args(transform_item)
-                    if not argument_values:
-                        return
-                    for a in argument_values:
-                        print("got arg %s" % a)
-                    argument_values = [eval(x) for x in argument_values]
-
-                tree_copy = copy.deepcopy(code_item.ast_tree)
-                new_tree = transform_item.get_instance(argument_values).visit(tree_copy)
-                new_ast_tree_item = code_model.AstTreeItem(
-                    new_tree,
-                    name=transform_item.name(),
-                    parent_link=code_model.CodeTransformLink(code_item=code_item, transform_item=transform_item),
-                )
-                self.add_code_item(new_ast_tree_item)
-            elif isinstance(transform_item, transform_model.CodeGeneratorItem):
-                # new_code = transform_item.get_instance().visit(code_item.ast_tree)
-                argument_values = []
-                if transform_item.has_args():
-                    argument_values = self.resolve_transform_args(transform_item)
-                    if not argument_values:
-                        return
-                    for a in argument_values:
-                        print("got arg %s" % a)
-                    argument_values = [eval(x) for x in argument_values]
-
-                tree_copy = copy.deepcopy(code_item.ast_tree)
-                new_code = apply_codegen_transform(tree_copy, argument_values)
-                new_code_item = code_model.GeneratedCodeItem(
-                    new_code,
-                    parent_link=code_model.CodeTransformLink(code_item=code_item, transform_item=transform_item),
-                )
-                self.add_code_item(new_code_item)
+            if isinstance(transform_item, (transform_model.AstTransformItem, transform_model.CodeGeneratorItem)):
+                argument_values = self.transform_arguments(transform_item)
+                if argument_values is None:
+                    return
+                self.run_derived_transform(code_item, transform_item, argument_values)
             elif transform_item is None:
                 new_tree = code_item.ast_tree
                 new_ast_tree_item = code_model.AstTreeItem(
@@ -169,6 +152,423 @@ class CodePresenter(object):
         else:
             self.show_error("Unknown transform of\n%s\n with\n%s" % (code_item, transform_item))
 
+    def apply_transform_at(self, code_item, ast_row, transform_item):
+        """
+        transform only the node of ast_row in code_item's tree and splice the
+        result into a new version of the whole tree, just the nodes on the
+        path down to it are copied.  A code generator gets the code of the node
+        """
+        while ast_row is not None and not ast_row.is_ast():
+            ast_row = ast_row.parent
+        tree_row = ast_row
+        while tree_row is not None and tree_row.ast_node is not getattr(code_item, 'ast_tree', None):
+            tree_row = tree_row.parent
+        if tree_row is None:
+            self.apply_transform(code_item=ast_row.ast_node if ast_row else code_item, transform_item=transform_item)
+            return
+        row_path = ast_row.path()[len(tree_row.path()):]
+        if not row_path:
+            self.apply_transform(code_item=code_item, transform_item=transform_item)
+            return
+
+        argument_values = self.transform_arguments(transform_item)
+        if argument_values is None:
+            return
+        self.run_derived_transform(code_item, transform_item, argument_values, row_path)
+
+    def apply_fused_transform(self, code_item, transform_items):
+        """
+        apply several node local AstTransformItems to code_item's tree in a
+        single walk, the new item shows them as one transform
+        """
+        fused_item = transform_model.FusedTransformItem(transform_items)
+        if not isinstance(code_item, code_model.AstTreeItem):
+            self.show_error("Transforms can only be fused on an ast tree")
+            return
+        problems = fused_item.problems()
+        if problems:
+            self.show_error("These transforms cannot be run in one pass\n%s" % "\n".join(problems))
+            return
+
+        argument_lists = []
+        for transform_item in transform_items:
+            argument_values = self.transform_arguments(transform_item)
+            if argument_values is None:
+                return
+            argument_lists.append(argument_values)
+        self.run_derived_transform(code_item, fused_item, argument_lists)
+
+    def sweep_transform(self, code_item, transform_item):
+        """
+        run transform_item on code_item's tree with every argument set the
+        user asks for, in worker processes, and show a table of the results
+        """
+        if not isinstance(code_item, code_model.AstTreeItem):
+            self.show_error("Argument sweeps can only be run on an ast tree")
+            return
+        if isinstance(transform_item, transform_model.FusedTransformItem):
+            self.show_error("Argument sweeps run a single transform")
+            return
+        sweep = self.code_pane.resolve_sweep_arguments(transform_item)
+        if sweep is None:
+            return
+        sources, grid, generate, processes = sweep
+        try:
+            argument_sets = sweep_arguments(sources, grid)
+        except Exception as exception:
+            self.show_error("Cannot evaluate the sweep arguments\n%s" % exception)
+            return
+        if not argument_sets:
+            self.show_error("The sweep has no argument sets")
+            return
+
+        title = "%s on %s, %d argument sets" % (transform_item.name(), code_item.name(), len(argument_sets))
+        task = TransformTask(
+            lambda: run_sweep(code_item.ast_tree, transform_item.transform, argument_sets, generate, processes)
+        )
+
+        def finished(points):
+            self.sweep_receivers.remove(receiver)
+            self.code_pane.show_sweep(
+                title, points, lambda point: self.open_sweep_point(code_item, transform_item, point)
+            )
+
+        def failed(message):
+            self.sweep_receivers.remove(receiver)
+            self.show_error("Sweep of %s failed\n%s" % (transform_item.name(), message))
+
+        receiver = TaskReceiver(task, finished, failed)
+        self.sweep_receivers.append(receiver)
+        task.start()
+
+    def diff_trees(self, old_tree, new_tree, finished):
+        """work out AstDiff(old_tree, new_tree) on a worker thread, then call finished with it"""
+        task = TransformTask(lambda: AstDiff(old_tree, new_tree))
+
+        def diff_finished(tree_diff):
+            self.diff_receivers.remove(receiver)
+            finished(tree_diff)
+
+        def failed(message):
+            self.diff_receivers.remove(receiver)
+            self.show_error("Could not compare the trees\n%s" % message)
+
+        receiver = TaskReceiver(task, diff_finished, failed)
+        self.diff_receivers.append(receiver)
+        task.start()
+
+    def open_sweep_point(self, code_item, transform_item, point):
+        """tabs for one argument set of a sweep, the derived tree and the code generated from it if any"""
+        if point.status != "ok":
+            self.show_error("%s(%s) failed\n%s" % (transform_item.name(), argument_text(point.arguments), point.text))
+            return
+        self.run_derived_transform(code_item, transform_item, list(point.arguments))
+        if point.text is not None:
+            generated_item = code_model.GeneratedCodeItem(point.text)
+            generated_item.code_name = "%s(%s) code" % (transform_item.name(), argument_text(point.arguments))
+            self.add_code_item(generated_item)
+
+    def transform_arguments(self, transform_item):
+        """the evaluated arguments for transform_item, asked for if it has any, None if that was cancelled"""
+        argument_values = []
+        if transform_item.has_args():
+            argument_values = self.resolve_transform_args(transform_item)
+            if not argument_values:
+                return None
+            for a in argument_values:
+                print("got arg %s" % a)
+            argument_values = [eval(x) for x in argument_values]
+        return argument_values
+
+    def run_derived_transform(self, code_item, transform_item, argument_values, row_path=None):
+        profile = TransformProfile(transform_item.name()) if self.instrument_transforms else None
+
+        def make_item(result):
+            new_item = self.derived_item(code_item, transform_item, argument_values, result, row_path)
+            new_item.transform_profile = profile
+            return new_item
+
+        self.run_transform(
+            transform_item.name(),
+            lambda write=None: self.transform_result(
+                code_item.ast_tree, transform_item, argument_values, row_path, profile,
+                self.summary_maker(code_item, transform_item), write
+            ),
+            make_item,
+            parent_link=code_model.CodeTransformLink(
+                code_item=code_item, transform_item=transform_item, arguments=argument_values, row_path=row_path
+            ),
+            streams_code=isinstance(transform_item, transform_model.CodeGeneratorItem),
+        )
+
+    def summary_maker(self, code_item, transform_item):
+        """
+        the function that gives the TypeSummary of code_item for pruning
+        transform_item, None unless prune_transforms is set and
+        transform_item is an ast transform.  It gives a summary already
+        built as it is and only builds one when it is called
+        """
+        if not (self.prune_transforms and isinstance(code_item, code_model.AstTreeItem) and
+                isinstance(transform_item, transform_model.AstTransformItem)):
+            return None
+        type_summary = code_item.built_type_summary()
+        if type_summary is not None:
+            return lambda: type_summary
+        return code_item.type_summary
+
+    def transform_result(self, ast_tree, transform_item, argument_values, row_path=None, profile=None,
+                         make_type_summary=None, write=None):
+        """
+        the new tree or generated code transform_item makes from ast_tree,
+        through the transform cache, ast_tree itself is never changed.  With
+        a row_path only the node there is transformed and the new tree is
+        spliced together from it and the rest of ast_tree.  With a profile
+        the transform always runs, instrumented into profile.
+        make_type_summary gives the TypeSummary of ast_tree, with it and
+        prune_transforms set the transform skips the subtrees it cannot
+        change, it is only called when the transform runs, not on a cache
+        hit.  Code a code generator makes is also handed to write, in
+        batches, as it is generated
+        """
+        if row_path:
+            nodes = node_path(ast_tree, row_path)
+            result = self.transform_result(
+                nodes[-1], transform_item, argument_values, profile=profile, make_type_summary=make_type_summary,
+                write=write
+            )
+            if isinstance(transform_item, transform_model.CodeGeneratorItem):
+                return result
+            return splice(nodes, result)
+
+        if isinstance(transform_item, transform_model.CodeGeneratorItem):
+            def transform():
+                if write is None:
+                    return generate_code(clone_ast(ast_tree))
+                chunks = []
+                batcher = ChunkBatcher(write)
+
+                def stream(chunk):
+                    chunks.append(chunk)
+                    batcher.write(chunk)
+
+                write_code(clone_ast(ast_tree), stream)
+                batcher.flush()
+                return "".join(chunks)
+        else:
+            def transform():
+                transformer = transform_item.get_instance(argument_values)
+                if profile is not None:
+                    profile.instrument(transformer)
+                if self.prune_transforms and make_type_summary is not None:
+                    return pruned_transform_copy(
+                        ast_tree, make_type_summary(), transformer, self.share_unchanged_nodes
+                    )
+                return transform_copy(ast_tree, transformer.visit, self.share_unchanged_nodes)
+
+        if profile is not None:
+            return profile.timed(transform)
+        return self.transform_cache().result(ast_tree, transform_item, argument_values, transform)
+
+    @staticmethod
+    def derived_item(code_item, transform_item, argument_values, result, row_path=None):
+        """the code item for result, made from code_item by transform_item"""
+        parent_link = code_model.CodeTransformLink(
+            code_item=code_item, transform_item=transform_item, arguments=argument_values, row_path=row_path
+        )
+        if isinstance(transform_item, transform_model.CodeGeneratorItem):
+            return code_model.GeneratedCodeItem(result, parent_link=parent_link)
+        return code_model.AstTreeItem(result, name=transform_item.name(), parent_link=parent_link)
+
+    def run_transform(self, name, compute, make_item, parent_link=None, streams_code=False):
+        """
+        add the code item make_item(compute()).  With run_in_background the
+        compute runs on a worker thread and a pending tab stands in for the
+        item until it is done.  With streams_code compute is given a writer
+        for the code it generates and the pending tab shows it as it comes
+        """
+        if not self.run_in_background:
+            self.add_code_item(make_item(compute()))
+            return
+        if streams_code:
+            task = TransformTask(lambda: compute(task.report))
+        else:
+            task = TransformTask(compute)
+        pending_item = code_model.PendingCodeItem(
+            task, make_item, name=name, parent_link=parent_link, streams_code=streams_code
+        )
+        self.add_code_item(pending_item)
+        pending_item.task.start()
+
+    def pending_finished(self, pending_item, result):
+        self.replace_code_item(pending_item, pending_item.make_item(result))
+
+    def pending_failed(self, pending_item, message):
+        if self.remove_code_item(pending_item):
+            self.show_error("%s failed\n%s" % (pending_item.name(), message))
+
+    def cancel_pending(self, pending_item):
+        pending_item.task.cancel()
+        self.remove_code_item(pending_item)
+
+    def replace_code_item(self, old_item, new_item):
+        """put new_item and its pane where old_item was, False if old_item was already gone"""
+        for index, other_item in enumerate(self.code_items):
+            if other_item is old_item:
+                self.code_items[index] = new_item
+                self.code_pane.replace_at(index, new_item)
+                return True
+        return False
+
+    def recompute_derived(self, transform_collection):
+        """
+        after transform_collection has been reloaded, recompute the items
+        made by those of its transforms whose source changed and everything
+        derived from them.  Each new item takes the place of the one it
+        replaces, items on other branches are left alone
+        """
+        if not self.recompute_on_save:
+            return
+        reloaded = dict(
+            (transform_item.name(), transform_item)
+            for transform_item in transform_collection.node_transforms + transform_collection.code_generators
+        )
+
+        def changed_version(transform_item):
+            """the reloaded transform_item if it changed, else None"""
+            if isinstance(transform_item, transform_model.FusedTransformItem):
+                new_items = [changed_version(item) for item in transform_item.transform_items]
+                if not any(new_items):
+                    return None
+                return transform_model.FusedTransformItem([
+                    new_item or item for new_item, item in zip(new_items, transform_item.transform_items)
+                ])
+            if transform_item.transform_file is not transform_collection:
+                return None
+            new_transform = reloaded.get(transform_item.name())
+            if new_transform is None or not transform_changed(transform_item, new_transform):
+                return None
+            return new_transform
+
+        stale_items = DerivationGraph(self.code_items).stale_items(lambda item: changed_version(item) is not None)
+        if not stale_items:
+            return
+
+        steps = []
+        for code_item in stale_items:
+            transform_item = code_item.parent_code_item.transform_item
+            if transform_item is not None:
+                transform_item = changed_version(transform_item) or transform_item
+            steps.append((code_item, transform_item))
+
+        def transform(link, parent_tree, transform_item):
+            if parent_tree is None:
+                parent_tree = link.code_item.ast_tree
+                make_type_summary = self.summary_maker(link.code_item, transform_item)
+            else:
+                make_type_summary = None
+            return self.transform_result(
+                parent_tree, transform_item, link.arguments, link.row_path, make_type_summary=make_type_summary
+            )
+
+        def compute():
+            return recomputed_results(steps, transform)
+
+        def finished(results):
+            self.recompute_receiver = None
+            new_items = {}
+            for code_item, transform_item in steps:
+                link = code_item.parent_code_item
+                parent_item = new_items.get(id(link.code_item), link.code_item)
+                if id(code_item) not in results:
+                    new_item = None
+                elif transform_item is not None:
+                    new_item = self.derived_item(
+                        parent_item, transform_item, link.arguments, results[id(code_item)], link.row_path
+                    )
+                else:
+                    new_item = self.moved_subtree(parent_item, code_item)
+
+                if new_item is None:
+                    self.remove_code_item(code_item)
+                elif self.replace_code_item(code_item, new_item):
+                    new_items[id(code_item)] = new_item
+
+        def failed(message):
+            self.recompute_receiver = None
+            for code_item in stale_items:
+                self.code_pane.show_updating(code_item, False)
+            self.show_error("Recomputing derived trees failed\n%s" % message)
+
+        if self.recompute_receiver is not None:
+            self.recompute_receiver.task.cancel()
+            self.recompute_receiver = None
+
+        if not self.run_in_background:
+            finished(compute())
+            return
+        for code_item in stale_items:
+            self.code_pane.show_updating(code_item, True)
+        task = TransformTask(compute)
+        self.recompute_receiver = TaskReceiver(task, finished, failed)
+        task.start()
+
+    def moved_subtree(self, parent_item, subtree_item):
+        """
+        subtree_item made again for the recomputed parent_item, the node at
+        the same row path, None if the new tree has no such row
+        """
+        if subtree_item.root_row is None:
+            return code_model.AstTreeItem(
+                parent_item.ast_tree,
+                name=subtree_item.name(),
+                parent_link=code_model.CodeTransformLink(code_item=parent_item, transform_item=None),
+            )
+        widget = self.code_pane.widget_for(parent_item)
+        source_tree = getattr(widget, 'ast_tree_widget', None)
+        if source_tree is None or source_tree.root_row is None:
+            return None
+        top_row = source_tree.root_row
+        for top_row in source_tree.root_row.ancestors():
+            pass
+        try:
+            ast_row = top_row.descendant(subtree_item.root_row.path())
+        except IndexError:
+            return None
+        if ast_row.field_name != subtree_item.root_row.field_name:
+            return None
+        return code_model.AstTreeItem(
+            ast_row.ast_node,
+            name=subtree_item.name(),
+            parent_link=code_model.CodeTransformLink(code_item=parent_item, transform_item=None),
+            root_row=ast_row,
+        )
+
+    def remove_code_item(self, code_item):
+        """take code_item and its pane away, False if it was already gone"""
+        for index, other_item in enumerate(self.code_items):
+            if other_item is code_item:
+                del self.code_items[index]
+                self.code_pane.remove_at(index)
+                return True
+        return False
+
+    def transform_cache(self):
+        """results of earlier transforms, shared with the tree_transform_controller"""
+        return self.tree_transform_controller.transform_cache
+
+    def show_subtree(self, code_item, ast_row):
+        """
+        add a SubTree item for the node of ast_row in code_item's tree, its
+        pane is a view of the rows and model code_item's pane already has
+        """
+        new_ast_tree_item = code_model.AstTreeItem(
+            ast_row.ast_node,
+            name="SubTree",
+            parent_link=code_model.CodeTransformLink(code_item=code_item, transform_item=None),
+            root_row=ast_row,
+        )
+        self.add_code_item(new_ast_tree_item)
+
     def show_error(self, message):
         self.code_pane.show_error(message)
 
@@ -0,0 +1,200 @@
+"""
+apply a transform or a pipeline to every python file in a directory or glob,
+fanned out over a process pool, without the gui
+
+    ast_tool_box_corpus -p lowering.json -o out kernels/
+    ast_tool_box_corpus -t PyBasicConversions -m ctree.transformations -o out 'kernels/*.py'
+
+each input gets one file in the output directory, at the same relative path,
+holding the generated code (name.code.txt), the ast dump of the final tree
+(name.ast.txt) or the traceback (name.error.txt).  Generated code is
+streamed into its file as it is made.  A line per file with its status and
+timing goes to corpus_summary.tsv as soon as the file is done
+"""
+from __future__ import print_function
+
+import argparse
+import ast
+import glob
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+from ast_tool_box.controllers.tree_transform_controller import TreeTransformController
+from ast_tool_box.models.code_models.code_generation import write_node_code
+from ast_tool_box.models.transform_models.transform_pipeline import TransformPipeline, PipelineStep
+
+summary_file_name = "corpus_summary.tsv"
+
+
+def source_files(paths):
+    """the python files named by paths, directories are searched recursively and globs are expanded"""
+    file_names = []
+    for path in paths:
+        matches = glob.glob(path) if glob.has_magic(path) else [path]
+        for match in sorted(matches):
+            if os.path.isdir(match):
+                for directory, sub_directories, names in os.walk(match):
+                    sub_directories.sort()
+                    file_names.extend(os.path.join(directory, name) for name in sorted(names) if name.endswith(".py"))
+            elif os.path.isfile(match):
+                file_names.append(match)
+    return file_names
+
+
+def output_base(file_name, base_directory, output_directory):
+    """where the output for file_name goes, its path relative to base_directory under output_directory"""
+    relative = os.path.relpath(os.path.abspath(file_name), base_directory)
+    if relative.startswith(os.pardir):
+        relative = os.path.basename(file_name)
+    return os.path.join(output_directory, os.path.splitext(relative)[0])
+
+
+def result_writer(result):
+    """
+    the kind of output for result and a function that writes it to a
+    writer, generated code is streamed if the final result can generate
+    code, otherwise an ast dump or the result itself
+    """
+    if hasattr(result, 'codegen'):
+        return "code", lambda write: write_node_code(result, write)
+    if isinstance(result, ast.AST):
+        return "ast", lambda write: write(ast.dump(result, include_attributes=True))
+    return "code", lambda write: write(str(result))
+
+
+class CorpusWorker(object):
+    """the pipeline and controller of one worker process, made once per process by start_worker"""
+    def __init__(self, pipeline_dict, cache_directory=None):
+        saved_steps = pipeline_dict.get("steps", [])
+        self.pipeline = TransformPipeline(
+            name=pipeline_dict.get("name", "pipeline"),
+            steps=[PipelineStep(step["transform"], step.get("arguments")) for step in saved_steps],
+            modules=pipeline_dict.get("modules"),
+        )
+        self.controller = TreeTransformController()
+        if cache_directory:
+            self.controller.transform_cache.use_directory(cache_directory)
+
+    @staticmethod
+    def write_output(output_name, write_to):
+        """call write_to with the write method of output_name, making its directory if needed"""
+        if not os.path.isdir(os.path.dirname(output_name)):
+            try:
+                os.makedirs(os.path.dirname(output_name))
+            except OSError:
+                pass
+        with open(output_name, "w") as output_file:
+            write_to(output_file.write)
+
+    def run(self, job):
+        file_name, output_path = job
+        started = time.time()
+        output_name = None
+        try:
+            with open(file_name, "r") as source_file:
+                tree = ast.parse(source_file.read(), file_name)
+            stages = self.pipeline.run(self.controller, tree)
+            kind, write_to = result_writer(stages[-1].tree if stages else tree)
+            output_name = "%s.%s.txt" % (output_path, kind)
+            self.write_output(output_name, write_to)
+            status = "ok"
+        except Exception:
+            message = traceback.format_exc()
+            if output_name is not None and os.path.exists(output_name):
+                # code generation failed part way through
+                os.remove(output_name)
+            output_name = "%s.error.txt" % output_path
+            self.write_output(output_name, lambda write: write(message))
+            status = "error"
+        seconds = time.time() - started
+        return file_name, status, seconds, output_name
+
+
+worker = None
+
+
+def start_worker(pipeline_dict, cache_directory):
+    global worker
+    worker = CorpusWorker(pipeline_dict, cache_directory)
+
+
+def run_job(job):
+    return worker.run(job)
+
+
+def run_corpus(pipeline, paths, output_directory, processes=None, cache_directory=None, report=print):
+    """
+    run pipeline on every file in paths with a pool of processes, default
+    one per core, report is called with each summary line as files finish.
+    Returns the list of (file_name, status, seconds, output_name)
+    """
+    file_names = source_files(paths)
+    if not file_names:
+        report("no python files found in %s" % " ".join(paths))
+        return []
+    if not os.path.isdir(output_directory):
+        os.makedirs(output_directory)
+
+    base_directory = os.path.commonprefix([os.path.dirname(os.path.abspath(name)) + os.sep for name in file_names])
+    base_directory = os.path.dirname(base_directory)
+    jobs = [(name, output_base(name, base_directory, output_directory)) for name in file_names]
+    pipeline_dict = pipeline.to_dict()
+
+    results = []
+    started = time.time()
+    with open(os.path.join(output_directory, summary_file_name), "w") as summary_file:
+        summary_file.write("file\tstatus\tseconds\toutput\n")
+        if processes == 1:
+            start_worker(pipeline_dict, cache_directory)
+            finished = (run_job(job) for job in jobs)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(processes, start_worker, (pipeline_dict, cache_directory))
+            finished = pool.imap_unordered(run_job, jobs)
+        try:
+            for file_name, status, seconds, output_name in finished:
+                results.append((file_name, status, seconds, output_name))
+                line = "%s\t%s\t%.3f\t%s" % (file_name, status, seconds, output_name)
+                summary_file.write(line + "\n")
+                summary_file.flush()
+                report("[%d/%d] %s" % (len(results), len(jobs), line))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    errors = sum(1 for result in results if result[1] != "ok")
+    report("%d files, %d errors, %.1f seconds" % (len(results), errors, time.time() - started))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply a transform or pipeline to a corpus of python files')
+    parser.add_argument('paths', nargs='+', help='python files, directories or globs')
+    parser.add_argument('-p', '--pipeline', help='saved pipeline json file')
+    parser.add_argument('-t', '--transform', help='name of a single transform to apply')
+    parser.add_argument('-a', '--argument', action='append', default=[], help='argument source for the transform')
+    parser.add_argument('-m', '--module', action='append', default=[], help='module to load transforms from')
+    parser.add_argument('-o', '--output', default='corpus_output', help='output directory')
+    parser.add_argument('-j', '--processes', type=int, default=None, help='worker processes, default one per core')
+    parser.add_argument('--cache', default=None, help='directory for the shared transform cache')
+    args = parser.parse_args(argv)
+
+    if args.pipeline:
+        pipeline = TransformPipeline.load(args.pipeline)
+        pipeline.modules.extend(args.module)
+    elif args.transform:
+        pipeline = TransformPipeline(name=args.transform, modules=args.module)
+        pipeline.add_step(args.transform, args.argument)
+    else:
+        parser.error("one of --pipeline or --transform is required")
+
+    results = run_corpus(pipeline, args.paths, args.output, processes=args.processes, cache_directory=args.cache)
+    return 1 if any(result[1] != "ok" for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+run one transform with every argument set of a grid or a list, spread over
+a process pool, for tuning things like unroll factors and tile sizes
+
+each worker gets the tree and the transform class once, then transforms a
+fresh copy of the tree per argument set and optionally generates code from
+the result.  What comes back is small, a SweepPoint with the status, time,
+node count and output size of each set, plus the generated code or the
+traceback.  A result tree worth looking at is made again on demand
+"""
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+import ast
+import itertools
+import multiprocessing
+import time
+import traceback
+from collections import namedtuple
+
+from ast_tool_box.models.code_models.ast_clone import clone_ast
+from ast_tool_box.models.code_models.code_generation import generate_code
+
+SweepPoint = namedtuple(
+    'SweepPoint', ['index', 'arguments', 'status', 'seconds', 'node_count', 'output_size', 'text']
+)
+
+columns = ["arguments", "status", "seconds", "nodes", "output size"]
+
+
+def grid_arguments(value_lists):
+    """an argument set for every combination of one value from each of value_lists"""
+    return [list(values) for values in itertools.product(*value_lists)]
+
+
+def sweep_arguments(sources, grid=True):
+    """
+    the argument sets described by sources, python expressions.  For a grid
+    there is one per positional argument, each giving the values to try for
+    it, otherwise each source is one argument set such as 4, 16
+    """
+    sources = [source.strip() for source in sources if source.strip()]
+    if grid:
+        return grid_arguments([list(eval(source)) for source in sources])
+    return [list(eval("(%s,)" % source)) for source in sources]
+
+
+def argument_text(arguments):
+    return ", ".join(repr(argument) for argument in arguments)
+
+
+def node_count(tree):
+    return sum(1 for _ in ast.walk(tree))
+
+
+class SweepWorker(object):
+    """the tree and transform of one worker process, made once per process by start_worker"""
+    def __init__(self, tree, transform_class, generate=False):
+        self.tree = tree
+        self.transform_class = transform_class
+        self.generate = generate
+
+    def run(self, job):
+        index, arguments = job
+        started = time.time()
+        try:
+            result = self.transform_class(*arguments).visit(clone_ast(self.tree))
+            nodes = node_count(result) if isinstance(result, ast.AST) else 0
+            text = generate_code(result) if self.generate else None
+            output_size = len(text) if text is not None else len(ast.dump(result))
+            status = "ok"
+        except Exception:
+            nodes, output_size, text = 0, 0, traceback.format_exc()
+            status = "error"
+        return SweepPoint(index, arguments, status, time.time() - started, nodes, output_size, text)
+
+
+worker = None
+
+
+def start_worker(tree, transform_class, generate):
+    global worker
+    worker = SweepWorker(tree, transform_class, generate)
+
+
+def run_job(job):
+    return worker.run(job)
+
+
+def run_sweep(tree, transform_class, argument_sets, generate=False, processes=None, report=None):
+    """
+    a SweepPoint for each of argument_sets, in their order, from a pool of
+    processes, default one per core.  report is called with each point as
+    it finishes
+    """
+    jobs = list(enumerate(argument_sets))
+    points = [None] * len(jobs)
+    if processes == 1 or len(jobs) < 2:
+        start_worker(tree, transform_class, generate)
+        finished = (run_job(job) for job in jobs)
+        pool = None
+    else:
+        pool_size = min(processes or multiprocessing.cpu_count(), len(jobs))
+        pool = multiprocessing.Pool(pool_size, start_worker, (tree, transform_class, generate))
+        finished = pool.imap_unordered(run_job, jobs)
+    try:
+        for point in finished:
+            points[point.index] = point
+            if report is not None:
+                report(point)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return points
+
+
+def sweep_summary(points):
+    errors = sum(1 for point in points if point.status != "ok")
+    return "%d argument sets, %d errors, %.3f s of transform time" % (
+        len(points), errors, sum(point.seconds for point in points)
+    )
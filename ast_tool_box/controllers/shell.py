@@ -16,12 +16,18 @@ atexit.register(readline.write_history_file, history_file)
 del os, history_file
 
 from ast_tool_box.controllers.tree_transform_controller import TreeTransformController
+from ast_tool_box.models.transform_models.transform_cache import default_cache_directory
+from ast_tool_box.models.transform_models.transform_pipeline import TransformPipeline
+from ast_tool_box.controllers.corpus_runner import run_corpus
 
 
 class AstTransformInterpreter(object):
-    def __init__(self, file_name=None, verbose=False):
+    def __init__(self, file_name=None, verbose=False, cache_directory=None):
         self.verbose = verbose
         self.controller = TreeTransformController()
+        self.pipeline = TransformPipeline()
+        if cache_directory:
+            self.controller.transform_cache.use_directory(cache_directory)
         self.controller.ast_tree_manager.new_item_from_file(file_name)
         self.controller.ast_transformer_manager.get_ast_transformers("ctree.transformations")
 
@@ -110,6 +116,100 @@ class AstTransformInterpreter(object):
         else:
             print("apply requires two numeric indices, tree index and transform index")
 
+    def profile_command(self, command):
+        """profile ast_index transform_index [name] applies a transform instrumented, profile alone shows the last one"""
+        fields = command.split()
+        if len(fields) == 1:
+            print(self.controller.last_profile if self.controller.last_profile else "nothing profiled yet")
+            return
+        if len(fields) < 3:
+            print("profile requires two numeric indices, tree index and transform index")
+            return
+        ast_index = self.controller.ast_tree_manager.get_valid_index(fields[1])
+        transform_index = self.controller.ast_transformer_manager.get_valid_index(fields[2])
+        if ast_index is None or transform_index is None:
+            print("profile missing index or index out of range")
+            return
+        name = fields[3] if len(fields) > 3 else "Tree %d" % self.controller.ast_tree_manager.count()
+        new_ast_tree = self.controller.profile_transform(ast_index, transform_index, name=name)
+        self.show_asts()
+        print(new_ast_tree.transform_profile)
+
+    def cache_command(self, command):
+        fields = command.split()
+        transform_cache = self.controller.transform_cache
+        if len(fields) < 2 or fields[1].startswith("sta"):
+            print(transform_cache)
+        elif fields[1].startswith("cle"):
+            transform_cache.clear(include_directory=len(fields) > 2 and fields[2].startswith("disk"))
+        elif fields[1].startswith("disk"):
+            if len(fields) > 2 and fields[2] == "off":
+                transform_cache.use_directory(None)
+            else:
+                transform_cache.use_directory(fields[2] if len(fields) > 2 else default_cache_directory)
+            print(transform_cache)
+        else:
+            print("unknown cache command")
+
+    def run_pipeline(self, ast_index):
+        """apply the pipeline to tree ast_index, every stage becomes a tree of its own"""
+        ast_item = self.controller.ast_tree_manager[ast_index]
+        try:
+            stages = self.pipeline.run(self.controller, ast_item.ast_tree)
+        except ValueError as exception:
+            print("error: %s" % exception)
+            return
+        for stage_number, stage in enumerate(stages):
+            ast_item = self.controller.ast_tree_manager.add_transformed_child(
+                ast_item,
+                self.controller.ast_transformer_manager.transformers_by_name[stage.step.transform_name],
+                stage.tree,
+                name="%s %d %s" % (self.pipeline.name, stage_number, stage.step.transform_name),
+            )
+            print("step %d %s %s" % (stage_number, stage.step, "computed" if stage.computed else "cached"))
+
+    def pipeline_command(self, command):
+        fields = command.split()
+        pipeline = self.pipeline
+        try:
+            if len(fields) < 2 or fields[1].startswith("sho"):
+                print(pipeline)
+                for index, step in enumerate(pipeline):
+                    print("step[%d]: %s" % (index, step))
+            elif fields[1].startswith("add") and len(fields) > 2:
+                pipeline.add_step(fields[2], fields[3:])
+            elif fields[1].startswith("set") and len(fields) > 3:
+                pipeline.set_step(int(fields[2]), fields[3], fields[4:])
+            elif fields[1].startswith("del") and len(fields) > 2:
+                pipeline.delete_step(int(fields[2]))
+            elif fields[1].startswith("mod") and len(fields) > 2:
+                pipeline.modules.append(fields[2])
+            elif fields[1].startswith("sav") and len(fields) > 2:
+                pipeline.save(fields[2])
+            elif fields[1].startswith("loa") and len(fields) > 2:
+                self.pipeline = TransformPipeline.load(fields[2])
+                print(self.pipeline)
+            elif fields[1].startswith("run") and len(fields) > 2:
+                ast_index = self.controller.ast_tree_manager.get_valid_index(fields[2])
+                if ast_index is None:
+                    print("pipeline run requires the index of an ast")
+                else:
+                    self.run_pipeline(ast_index)
+            else:
+                print("unknown pipeline command")
+        except (ValueError, IndexError, IOError) as exception:
+            print("error: %s" % exception)
+
+    def corpus_command(self, command):
+        fields = command.split()
+        if len(fields) < 3:
+            print("corpus requires an output directory and the files, directories or globs to run the pipeline on")
+            return
+        if len(self.pipeline) == 0:
+            print("the pipeline has no steps, use pipeline add or pipeline load first")
+            return
+        run_corpus(self.pipeline, fields[2:], fields[1], cache_directory=self.controller.transform_cache.directory)
+
     def set_verbose(self, new_value=None):
         if new_value is None:
             self.verbose = not self.verbose
@@ -122,6 +222,10 @@ class AstTransformInterpreter(object):
         print("transform [list|delete|load] <arg>")
         print("ast [list|delete|load] <arg>")
         print("apply ast_index transform_index")
+        print("profile [ast_index transform_index [name]]")
+        print("cache [stats|clear [disk]|disk [directory|off]]")
+        print("pipeline [show|add name args|set index name args|del index|module name|save file|load file|run ast_index]")
+        print("corpus output_directory path [path ...]")
         print("quit")
         print("commands can be abbreviated to first three letters")
         print("\n")
@@ -149,6 +253,14 @@ class AstTransformInterpreter(object):
                 self.transform_command(user_input)
             elif user_input.lower().startswith('app'):
                 self.apply_transform(user_input)
+            elif user_input.lower().startswith('pip'):
+                self.pipeline_command(user_input)
+            elif user_input.lower().startswith('cor'):
+                self.corpus_command(user_input)
+            elif user_input.lower().startswith('pro'):
+                self.profile_command(user_input)
+            elif user_input.lower().startswith('cac'):
+                self.cache_command(user_input)
             elif user_input.lower().startswith('ver'):
                 self.verbose = not self.verbose
             else:
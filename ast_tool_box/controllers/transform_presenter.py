@@ -64,6 +64,14 @@ class TransformPresenter(object):
     def current_item(self):
         return self.transform_pane.current_item()
 
+    def apply_fused_transform(self, transform_items):
+        """apply the transform_items to the current code item in one pass"""
+        self.code_presenter.apply_fused_transform(self.code_presenter.current_item(), transform_items)
+
+    def sweep_transform(self, transform_item):
+        """run transform_item on the current code item for a grid or list of argument sets"""
+        self.code_presenter.sweep_transform(self.code_presenter.current_item(), transform_item)
+
     def apply_current_transform(self):
         transform_item = self.current_item().source
         print("just got transform item %s" % transform_item)
@@ -100,9 +108,12 @@ class TransformPresenter(object):
         self.transform_pane.transform_tree_widget.build(self.transform_collections)
 
     def update_file(self, transform_collection):
+        """reload a saved transform file and recompute the code items its changed transforms made"""
         TransformPresenter.delete_module(transform_collection.package_name)
         transform_collection.update()
         self.transform_pane.transform_tree_widget.rebuild(transform_collection)
+        if self.code_presenter is not None:
+            self.code_presenter.recompute_derived(transform_collection)
 
     @staticmethod
     def delete_module(module_name):
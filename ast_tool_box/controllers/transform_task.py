@@ -0,0 +1,134 @@
+"""
+run a transform on a QThreadPool worker so a slow transform does not
+freeze the window
+
+python cannot stop a thread from outside, so cancelling a task marks it
+cancelled, its result is then dropped, and asks the interpreter to raise
+TransformCancelled in the worker thread.  That stops a transform that is
+running python code at the next bytecode, a transform stuck inside a
+single C call finishes that call first.  As the exception can land
+anywhere, a task puts the cyclic garbage collector back the way it found
+it when it leaves the worker thread, in case it landed inside a
+PausedCollection
+"""
+from __future__ import print_function
+
+import ctypes
+import gc
+import threading
+import time
+import traceback
+
+from PySide import QtCore
+
+
+class TransformCancelled(BaseException):
+    """raised inside a cancelled transform, a BaseException so transforms that catch Exception still stop"""
+    pass
+
+
+def interrupt_thread(thread_id, exception=TransformCancelled):
+    """have thread_id raise exception at its next check, None takes back one that has not been raised yet"""
+    thread_id_type = ctypes.c_long if str is bytes else ctypes.c_ulong
+    pending = ctypes.py_object(exception) if exception is not None else None
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(thread_id_type(thread_id), pending)
+
+
+class TransformTaskSignals(QtCore.QObject):
+    """a QRunnable is not a QObject, the task emits through one of these, made on the gui thread"""
+    finished = QtCore.Signal(object)
+    failed = QtCore.Signal(str)
+    progress = QtCore.Signal(object)
+
+
+class TransformTask(QtCore.QRunnable):
+    """
+    calls compute() on a worker thread and emits finished(result) or
+    failed(traceback text), compute can send partial results through report
+    """
+    def __init__(self, compute):
+        super(TransformTask, self).__init__()
+        self.setAutoDelete(False)
+        self.compute = compute
+        self.signals = TransformTaskSignals()
+        self.lock = threading.Lock()
+        self.thread_id = None
+        self.collecting = True
+        self.cancelled = False
+        self.started_at = time.time()
+
+    def start(self, thread_pool=None):
+        self.started_at = time.time()
+        (thread_pool or QtCore.QThreadPool.globalInstance()).start(self)
+
+    def elapsed(self):
+        return time.time() - self.started_at
+
+    def run(self):
+        try:
+            with self.lock:
+                if self.cancelled:
+                    return
+                self.thread_id = threading.current_thread().ident
+                self.collecting = gc.isenabled()
+            try:
+                result = self.compute()
+            finally:
+                self.leave_thread()
+            if not self.cancelled:
+                self.signals.finished.emit(result)
+        except TransformCancelled:
+            # the interrupt can land after compute returns, even inside leave_thread
+            self.leave_thread()
+        except Exception:
+            if not self.cancelled:
+                self.signals.failed.emit(traceback.format_exc())
+
+    def leave_thread(self):
+        """
+        forget the worker thread and take back an interrupt that cancel
+        asked for but the interpreter has not raised yet, python 2 only
+        raises it at the next check interval.  After this cancel cannot
+        reach the pool thread, which goes on to run other tasks.  The
+        garbage collector is turned back on if it was on when compute
+        started, an interrupt between gc.disable() and gc.enable() leaves it off
+        """
+        with self.lock:
+            if self.thread_id is not None:
+                interrupt_thread(self.thread_id, None)
+                self.thread_id = None
+                if self.collecting and not gc.isenabled():
+                    gc.enable()
+
+    def report(self, partial_result):
+        """emit progress(partial_result), called from compute on the worker thread"""
+        if not self.cancelled:
+            self.signals.progress.emit(partial_result)
+
+    def cancel(self):
+        with self.lock:
+            if not self.cancelled and self.thread_id is not None:
+                interrupt_thread(self.thread_id)
+            self.cancelled = True
+
+
+class TaskReceiver(QtCore.QObject):
+    """
+    hands a task's finished and failed signals to plain callables, on the
+    thread the receiver was made on, for work that has no pane of its own
+    """
+    def __init__(self, task, on_finished, on_failed):
+        super(TaskReceiver, self).__init__()
+        self.task = task
+        self.on_finished = on_finished
+        self.on_failed = on_failed
+        task.signals.finished.connect(self.finished)
+        task.signals.failed.connect(self.failed)
+
+    @QtCore.Slot(object)
+    def finished(self, result):
+        self.on_finished(result)
+
+    @QtCore.Slot(str)
+    def failed(self, message):
+        self.on_failed(message)
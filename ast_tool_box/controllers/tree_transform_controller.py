@@ -2,18 +2,34 @@ from __future__ import print_function
 
 from ast_tool_box.models.ast_tree_manager import AstTreeManager
 from ast_tool_box.models.ast_transformer_manager import AstTransformerManager
+from ast_tool_box.models.transform_models.transform_cache import TransformCache
+from ast_tool_box.models.transform_models.transform_profile import TransformProfile
+from ast_tool_box.models.code_models.shared_tree import transform_copy
 
 
 class TreeTransformController(object):
     def __init__(self):
         self.ast_tree_manager = AstTreeManager()
         self.ast_transformer_manager = AstTransformerManager()
+        self.transform_cache = TransformCache()
+        self.last_profile = None
 
     def clear(self):
         self.ast_tree_manager.clear()
         self.ast_transformer_manager.clear()
 
-    def apply_transform(self, tree=None, transform=None, name=None):
+    def transform_tree(self, tree, transform, arguments=()):
+        """
+        the ast made by applying transform, constructed with arguments, to a
+        copy of tree.  Results come from the transform_cache when they can
+        """
+        if isinstance(transform, int):
+            transform = self.ast_transformer_manager[transform]
+        return self.transform_cache.result(
+            tree, transform, arguments, lambda: transform.copy_and_transform(tree, *arguments)
+        )
+
+    def apply_transform(self, tree=None, transform=None, name=None, arguments=()):
         """
         creates a new ast_tree item by applying
         transform to tree, updates the controllers
@@ -25,8 +41,31 @@ class TreeTransformController(object):
             transform = self.ast_transformer_manager[transform]
 
         new_ast_tree = self.ast_tree_manager.create_transformed_child(
-            tree, transform, name=name
+            tree, transform, name=name, transform_cache=self.transform_cache, arguments=arguments
+        )
+        return new_ast_tree
+
+    def profile_transform(self, tree=None, transform=None, name=None, arguments=()):
+        """
+        apply_transform with the transform instrumented and never taken from
+        the cache, the TransformProfile is kept on the new item and as last_profile
+        """
+        if isinstance(tree, int):
+            tree = self.ast_tree_manager[tree]
+        if isinstance(transform, int):
+            transform = self.ast_transformer_manager[transform]
+
+        profile = TransformProfile(transform.name())
+
+        def instrumented(tree_copy):
+            return profile.instrument(transform.node_transformer(*arguments)).visit(tree_copy)
+
+        child_ast_tree = profile.timed(
+            lambda: transform_copy(tree.ast_tree, instrumented, transform.share_unchanged_nodes)
         )
+        new_ast_tree = self.ast_tree_manager.add_transformed_child(tree, transform, child_ast_tree, name=name)
+        new_ast_tree.transform_profile = profile
+        self.last_profile = profile
         return new_ast_tree
 
     def load_transforms(self, key):
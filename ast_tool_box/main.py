@@ -13,8 +13,11 @@ import ast_tool_box
 
 from ast_tool_box.controllers.tree_transform_controller import TreeTransformController
 from ast_tool_box.controllers.code_presenter import CodePresenter
+from ast_tool_box.models.ast_transformer_manager import AstTransformerItem
+from ast_tool_box.models.transform_models.transform_cache import default_cache_directory
 
 from ast_tool_box.controllers.transform_presenter import TransformPresenter
+from ast_tool_box.views.code_views.ast_tree_widget import AstTreePane, AstTreeWidget
 
 QtCore.QCoreApplication.setOrganizationName("Aspire Lab")
 QtCore.QCoreApplication.setOrganizationDomain("aspire.eecs.berkeley.edu")
@@ -200,6 +203,59 @@ class AstToolBox(QtGui.QMainWindow):
         self.auto_expand_ast = QtGui.QAction("Expand AST trees on create", self, checkable=True, checked=True)
         assert self.auto_expand_ast.toggled.connect(self.set_auto_expand)
 
+        self.lazy_trees_action = QtGui.QAction(
+            "Build AST rows on demand", self, checkable=True, checked=AstTreePane.lazy_trees
+        )
+        self.lazy_trees_action.toggled.connect(self.set_lazy_trees)
+        view_menu.addAction(self.lazy_trees_action)
+
+        self.incremental_trees_action = QtGui.QAction(
+            "Build full AST trees in time slices", self, checkable=True, checked=AstTreeWidget.build_incrementally
+        )
+        self.incremental_trees_action.toggled.connect(self.set_incremental_trees)
+        view_menu.addAction(self.incremental_trees_action)
+
+        self.share_unchanged_action = QtGui.QAction(
+            "Share unchanged nodes with derived trees", self, checkable=True,
+            checked=CodePresenter.share_unchanged_nodes
+        )
+        self.share_unchanged_action.toggled.connect(self.set_share_unchanged)
+        view_menu.addAction(self.share_unchanged_action)
+
+        self.background_action = QtGui.QAction(
+            "Run transforms in the background", self, checkable=True, checked=CodePresenter.run_in_background
+        )
+        self.background_action.toggled.connect(self.set_run_in_background)
+        view_menu.addAction(self.background_action)
+
+        self.recompute_action = QtGui.QAction(
+            "Recompute derived trees when transforms are saved", self, checkable=True,
+            checked=CodePresenter.recompute_on_save
+        )
+        self.recompute_action.toggled.connect(self.set_recompute_on_save)
+        view_menu.addAction(self.recompute_action)
+
+        self.instrument_action = QtGui.QAction(
+            "Instrument transforms (no cache)", self, checkable=True, checked=CodePresenter.instrument_transforms
+        )
+        self.instrument_action.toggled.connect(self.set_instrument_transforms)
+        view_menu.addAction(self.instrument_action)
+
+        self.prune_action = QtGui.QAction(
+            "Skip subtrees transforms cannot change", self, checkable=True, checked=CodePresenter.prune_transforms
+        )
+        self.prune_action.toggled.connect(self.set_prune_transforms)
+        view_menu.addAction(self.prune_action)
+
+        view_menu.addSeparator()
+        self.disk_cache_action = QtGui.QAction(
+            "Keep transform results on disk", self, checkable=True,
+            checked=self.tree_transform_controller.transform_cache.directory is not None
+        )
+        self.disk_cache_action.toggled.connect(self.set_disk_cache)
+        view_menu.addAction(self.disk_cache_action)
+        view_menu.addAction("Transform cache statistics", self.show_cache_statistics)
+
         self.menuBar().addSeparator()
         help_menu = self.menuBar().addMenu("&Help")
         help_menu.addAction('&About', self.about)
@@ -207,6 +263,34 @@ class AstToolBox(QtGui.QMainWindow):
     def set_auto_expand(self):
         self.tree_transform_controller.ast_tree_manager.set_auto_expand(self.auto_expand_ast.isChecked())
 
+    def set_lazy_trees(self, value):
+        AstTreePane.lazy_trees = value
+
+    def set_incremental_trees(self, value):
+        AstTreeWidget.build_incrementally = value
+
+    def set_disk_cache(self, value):
+        self.tree_transform_controller.transform_cache.use_directory(default_cache_directory if value else None)
+
+    def show_cache_statistics(self):
+        QtGui.QMessageBox.information(self, "Transform cache", str(self.tree_transform_controller.transform_cache))
+
+    def set_run_in_background(self, value):
+        CodePresenter.run_in_background = value
+
+    def set_instrument_transforms(self, value):
+        CodePresenter.instrument_transforms = value
+
+    def set_prune_transforms(self, value):
+        CodePresenter.prune_transforms = value
+
+    def set_recompute_on_save(self, value):
+        CodePresenter.recompute_on_save = value
+
+    def set_share_unchanged(self, value):
+        CodePresenter.share_unchanged_nodes = value
+        AstTransformerItem.share_unchanged_nodes = value
+
     def new_file(self):
         """ Clears the widgets """
         self.ast_tree.make_tree_from()
@@ -4,9 +4,10 @@ __author__ = 'Chick Markley'
 
 import sys
 import ast
-import copy
 from ast_tool_box.util import Util
+from ast_tool_box.models.code_models.shared_tree import transform_copy
 from ctree.codegen import CodeGenVisitor
+from ast_tool_box.transformers.fast_node_transformer import FastNodeTransformer
 
 
 class AstTransformerManager(object):
@@ -57,11 +58,15 @@ class AstTransformerManager(object):
             print("cannot load %s message %s" % (module_name, exception.message))
 
     def reload(self):
-        """rebuild list of all in memory subclasses of ast.NodeTransformer"""
+        """rebuild list of all in memory subclasses of ast.NodeTransformer and FastNodeTransformer"""
 
         self.transformer_items = map(
             lambda transformer: AstTransformerItem(transformer),
-            ast.NodeTransformer.__subclasses__()
+            [
+                transformer
+                for transformer in ast.NodeTransformer.__subclasses__() + FastNodeTransformer.__subclasses__()
+                if transformer is not FastNodeTransformer
+            ]
         )
 
         self.transformer_items += map(
@@ -109,6 +114,8 @@ class AstTransformerItem(object):
     Basic wrapper of an ast.NodeTransformer with convenience methods
     for creating, getting names etc
     """
+    share_unchanged_nodes = True
+
     def __init__(self, node_transformer):
         self.node_transformer = node_transformer
 
@@ -129,13 +136,13 @@ class AstTransformerItem(object):
         return None
 
     def copy_and_transform(self, *args, **kwargs):
+        """Transform a copy of a tree, the copy shares unchanged subtrees with the tree if share_unchanged_nodes"""
         if args:
-            new_ast = copy.deepcopy(args[0])
-            new_args = [new_ast]
-            new_args += args[1:]
-
-            new_ast = self.transform(*new_args, **kwargs)
-            return new_ast
+            return transform_copy(
+                args[0],
+                lambda tree_copy: self.transform(tree_copy, *args[1:], **kwargs),
+                self.share_unchanged_nodes,
+            )
         return None
 
 
@@ -41,11 +41,22 @@ class AstTreeManager(object):
                 return index
         return None
 
-    def create_transformed_child(self, ast_tree_item, ast_transform_item=None, name=None):
+    def create_transformed_child(self, ast_tree_item, ast_transform_item=None, name=None, transform_cache=None,
+                                 arguments=()):
         # child_ast_tree = copy.deepcopy(ast_tree_item.ast_tree)
         # if ast_transform_item:
         #     child_ast_tree = ast_transform_item.transform(child_ast_tree)
-        child_ast_tree = ast_transform_item.copy_and_transform(ast_tree_item.ast_tree)
+        def transform():
+            return ast_transform_item.copy_and_transform(ast_tree_item.ast_tree, *arguments)
+
+        if transform_cache is not None:
+            child_ast_tree = transform_cache.result(ast_tree_item.ast_tree, ast_transform_item, arguments, transform)
+        else:
+            child_ast_tree = transform()
+        return self.add_transformed_child(ast_tree_item, ast_transform_item, child_ast_tree, name=name)
+
+    def add_transformed_child(self, ast_tree_item, ast_transform_item, child_ast_tree, name=None):
+        """track child_ast_tree as the result of ast_transform_item applied to ast_tree_item"""
         link = AstLink(parent_ast_tree=ast_tree_item, transform_item=ast_transform_item)
         new_ast_tree_item = AstTreeItem(child_ast_tree, parent_link=link, name=name)
 
@@ -0,0 +1,97 @@
+"""
+copy an ast for a transform to work on, faster than copy.deepcopy
+
+each node is copied by making an empty instance of its class and taking
+over its attribute dict, then the attributes that hold anything mutable are
+replaced by copies.  Fields and _attributes such as lineno are usually
+strings, numbers or None and stay shared, nodes and lists of nodes are
+copied, anything else goes to deepcopy.  That covers ctree's CtreeNode
+subclasses, whose extra attributes and per instance _fields live in the
+same dict.  Nodes are copied from a work list so deep trees cannot hit the
+recursion limit, and a node that appears twice is copied once.  The work
+list ends up holding every (original, copy) pair
+"""
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+import ast
+import copy
+import gc
+
+immutable_types = frozenset([str, unicode, int, long, float, complex, bool, type(None), type]) \
+    if str is bytes else frozenset([str, bytes, int, float, complex, bool, type(None), type])
+
+
+class PausedCollection(object):
+    """
+    the cyclic garbage collector is off inside a with block, for code that
+    makes many objects that all stay alive, collecting while they are made
+    only rescans them.  A TransformCancelled raised between disable and
+    enable would leave it off, TransformTask turns it back on
+    """
+    def __enter__(self):
+        self.collecting = gc.isenabled()
+        gc.disable()
+
+    def __exit__(self, exception_type, exception, traceback):
+        if self.collecting:
+            gc.enable()
+
+
+class AstCloner(object):
+    """
+    copies a tree, subclasses choose what is copied through copy_root and
+    copy_value, and can set start_node to a method that is called with each
+    original before its attributes are copied
+    """
+    start_node = None
+
+    def __init__(self):
+        self.memo = {}
+        self.copies = []
+
+    def clone(self, tree):
+        with PausedCollection():
+            result = self.copy_root(tree)
+            copy_value = self.copy_value
+            start_node = self.start_node
+            # copy_value appends to copies while this loop walks it
+            for original, clone in self.copies:
+                if start_node is not None:
+                    start_node(original)
+                clone_dict = clone.__dict__
+                for name, value in original.__dict__.items():
+                    value_type = type(value)
+                    if value_type is list:
+                        clone_dict[name] = [copy_value(element) for element in value]
+                    elif value_type not in immutable_types:
+                        clone_dict[name] = copy_value(value)
+            return result
+
+    def copy_root(self, tree):
+        return self.copy_value(tree)
+
+    def copy_value(self, value):
+        value_type = type(value)
+        if value_type in immutable_types:
+            return value
+        if isinstance(value, ast.AST):
+            clone = self.memo.get(id(value))
+            if clone is None:
+                clone = value_type.__new__(value_type)
+                clone.__dict__.update(value.__dict__)
+                self.memo[id(value)] = clone
+                self.copies.append((value, clone))
+            return clone
+        if value_type is list:
+            return [self.copy_value(element) for element in value]
+        if value_type is tuple:
+            return tuple([self.copy_value(element) for element in value])
+        # the memo is shared so deepcopy reuses any node already copied here
+        return copy.deepcopy(value, self.memo)
+
+
+def clone_ast(tree):
+    """a copy of tree that shares nothing mutable with it"""
+    return AstCloner().clone(tree)
@@ -0,0 +1,451 @@
+"""
+structural difference between an ast and one derived from it
+
+nodes are matched in passes, each only looking at nodes that are still
+unmatched
+
+    subtrees both trees hold at the same depth, as a tree derived with
+        transform_copy shares what the transform left alone
+    subtrees whose hash occurs once in each tree, matched node for node
+    nodes whose class and scalar fields occur once in each tree
+    below each matched pair, children with identical subtrees then
+        children in the same field position with the same class
+    any remaining identical subtrees, in tree order
+    nodes whose matched children mostly came from one old node
+    the children of matched pairs by position once more
+
+whatever is left is inserted or deleted, matched nodes whose own values
+changed are updated and matched nodes that now hang off a different parent
+are moved.  Only ast nodes take part, scalar fields and operator and
+context nodes such as Add and Load are folded into their parent's label
+"""
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+import ast
+from collections import deque
+
+from ast_tool_box.models.code_models.ast_clone import PausedCollection
+from ast_tool_box.models.code_models.ast_row import list_page_size
+
+INSERTED = 'inserted'
+DELETED = 'deleted'
+MOVED = 'moved'
+UPDATED = 'updated'
+
+folded_classes = (ast.expr_context, ast.boolop, ast.operator, ast.unaryop, ast.cmpop)
+plain_scalars = frozenset([str, unicode, int, long, float, complex, bool, type(None)]) \
+    if str is bytes else frozenset([str, bytes, int, float, complex, bool, type(None)])
+
+
+def scalar_key(value):
+    if value.__class__ in plain_scalars:
+        return value
+    if isinstance(value, ast.AST):
+        return value.__class__.__name__
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def flattened(values):
+    """elements of a possibly nested list in the order child_fields gives them rows"""
+    stack = [iter(values)]
+    while stack:
+        for value in stack[-1]:
+            if isinstance(value, (list, tuple)):
+                stack.append(iter(value))
+                break
+            yield value
+        else:
+            stack.pop()
+
+
+class NodeInfo(object):
+    """
+    what the diff knows about one ast node, key is the field name and list
+    index it has in its parent and row is the number of the row showing it
+    below its parent's row in the tree views, or (page row, row in page)
+    for an element of a list long enough to be shown in pages
+    """
+    __slots__ = ('parent', 'key', 'row', 'children', 'label', 'hash', 'size')
+
+    def __init__(self, parent, key, row):
+        self.parent = parent
+        self.key = key
+        self.row = row
+        self.children = []
+        self.label = None
+        self.hash = None
+        self.size = 1
+
+
+class TreeInfo(object):
+    """
+    the ast nodes of a tree in pre-order and a NodeInfo for each of them,
+    a node set_shared, one the tree has in common with the tree it is
+    compared to, stands for its whole subtree, which is not looked into
+    """
+    def __init__(self, root):
+        self.root = root
+        self.nodes = []
+        self.info = {root: NodeInfo(None, None, 0)}
+        self.subtrees = {}
+
+    def add_children(self, ast_node):
+        """the NodeInfos of ast_node's children and its label, returns its children"""
+        info = self.info
+        ast_class = ast.AST
+        sequence_classes = (list, tuple)
+        node_info = info[ast_node]
+        children = node_info.children
+        scalars = [ast_node.__class__.__name__]
+        row = 0
+        for field_name in ast_node._fields:
+            value = getattr(ast_node, field_name, None)
+            if not value:
+                continue
+            if isinstance(value, sequence_classes):
+                if len(value) > list_page_size:
+                    pages = [
+                        (row + page_number, value[start:start + list_page_size])
+                        for page_number, start in enumerate(range(0, len(value), list_page_size))
+                    ]
+                    row += len(pages)
+                else:
+                    pages = [(None, value)]
+                index = 0
+                for page_row, elements in pages:
+                    for element in elements:
+                        if isinstance(element, sequence_classes):
+                            elements = list(flattened(elements))
+                            break
+                    for offset, element in enumerate(elements):
+                        element_row = row if page_row is None else (page_row, offset)
+                        if isinstance(element, ast_class) and not isinstance(element, folded_classes):
+                            info[element] = NodeInfo(ast_node, (field_name, index), element_row)
+                            children.append(element)
+                        else:
+                            scalars.append((field_name, index, scalar_key(element)))
+                        index += 1
+                        if page_row is None:
+                            row += 1
+            else:
+                if isinstance(value, ast_class) and not isinstance(value, folded_classes):
+                    info[value] = NodeInfo(ast_node, field_name, row)
+                    children.append(value)
+                else:
+                    scalars.append((field_name, scalar_key(value)))
+                row += 1
+        node_info.label = tuple(scalars)
+        return children
+
+    def add_subtrees(self, ast_nodes):
+        """add_children for every node below ast_nodes, keeping each one's subtree in pre-order for finish"""
+        for ast_node in ast_nodes:
+            subtree = self.subtrees[ast_node] = []
+            stack = [ast_node]
+            while stack:
+                ast_node = stack.pop()
+                subtree.append(ast_node)
+                stack.extend(reversed(self.add_children(ast_node)))
+
+    def set_shared(self, ast_node):
+        self.info[ast_node].label = ('shared', id(ast_node))
+
+    def finish(self):
+        """list the nodes in pre-order, then hash and size them bottom up"""
+        nodes = self.nodes
+        info = self.info
+        subtrees = self.subtrees
+        stack = [self.root]
+        while stack:
+            ast_node = stack.pop()
+            if ast_node in subtrees:
+                nodes.extend(subtrees.pop(ast_node))
+                continue
+            nodes.append(ast_node)
+            stack.extend(reversed(info[ast_node].children))
+
+        for ast_node in reversed(nodes):
+            node_info = info[ast_node]
+            child_infos = [info[child] for child in node_info.children]
+            node_info.hash = hash((node_info.label, tuple((child.key, child.hash) for child in child_infos)))
+            node_info.size = 1 + sum(child.size for child in child_infos)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def parent(self, ast_node):
+        return self.info[ast_node].parent
+
+    def subtree(self, ast_node):
+        """pre-order nodes of the subtree below and including ast_node"""
+        stack = [ast_node]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(self.info[node].children))
+
+    def row_path(self, ast_node):
+        """row numbers leading from the root row down to the row showing ast_node"""
+        path = []
+        node_info = self.info[ast_node]
+        while node_info.parent is not None:
+            if isinstance(node_info.row, tuple):
+                path.extend(reversed(node_info.row))
+            else:
+                path.append(node_info.row)
+            node_info = self.info[node_info.parent]
+        path.reverse()
+        return path
+
+
+class AstDiff(object):
+    """the matching between an old tree and a new one and the changes it implies"""
+    def __init__(self, old_root, new_root):
+        self.match = {}
+        self.reverse_match = {}
+        self.statuses = {}
+        self.deletions = {}
+        self.deleted_roots = []
+
+        # every node gets several small objects that live as long as the diff,
+        # collecting while they are made only rescans them and doubles the time
+        with PausedCollection():
+            self.old = TreeInfo(old_root)
+            self.new = TreeInfo(new_root)
+            self.index_trees()
+
+            self.match_unique('hash', whole_subtree=True)
+            self.match_unique('label', whole_subtree=False)
+            self.match_children_of_matches(identical_first=True)
+            self.match_identical_subtrees()
+            self.match_by_children()
+            self.match_children_of_matches(identical_first=False)
+
+            self.classify()
+
+    def index_trees(self):
+        """
+        index both trees a level at a time, a node found at the same depth
+        in both, as transform_copy leaves every subtree a transform did not
+        change, is matched to itself and not looked into.  Only the parts
+        of the trees that differ are indexed node by node.  Once two levels
+        in a row have nothing in common the trees are taken to be copies
+        and sharing is no longer looked for
+        """
+        old, new = self.old, self.new
+        if old.root is new.root:
+            old_level, new_level = [], []
+            old.set_shared(old.root)
+            new.set_shared(new.root)
+            self.add_match(new.root, old.root)
+        else:
+            old_level, new_level = [old.root], [new.root]
+        unshared_levels = 0
+        while old_level or new_level:
+            if unshared_levels == 2:
+                # trees that were copied whole share nothing, stop looking
+                old.add_subtrees(old_level)
+                new.add_subtrees(new_level)
+                break
+            old_children = []
+            for ast_node in old_level:
+                old_children.extend(old.add_children(ast_node))
+            new_children = []
+            for ast_node in new_level:
+                new_children.extend(new.add_children(ast_node))
+            shared = set(old_children).intersection(new_children) if old_children and new_children else ()
+            unshared_levels = 0 if shared else unshared_levels + 1
+            if shared:
+                for ast_node in shared:
+                    old.set_shared(ast_node)
+                    new.set_shared(ast_node)
+                    self.add_match(ast_node, ast_node)
+                old_children = [ast_node for ast_node in old_children if ast_node not in shared]
+                new_children = [ast_node for ast_node in new_children if ast_node not in shared]
+            old_level, new_level = old_children, new_children
+        old.finish()
+        new.finish()
+
+    def add_match(self, new_node, old_node):
+        self.match[new_node] = old_node
+        self.reverse_match[old_node] = new_node
+
+    def match_subtrees(self, new_node, old_node):
+        """pair up two identical subtrees node for node"""
+        match = self.match
+        reverse_match = self.reverse_match
+        new_info = self.new.info
+        old_info = self.old.info
+        stack = [(new_node, old_node)]
+        while stack:
+            new_node, old_node = stack.pop()
+            if new_node not in match and old_node not in reverse_match:
+                match[new_node] = old_node
+                reverse_match[old_node] = new_node
+            stack.extend(zip(new_info[new_node].children, old_info[old_node].children))
+
+    def match_unique(self, attribute, whole_subtree):
+        """match nodes whose hash or label occurs exactly once in each tree"""
+        new_keys = [getattr(self.new.info[new_node], attribute) for new_node in self.new.nodes]
+        repeated = {}
+        for key in new_keys:
+            repeated[key] = key in repeated
+        old_unique = {}
+        for old_node in self.old.nodes:
+            key = getattr(self.old.info[old_node], attribute)
+            old_unique[key] = None if key in old_unique else old_node
+
+        for new_node, key in zip(self.new.nodes, new_keys):
+            if repeated[key] or new_node in self.match:
+                continue
+            old_node = old_unique.get(key)
+            if old_node is None or old_node in self.reverse_match:
+                continue
+            if whole_subtree:
+                self.match_subtrees(new_node, old_node)
+            else:
+                self.add_match(new_node, old_node)
+
+    def match_children_of_matches(self, identical_first):
+        """top down, unmatched children of matched nodes pair up with identical or same class old children"""
+        new_info = self.new.info
+        old_info = self.old.info
+        for new_node in self.new.nodes:
+            old_node = self.match.get(new_node)
+            if old_node is None:
+                continue
+            unmatched = [child for child in new_info[new_node].children if child not in self.match]
+            if not unmatched:
+                continue
+            old_children = [child for child in old_info[old_node].children if child not in self.reverse_match]
+
+            if identical_first:
+                by_hash = {}
+                for old_child in old_children:
+                    by_hash.setdefault(old_info[old_child].hash, deque()).append(old_child)
+                for child in unmatched:
+                    candidates = by_hash.get(new_info[child].hash)
+                    while candidates and candidates[0] in self.reverse_match:
+                        candidates.popleft()
+                    if candidates:
+                        self.match_subtrees(child, candidates.popleft())
+
+            by_key = dict((old_info[old_child].key, old_child) for old_child in old_children)
+            for child in unmatched:
+                if child in self.match:
+                    continue
+                old_child = by_key.get(new_info[child].key)
+                if old_child is not None and old_child not in self.reverse_match \
+                        and old_child.__class__ is child.__class__:
+                    self.add_match(child, old_child)
+
+    def match_identical_subtrees(self):
+        """top down, any unmatched subtree with the hash of an unmatched old one, taken in tree order"""
+        old_by_hash = {}
+        for old_node in self.old.nodes:
+            if old_node not in self.reverse_match and self.old.info[old_node].size > 1:
+                old_by_hash.setdefault(self.old.info[old_node].hash, deque()).append(old_node)
+
+        stack = [self.new.root]
+        while stack:
+            new_node = stack.pop()
+            if new_node not in self.match:
+                candidates = old_by_hash.get(self.new.info[new_node].hash)
+                while candidates and candidates[0] in self.reverse_match:
+                    candidates.popleft()
+                if candidates:
+                    self.match_subtrees(new_node, candidates.popleft())
+                    continue
+            stack.extend(reversed(self.new.info[new_node].children))
+
+    def match_by_children(self):
+        """bottom up, an unmatched node takes the unmatched old parent most of its matched children came from"""
+        old_info = self.old.info
+        for new_node in reversed(self.new.nodes):
+            if new_node in self.match:
+                continue
+            votes = {}
+            for child in self.new.info[new_node].children:
+                old_child = self.match.get(child)
+                if old_child is not None:
+                    candidate = old_info[old_child].parent
+                    if candidate is not None and candidate not in self.reverse_match:
+                        votes[candidate] = votes.get(candidate, 0) + 1
+            best = None
+            for candidate, count in votes.items():
+                if candidate.__class__ is new_node.__class__ and (best is None or count > votes[best]):
+                    best = candidate
+            if best is not None:
+                self.add_match(new_node, best)
+
+        if self.new.root not in self.match and self.old.root not in self.reverse_match:
+            if self.new.root.__class__ is self.old.root.__class__:
+                self.add_match(self.new.root, self.old.root)
+
+    def classify(self):
+        new_info = self.new.info
+        old_info = self.old.info
+        for new_node in self.new.nodes:
+            old_node = self.match.get(new_node)
+            if old_node is None:
+                self.statuses[new_node] = INSERTED
+                continue
+            if new_info[new_node].label != old_info[old_node].label:
+                self.statuses[new_node] = UPDATED
+            new_parent = new_info[new_node].parent
+            if new_parent is not None and self.match.get(new_parent) is not old_info[old_node].parent:
+                self.statuses[new_node] = MOVED
+
+        for old_node in self.old.nodes:
+            if old_node in self.reverse_match:
+                continue
+            old_parent = old_info[old_node].parent
+            if old_parent is not None and old_parent not in self.reverse_match:
+                continue
+            self.deleted_roots.append(old_node)
+            self.deletions.setdefault(self.nearest_matched_ancestor(old_node), []).append(old_node)
+
+    def nearest_matched_ancestor(self, old_node):
+        """the new node standing where old_node's closest matched ancestor was, the new root if there is none"""
+        old_node = self.old.parent(old_node)
+        while old_node is not None:
+            if old_node in self.reverse_match:
+                return self.reverse_match[old_node]
+            old_node = self.old.parent(old_node)
+        return self.new.root
+
+    def has_changes(self):
+        return len(self.statuses) > 0 or len(self.deleted_roots) > 0
+
+    def node_marks(self):
+        """status of every new node that changed, nodes that only lost children are marked deleted"""
+        marks = dict((new_node, DELETED) for new_node in self.deletions)
+        marks.update(self.statuses)
+        return marks
+
+    def changed_regions(self):
+        """the changed new nodes and all their ancestors"""
+        region = set()
+        for new_node in self.node_marks():
+            while new_node is not None and new_node not in region:
+                region.add(new_node)
+                new_node = self.new.parent(new_node)
+        return region
+
+    def edit_script(self):
+        """
+        list of (operation, old node, new node) that turns the old tree
+        into the new one, deletions first then the new tree in pre-order
+        """
+        script = [(DELETED, old_node, None) for old_node in self.deleted_roots]
+        for new_node in self.new.nodes:
+            status = self.statuses.get(new_node)
+            if status is not None:
+                script.append((status, self.match.get(new_node), new_node))
+        return script
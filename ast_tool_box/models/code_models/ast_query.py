@@ -0,0 +1,244 @@
+"""
+a small path language for finding nodes in an ast by type, field and value
+
+    For                           every For node
+    For[target.id=i]//BinOp[op=Mult]
+                                  multiplications anywhere below a loop over i
+    FunctionDef[name=square]/Return
+                                  return statements directly in square
+    Call[func.attr]               calls of attributes
+    /Module/FunctionDef           top level functions
+
+steps are separated by / (child) or // (descendant), a query that does not
+start with / may match anywhere in the tree.  A step is a node class name or
+* followed by any number of predicates, [a.b=v] is true when following the
+fields a then b gives a value whose class name or text is v, != negates
+that, and [a.b] is true when the field exists and is not empty.  Lists
+along the way match if any element does
+"""
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+import ast
+import re
+from bisect import bisect_right
+from collections import OrderedDict
+
+
+class AstQueryError(ValueError):
+    pass
+
+
+class NodeTypeIndex(object):
+    """
+    the ast nodes below a root AstRow numbered in pre-order, with the number
+    of the last node in each subtree and, for every node class, the sorted
+    numbers of the nodes of that class.  Built once per tree, queries then
+    find the nodes of a type inside a subtree with two bisections
+    """
+    def __init__(self, root_row):
+        self.rows = []
+        self.ends = []
+        self.numbers_by_type = {}
+        self.number_of_row = {}
+
+        stack = [root_row]
+        while stack:
+            ast_row = stack.pop()
+            if isinstance(ast_row, int):
+                self.ends[ast_row] = len(self.rows) - 1
+                continue
+            if ast_row.is_ast():
+                number = len(self.rows)
+                self.rows.append(ast_row)
+                self.ends.append(number)
+                self.number_of_row[ast_row] = number
+                self.numbers_by_type.setdefault(ast_row.ast_node.__class__.__name__, []).append(number)
+                stack.append(number)
+            stack.extend(reversed(ast_row.children()))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def numbers_of_type(self, type_name):
+        if type_name == '*':
+            return range(len(self.rows))
+        return self.numbers_by_type.get(type_name, [])
+
+    def descendants_of_type(self, number, type_name):
+        """numbers of the nodes of type_name strictly inside the subtree of node number"""
+        numbers = self.numbers_of_type(type_name)
+        low = bisect_right(numbers, number)
+        high = bisect_right(numbers, self.ends[number], lo=low)
+        return numbers[low:high]
+
+    def children(self, number):
+        """numbers of the ast nodes directly below node number, rows for list elements count as direct"""
+        result = []
+        stack = list(reversed(self.rows[number].children()))
+        while stack:
+            ast_row = stack.pop()
+            if ast_row.is_ast():
+                result.append(self.number_of_row[ast_row])
+            else:
+                stack.extend(reversed(ast_row.children()))
+        return result
+
+
+class Predicate(object):
+    def __init__(self, path, operator=None, value=None):
+        self.path = path
+        self.operator = operator
+        self.value = value
+
+    def values(self, ast_node):
+        values = [ast_node]
+        for field_name in self.path:
+            next_values = []
+            for value in values:
+                if isinstance(value, (list, tuple)):
+                    candidates = value
+                else:
+                    candidates = [value]
+                for candidate in candidates:
+                    if hasattr(candidate, field_name):
+                        next_values.append(getattr(candidate, field_name))
+            values = next_values
+        flattened = []
+        for value in values:
+            if isinstance(value, (list, tuple)):
+                flattened.extend(value)
+            else:
+                flattened.append(value)
+        return flattened
+
+    def value_matches(self, value):
+        if isinstance(value, ast.AST):
+            return value.__class__.__name__ == self.value
+        return str(value) == self.value
+
+    def matches(self, ast_node):
+        values = self.values(ast_node)
+        if self.operator is None:
+            return any(value is not None for value in values)
+        found = any(self.value_matches(value) for value in values)
+        return found if self.operator == '=' else not found
+
+
+class Step(object):
+    def __init__(self, axis, type_name, predicates):
+        self.axis = axis
+        self.type_name = type_name
+        self.predicates = predicates
+
+    def matches(self, ast_node):
+        if self.type_name != '*' and ast_node.__class__.__name__ != self.type_name:
+            return False
+        for predicate in self.predicates:
+            if not predicate.matches(ast_node):
+                return False
+        return True
+
+
+class AstQuery(object):
+    """a compiled query, use compile_query to get one"""
+    token_pattern = re.compile(r"""
+        (?P<axis>//|/) |
+        (?P<name>[A-Za-z_][A-Za-z0-9_]*|\*) |
+        \[(?P<predicate>[^\]]*)\] |
+        (?P<space>\s+)
+    """, re.VERBOSE)
+    predicate_pattern = re.compile(
+        r"""^\s*([A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*)\s*(?:(!=|=)\s*(.*?)\s*)?$"""
+    )
+
+    def __init__(self, text):
+        self.text = text
+        self.steps = []
+        self.parse(text)
+
+    def parse(self, text):
+        axis = '//'
+        position = 0
+        step = None
+        while position < len(text):
+            match = AstQuery.token_pattern.match(text, position)
+            if match is None:
+                raise AstQueryError("cannot understand %r at position %d" % (text[position:], position))
+            position = match.end()
+            if match.group('space'):
+                continue
+            if match.group('axis'):
+                if step is None and self.steps:
+                    raise AstQueryError("%s with no node type before it in %s" % (match.group('axis'), text))
+                axis = match.group('axis')
+                step = None
+            elif match.group('name'):
+                if step is not None:
+                    raise AstQueryError("missing / before %s in %s" % (match.group('name'), text))
+                step = Step(axis, match.group('name'), [])
+                self.steps.append(step)
+            else:
+                if step is None:
+                    raise AstQueryError("predicate [%s] must follow a node type" % match.group('predicate'))
+                step.predicates.append(AstQuery.parse_predicate(match.group('predicate')))
+        if step is None:
+            raise AstQueryError("query %r must end with a node type" % text)
+
+    @staticmethod
+    def parse_predicate(text):
+        match = AstQuery.predicate_pattern.match(text)
+        if match is None:
+            raise AstQueryError("bad predicate [%s]" % text)
+        path, operator, value = match.groups()
+        if value is not None and len(value) > 1 and value[0] == value[-1] and value[0] in "'\"":
+            value = value[1:-1]
+        return Predicate(path.split('.'), operator, value)
+
+    def evaluate(self, type_index):
+        """the AstRows matched by the query in tree order"""
+        numbers = None
+        for step in self.steps:
+            numbers = self.apply_step(step, numbers, type_index)
+            if not numbers:
+                return []
+        return [type_index.rows[number] for number in numbers]
+
+    def apply_step(self, step, context, type_index):
+        rows = type_index.rows
+        if context is None:
+            if step.axis == '/':
+                candidates = [0] if len(rows) > 0 else []
+            else:
+                candidates = type_index.numbers_of_type(step.type_name)
+        elif step.axis == '/':
+            candidates = []
+            for number in context:
+                candidates.extend(type_index.children(number))
+            candidates.sort()
+        else:
+            candidates = []
+            covered_to = -1
+            for number in context:
+                if number <= covered_to:
+                    continue
+                candidates.extend(type_index.descendants_of_type(number, step.type_name))
+                covered_to = type_index.ends[number]
+        return [number for number in candidates if step.matches(rows[number].ast_node)]
+
+
+compiled_queries = OrderedDict()
+compiled_query_limit = 128
+
+
+def compile_query(text):
+    """the compiled AstQuery for text, compiled queries are cached by their text"""
+    text = text.strip()
+    query = compiled_queries.pop(text, None)
+    if query is None:
+        query = AstQuery(text)
+    compiled_queries[text] = query
+    if len(compiled_queries) > compiled_query_limit:
+        compiled_queries.popitem(last=False)
+    return query
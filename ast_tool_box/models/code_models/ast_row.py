@@ -0,0 +1,219 @@
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+import ast
+from itertools import islice
+
+list_page_size = 500
+label_value_limit = 200
+string_classes = (str, bytes, type(u''))
+
+
+def class_name(obj):
+    """ Returns the class name of an object"""
+    return obj.__class__.__name__
+
+
+class ListPage(object):
+    """
+    elements start up to stop of a list field that is too long to show as
+    one flat run of rows, the page is a row of its own and its elements are
+    the rows below it
+    """
+    __slots__ = ('field_name', 'values', 'start', 'stop')
+
+    def __init__(self, field_name, values, start, stop):
+        self.field_name = field_name
+        self.values = values
+        self.start = start
+        self.stop = stop
+
+    def label(self):
+        return "{}[{:d}:{:d}]".format(self.field_name, self.start, self.stop)
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __repr__(self):
+        return "ListPage(%s)" % self.label()
+
+
+def list_fields(field_name, values, start=0, stop=None):
+    """child_fields for the elements start up to stop of a list, nested lists are flattened"""
+    stack = [(field_name, enumerate(islice(values, start, stop), start), ())]
+    while stack:
+        label, elements, subscripts = stack[-1]
+        for index, element in elements:
+            element_label = "{}[{:d}]".format(label, index)
+            if isinstance(element, (list, tuple)):
+                stack.append((element_label, enumerate(element), subscripts + (index,)))
+                break
+            yield element_label, element, field_name, subscripts + (index,)
+        else:
+            stack.pop()
+
+
+def child_fields(ast_node):
+    """
+    yields (field_label, value, field_name, list_index) for every value that
+    gets its own row below ast_node.  list and tuple fields are flattened into
+    the parent, so body[0], body[1] etc. each become a row, list_index is the
+    tuple of subscripts that lead to the value.  A list longer than
+    list_page_size becomes ListPage rows such as body[0:500] whose elements
+    are only produced when the page's own children are asked for.  Empty and
+    false fields are skipped
+    """
+    if isinstance(ast_node, ListPage):
+        for fields in list_fields(ast_node.field_name, ast_node.values, ast_node.start, ast_node.stop):
+            yield fields
+        return
+
+    if not isinstance(ast_node, ast.AST):
+        return
+
+    for field_name, value in ast.iter_fields(ast_node):
+        if not value:
+            continue
+        if isinstance(value, (list, tuple)):
+            if len(value) > list_page_size:
+                for start in range(0, len(value), list_page_size):
+                    page = ListPage(field_name, value, start, min(start + list_page_size, len(value)))
+                    yield page.label(), page, field_name, None
+            else:
+                for fields in list_fields(field_name, value):
+                    yield fields
+        else:
+            yield field_name, value, field_name, None
+
+
+def has_child_fields(ast_node):
+    """True if child_fields would yield anything, without building the labels"""
+    if isinstance(ast_node, ListPage):
+        return len(ast_node) > 0
+    if not isinstance(ast_node, ast.AST):
+        return False
+    for _, value in ast.iter_fields(ast_node):
+        if value:
+            return True
+    return False
+
+
+def position_text(ast_node):
+    if hasattr(ast_node, 'lineno'):
+        return " ({:d}:{:d})".format(ast_node.lineno, ast_node.col_offset)
+    return ""
+
+
+def is_value_capped(value):
+    """True if the label of value leaves some of it out"""
+    if isinstance(value, string_classes):
+        return len(value) > label_value_limit
+    if isinstance(value, (ast.AST, ListPage)):
+        return False
+    return len(repr(value)) > label_value_limit
+
+
+def capped_repr(value):
+    """repr of value cut to about label_value_limit characters, long strings are cut before repr sees them"""
+    if isinstance(value, string_classes) and len(value) > label_value_limit:
+        return "{}... ({:d} characters)".format(repr(value[:label_value_limit]), len(value))
+    text = repr(value)
+    if len(text) > label_value_limit:
+        return "{}... ({:d} characters)".format(text[:label_value_limit], len(text))
+    return text
+
+
+def row_label(ast_node, field_label):
+    """the text shown for a node in the tree"""
+    if isinstance(ast_node, ast.AST):
+        node_str = "{} = {}".format(field_label, class_name(ast_node))
+    elif isinstance(ast_node, ListPage):
+        node_str = "{} ({:d} items)".format(field_label, len(ast_node))
+    else:
+        node_str = "{}: {}".format(field_label, capped_repr(ast_node))
+    return node_str + position_text(ast_node)
+
+
+class AstRow(object):
+    """
+    one row of a displayed ast tree.  Children and labels are only built
+    when they are first asked for, so a row costs almost nothing until
+    somebody looks at it.
+    """
+    __slots__ = ('ast_node', 'field_label', 'field_name', 'list_index', 'parent', 'row', '_children', '_label')
+
+    def __init__(self, ast_node, field_label, parent=None, row=0, field_name=None, list_index=None):
+        self.ast_node = ast_node
+        self.field_label = field_label
+        self.field_name = field_name
+        self.list_index = list_index
+        self.parent = parent
+        self.row = row
+        self._children = None
+        self._label = None
+
+    def children(self):
+        if self._children is None:
+            self._children = [
+                AstRow(value, label, parent=self, row=index, field_name=field_name, list_index=list_index)
+                for index, (label, value, field_name, list_index) in enumerate(child_fields(self.ast_node))
+            ]
+        return self._children
+
+    def children_built(self):
+        return self._children is not None
+
+    def has_children(self):
+        if self._children is not None:
+            return len(self._children) > 0
+        return has_child_fields(self.ast_node)
+
+    def label(self):
+        if self._label is None:
+            self._label = row_label(self.ast_node, self.field_label)
+        return self._label
+
+    def is_ast(self):
+        return isinstance(self.ast_node, ast.AST)
+
+    def ancestors(self):
+        """parent first, top of tree last"""
+        row = self.parent
+        while row is not None:
+            yield row
+            row = row.parent
+
+    def path(self):
+        """the row numbers from the top of the tree down to this row, what descendant follows"""
+        path = [self.row] if self.parent is not None else []
+        path.extend(row.row for row in self.ancestors() if row.parent is not None)
+        path.reverse()
+        return path
+
+    def descendant(self, path):
+        """the row reached by following the row numbers in path down from this one"""
+        row = self
+        for row_number in path:
+            row = row.children()[row_number]
+        return row
+
+    def nearest_ast_node(self):
+        """this node if it is an ast.AST, otherwise the closest ancestor that is"""
+        if self.is_ast():
+            return self.ast_node
+        for row in self.ancestors():
+            if row.is_ast():
+                return row.ast_node
+        return None
+
+    def walk(self):
+        """pre-order iteration over this row and all rows below it, builds children as it goes"""
+        stack = [self]
+        while stack:
+            row = stack.pop()
+            yield row
+            stack.extend(reversed(row.children()))
+
+    def __repr__(self):
+        return "AstRow(%s)" % self.label()
@@ -0,0 +1,85 @@
+"""
+turn a transformed tree into source text with ctree's code generators,
+kept apart from the gui so worker processes can generate code too
+
+the text is streamed, write_code hands it to a writer such as a list's
+append, a file's write or a ChunkBatcher a piece at a time, so a big
+Project is not built up by repeated string concatenation
+"""
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+import time
+
+
+def write_node_code(node, write, indent=0):
+    """the code for node to write, a chunk at a time when node can stream it"""
+    codegen_to = getattr(node, 'codegen_to', None)
+    if codegen_to is not None:
+        codegen_to(write, indent)
+    else:
+        write(node.codegen(indent))
+
+
+def write_code(ast_root, write):
+    """
+    Code generates each file in the project, handing the text to write as
+    it is made rather than building it up in one string
+    """
+    import ctree.nodes
+    # assert isinstance(ast_root, ctree.nodes.Project), \
+    #     "apply_code_gen root of tree not Project is a %s" % ast_root
+
+    # TODO: stay more in line with ctree and use ResolveGeneratedPathRefs
+
+    from ast_tool_box.transformers.NonCtreeNodeConverter import NonCtreeNodeConverter
+    converter = NonCtreeNodeConverter()
+    ast_root = converter.visit(ast_root)
+    if isinstance(ast_root, ctree.nodes.Project) and ast_root.files and len(ast_root.files) > 0:
+        for f in ast_root.files:
+            write("File %s\n" % f.name)
+            write_node_code(f, write)
+    else:
+        write_node_code(ast_root, write)
+
+
+def generate_code(ast_root):
+    """all of the code for ast_root in one string"""
+    chunks = []
+    write_code(ast_root, chunks.append)
+    return "".join(chunks)
+
+
+def generate_code_file(ast_root, file_name):
+    """write the code for ast_root straight into file_name"""
+    with open(file_name, "w") as code_file:
+        write_code(ast_root, code_file.write)
+
+
+class ChunkBatcher(object):
+    """
+    a writer that joins small chunks and hands them on to flush_to once
+    min_size characters are waiting or interval seconds have passed, so a
+    reader on another thread is not sent one message per node
+    """
+    def __init__(self, flush_to, min_size=65536, interval=0.1):
+        self.flush_to = flush_to
+        self.min_size = min_size
+        self.interval = interval
+        self.chunks = []
+        self.size = 0
+        self.flushed_at = time.time()
+
+    def write(self, chunk):
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+        if self.size >= self.min_size or time.time() - self.flushed_at >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self.chunks:
+            self.flush_to("".join(self.chunks))
+            self.chunks = []
+            self.size = 0
+        self.flushed_at = time.time()
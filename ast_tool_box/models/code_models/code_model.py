@@ -4,7 +4,9 @@ __author__ = 'Chick Markley'
 
 import ast
 import os
+import threading
 import ast_tool_box.models.transform_models.transform_file as transform_model
+from ast_tool_box.models.code_models.type_summary import TypeSummary
 
 
 class CodeItem(object):
@@ -18,6 +20,8 @@ class CodeItem(object):
         self.code_name = code_name
         self.path_name = path_name
         self.parent_code_item = parent_link
+        # set when the transform that made this item ran instrumented
+        self.transform_profile = None
 
     def name(self):
         return self.code_name
@@ -31,9 +35,10 @@ class CodeItem(object):
 
 class AstTreeItem(CodeItem):
     """
-    represent an ast and where it came from
+    represent an ast and where it came from, root_row is set when the
+    ast is a subtree shown from the rows of the parent item's tree
     """
-    def __init__(self, ast_tree, parent_link=None, name=None):
+    def __init__(self, ast_tree, parent_link=None, name=None, root_row=None):
         name = name if name else "Derived"
         super(AstTreeItem, self).__init__(
             ast_tree,
@@ -41,6 +46,24 @@ class AstTreeItem(CodeItem):
             parent_link=parent_link
         )
         self.ast_tree = ast_tree
+        self.root_row = root_row
+        self._type_summary = None
+        self.type_summary_lock = threading.Lock()
+
+    def type_summary(self):
+        """
+        the node types below each node of ast_tree, computed the first time
+        they are needed.  Worker threads asking at once wait for one build
+        """
+        if self._type_summary is None:
+            with self.type_summary_lock:
+                if self._type_summary is None:
+                    self._type_summary = TypeSummary(self.ast_tree)
+        return self._type_summary
+
+    def built_type_summary(self):
+        """the TypeSummary if it has been computed, None otherwise"""
+        return self._type_summary
 
     @staticmethod
     def from_source(source_text):
@@ -69,9 +92,33 @@ class GeneratedCodeItem(CodeItem):
         )
 
 
+class PendingCodeItem(CodeItem):
+    """
+    stands in for the result of a transform that is still running, task is
+    what runs it and make_item turns its result into the real code item.
+    When streams_code is set the task reports generated code as it is made
+    """
+    def __init__(self, task, make_item, name=None, parent_link=None, streams_code=False):
+        super(PendingCodeItem, self).__init__(
+            None,
+            code_name=name,
+            parent_link=parent_link
+        )
+        self.task = task
+        self.make_item = make_item
+        self.streams_code = streams_code
+
+
 class CodeTransformLink(object):
-    def __init__(self, code_item=None, transform_item=None):
+    """
+    where a code item came from, the item it was made from, the transform
+    and the evaluated arguments the transform was given.  row_path is set
+    when only the node at that row path of the item's tree was transformed
+    """
+    def __init__(self, code_item=None, transform_item=None, arguments=None, row_path=None):
         assert isinstance(code_item, CodeItem)
         assert transform_item is None or isinstance(transform_item, transform_model.TransformThing)
         self.code_item = code_item
-        self.transform_item = transform_item
\ No newline at end of file
+        self.transform_item = transform_item
+        self.arguments = list(arguments) if arguments else []
+        self.row_path = list(row_path) if row_path else None
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""
+which code items were derived from which, following the CodeTransformLink
+each item keeps to its parent, so that when a transform file is saved only
+the items downstream of the transforms that actually changed are recomputed
+"""
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+from ast_tool_box.models.code_models.code_model import PendingCodeItem
+from ast_tool_box.models.code_models.ast_row import AstRow
+
+
+def transform_changed(old_transform, new_transform):
+    """
+    True when new_transform, reloaded from the same collection, may not do
+    what old_transform did: its class source differs or the rest of its file does
+    """
+    return (
+        new_transform.source_text != old_transform.source_text or
+        new_transform.shared_source != old_transform.shared_source
+    )
+
+
+class DerivationGraph(object):
+    """
+    the code items of a code presenter as a graph from each item to the
+    items made from it.  Items are kept in the presenter's order, a derived
+    item is always added after its parent so that order is topological
+    """
+    def __init__(self, code_items):
+        self.code_items = list(code_items)
+        self.children_by_id = {}
+        for code_item in self.code_items:
+            link = code_item.parent_code_item
+            if link is not None and link.code_item is not None:
+                self.children_by_id.setdefault(id(link.code_item), []).append(code_item)
+
+    def children(self, code_item):
+        return list(self.children_by_id.get(id(code_item), []))
+
+    def descendants(self, code_item):
+        """every item derived from code_item, directly or not, parents before children"""
+        found = set()
+        stack = [code_item]
+        while stack:
+            for child in self.children_by_id.get(id(stack.pop()), []):
+                if id(child) not in found:
+                    found.add(id(child))
+                    stack.append(child)
+        return [other_item for other_item in self.code_items if id(other_item) in found]
+
+    def stale_items(self, is_changed):
+        """
+        the items made by a transform for which is_changed(transform_item)
+        is True and everything derived from them, parents before children.
+        Pending items are left to finish, their results are not followed
+        """
+        stale = set()
+        for code_item in self.code_items:
+            link = code_item.parent_code_item
+            if link is None or isinstance(code_item, PendingCodeItem):
+                continue
+            if id(link.code_item) in stale or (link.transform_item is not None and is_changed(link.transform_item)):
+                stale.add(id(code_item))
+        return [code_item for code_item in self.code_items if id(code_item) in stale]
+
+
+def recomputed_results(steps, transform):
+    """
+    the new tree, or generated code, of each stale item by id, steps are
+    the (code_item, transform_item) pairs for stale_items, parents before
+    children.  transform(link, tree, transform_item) applies transform_item
+    as link says to tree, or to link.code_item's tree when tree is None
+    because the parent was not recomputed.  A step without a transform_item
+    is a SubTree view, its result is the node at the view's row path in the
+    parent's new tree.  A view whose row is gone has no result and neither
+    has anything made from it
+    """
+    stale = set(id(code_item) for code_item, _ in steps)
+    results = {}
+    # the tree the rows of each recomputed item start from, a view shares its parent's
+    tops = {}
+    for code_item, transform_item in steps:
+        link = code_item.parent_code_item
+        parent_id = id(link.code_item)
+        if parent_id in stale and parent_id not in results:
+            continue
+        if transform_item is not None:
+            tree = transform(link, results.get(parent_id), transform_item)
+            results[id(code_item)] = tops[id(code_item)] = tree
+            continue
+        parent_tree = results.get(parent_id, link.code_item.ast_tree)
+        top = tops.get(parent_id, parent_tree)
+        if code_item.root_row is None:
+            results[id(code_item)] = parent_tree
+        else:
+            try:
+                ast_row = AstRow(top, "root").descendant(code_item.root_row.path())
+            except IndexError:
+                continue
+            if ast_row.field_name != code_item.root_row.field_name or not ast_row.is_ast():
+                continue
+            results[id(code_item)] = ast_row.ast_node
+        tops[id(code_item)] = top
+    return results
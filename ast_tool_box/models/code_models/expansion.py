@@ -0,0 +1,38 @@
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+from collections import deque
+
+
+def subtree_sizes(root_row):
+    """dict from each row below root_row to the number of rows in its subtree, itself included"""
+    sizes = {}
+    for ast_row in reversed(list(root_row.walk())):
+        size = 1
+        for child in ast_row.children():
+            size += sizes[child]
+        sizes[ast_row] = size
+    return sizes
+
+
+def breadth_first_expansion(root_row, budget):
+    """
+    the rows to expand so that at most budget rows are visible, rows are
+    taken breadth first starting with root_row and expansion stops at the
+    first row whose children no longer fit
+    """
+    visible = 1
+    to_expand = []
+    queue = deque([root_row])
+    while queue:
+        ast_row = queue.popleft()
+        children = ast_row.children()
+        if not children:
+            continue
+        if visible + len(children) > budget:
+            break
+        visible += len(children)
+        to_expand.append(ast_row)
+        queue.extend(child for child in children if child.has_children())
+    return to_expand
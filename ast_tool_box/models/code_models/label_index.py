@@ -0,0 +1,74 @@
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+from collections import OrderedDict
+
+
+class LabelIndex(object):
+    """
+    trigram index over the labels of every row below a root AstRow.
+    Searches are case insensitive substring matches like
+    Qt.MatchContains, a query of three or more characters only looks at
+    the rows that contain its rarest trigram.  Hits are returned in tree
+    order.  The hits of the most recent queries are kept, so repeating one
+    is free and a query that extends an earlier one, e.g. FunctionDef
+    after Fun, only filters the earlier hits
+    """
+    recent_query_count = 32
+
+    def __init__(self, root_row):
+        self.rows = []
+        self.labels = []
+        self.trigrams = {}
+        self.recent_queries = OrderedDict()
+
+        trigrams = self.trigrams
+        for number, ast_row in enumerate(root_row.walk()):
+            label = ast_row.label().lower()
+            self.rows.append(ast_row)
+            self.labels.append(label)
+            for trigram in set(label[start:start + 3] for start in range(len(label) - 2)):
+                postings = trigrams.get(trigram)
+                if postings is None:
+                    trigrams[trigram] = [number]
+                else:
+                    postings.append(number)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def candidates(self, text):
+        """row numbers that might contain text, in tree order"""
+        best = None
+        for query, (numbers, _) in self.recent_queries.items():
+            if query in text and (best is None or len(numbers) < len(best)):
+                best = numbers
+
+        if len(text) < 3:
+            return best if best is not None else range(len(self.labels))
+
+        for start in range(len(text) - 2):
+            postings = self.trigrams.get(text[start:start + 3])
+            if postings is None:
+                return []
+            if best is None or len(postings) < len(best):
+                best = postings
+        return best
+
+    def search(self, text):
+        """list of rows whose label contains text"""
+        text = text.lower()
+        if text in self.recent_queries:
+            numbers, hits = self.recent_queries.pop(text)
+            self.recent_queries[text] = (numbers, hits)
+            return hits
+
+        labels = self.labels
+        numbers = [number for number in self.candidates(text) if text in labels[number]]
+        hits = [self.rows[number] for number in numbers]
+
+        self.recent_queries[text] = (numbers, hits)
+        if len(self.recent_queries) > LabelIndex.recent_query_count:
+            self.recent_queries.popitem(last=False)
+        return hits
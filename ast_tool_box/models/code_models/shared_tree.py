@@ -0,0 +1,134 @@
+"""
+derived trees that share every subtree a transform left alone with the
+tree they came from
+
+a transform still works on a full clone, NodeTransformers change nodes in
+place and can reach any of them, so there is no safe way to copy only the
+nodes a transform is going to touch before it runs.  Afterwards the result
+is walked bottom up and every copy that still matches its original, with
+its children already swapped back, is replaced by the original.  What is
+left of the clone is the nodes on the paths the transform modified, the
+rest of it is garbage as soon as the transform is done
+"""
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+import ast
+
+from ast_tool_box.models.code_models.ast_clone import AstCloner, PausedCollection, clone_ast, immutable_types
+
+
+def field_nodes(value):
+    """the ast nodes in a field value, lists and tuples are flattened"""
+    if isinstance(value, ast.AST):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for element in value:
+            for node in field_nodes(element):
+                yield node
+
+
+def same_value(new_value, old_value):
+    """True if new_value can stand for old_value in an unchanged node"""
+    if new_value is old_value:
+        return True
+    value_type = type(new_value)
+    if value_type is not type(old_value):
+        return False
+    if value_type in (list, tuple):
+        if len(new_value) != len(old_value):
+            return False
+        for new_element, old_element in zip(new_value, old_value):
+            if new_element is not old_element and not same_value(new_element, old_element):
+                return False
+        return True
+    return value_type in immutable_types and new_value == old_value
+
+
+class SharedTreeBuilder(object):
+    """
+    swaps unchanged copies in a transform result back for their originals,
+    copies is the (original, copy) list of the AstCloner that made the tree
+    the transform worked on.  copies also keeps every copy alive while the
+    result is walked, so ids are not reused
+    """
+    def __init__(self, copies):
+        self.copies = copies
+        self.originals = dict((id(clone), original) for original, clone in copies)
+        self.settled = {}
+
+    def share_unchanged(self, result):
+        with PausedCollection():
+            settled = self.settled
+            # a node is settled once all of its children are, shared nodes such as Load are settled once
+            stack = [(result, False)]
+            while stack:
+                node, children_settled = stack.pop()
+                if id(node) in settled:
+                    continue
+                if children_settled:
+                    settled[id(node)] = self.settle(node)
+                    continue
+                stack.append((node, True))
+                node_dict = node.__dict__
+                for name in node._fields:
+                    value = node_dict.get(name)
+                    if isinstance(value, ast.AST):
+                        stack.append((value, False))
+                    elif type(value) in (list, tuple):
+                        stack.extend((child, False) for child in field_nodes(value) if id(child) not in settled)
+            if settled[id(result)] is not result:
+                # a derived tree keeps a root of its own even if nothing changed
+                result.__dict__.update(self.settled_fields(result))
+            return result
+
+    def settled_value(self, value):
+        if isinstance(value, ast.AST):
+            return self.settled.get(id(value), value)
+        if type(value) is list:
+            return [self.settled_value(element) for element in value]
+        if type(value) is tuple:
+            return tuple([self.settled_value(element) for element in value])
+        return value
+
+    def settled_fields(self, node):
+        return dict((name, self.settled_value(value)) for name, value in node.__dict__.items())
+
+    def settle(self, node):
+        """the original of node if nothing in it changed, otherwise node with its children settled"""
+        original = self.originals.get(id(node))
+        if original is not None:
+            old_values = original.__dict__
+            node_values = node.__dict__
+            if len(node_values) == len(old_values):
+                settled_value = self.settled_value
+                for name, value in node_values.items():
+                    if type(value) not in immutable_types:
+                        value = settled_value(value)
+                    if name not in old_values or not same_value(value, old_values[name]):
+                        break
+                else:
+                    return original
+        node.__dict__.update(self.settled_fields(node))
+        return node
+
+
+def transform_shared(tree, transform):
+    """
+    transform(a clone of tree), with every part of the result the transform
+    did not change shared with tree.  tree itself is never modified and the
+    result always has a root node of its own
+    """
+    cloner = AstCloner()
+    result = transform(cloner.clone(tree))
+    if not isinstance(result, ast.AST):
+        return result
+    return SharedTreeBuilder(cloner.copies).share_unchanged(result)
+
+
+def transform_copy(tree, transform, share_unchanged=True):
+    """transform a copy of tree, sharing unchanged subtrees with tree when share_unchanged is set"""
+    if share_unchanged:
+        return transform_shared(tree, transform)
+    return transform(clone_ast(tree))
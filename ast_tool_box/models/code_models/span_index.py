@@ -0,0 +1,116 @@
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+from bisect import bisect_right
+
+
+def node_start(ast_node):
+    if hasattr(ast_node, 'lineno') and hasattr(ast_node, 'col_offset'):
+        return ast_node.lineno, ast_node.col_offset
+    return None
+
+
+def node_end(ast_node):
+    """the end position python 3.8 and later record on nodes, None when there is none"""
+    if getattr(ast_node, 'end_lineno', None) is not None and getattr(ast_node, 'end_col_offset', None) is not None:
+        return ast_node.end_lineno, ast_node.end_col_offset
+    return None
+
+
+class SpanIndex(object):
+    """
+    the source span of every positioned ast node below a root AstRow and the
+    innermost node at any (line, column) in the source.  Ends come from
+    end_lineno and end_col_offset when the parser records them, otherwise a
+    node runs up to the start of the next node that is not inside it.
+    Spans are clipped so they nest, then flattened into sorted boundaries
+    each owned by the innermost row covering it, so a lookup is one bisection
+    """
+    def __init__(self, root_row):
+        self.spans = {}
+        self.boundaries = []
+        self.owners = []
+
+        entries = self.positioned_rows(root_row)
+        self.find_ends(entries)
+        self.flatten(entries)
+
+    @staticmethod
+    def positioned_rows(root_row):
+        """[row, start, end, parent entry] for rows with positions in pre-order, parent is the nearest positioned ancestor"""
+        entries = []
+        stack = [(root_row, None)]
+        while stack:
+            ast_row, parent_entry = stack.pop()
+            start = node_start(ast_row.ast_node) if ast_row.is_ast() else None
+            if start is not None:
+                entry = [ast_row, start, node_end(ast_row.ast_node), parent_entry]
+                entries.append(entry)
+                parent_entry = entry
+            stack.extend((child, parent_entry) for child in reversed(ast_row.children()))
+        return entries
+
+    @staticmethod
+    def find_ends(entries):
+        """nodes with no recorded end run to the start of the next node outside them"""
+        open_entries = []
+        for entry in entries:
+            parent_entry = entry[3]
+            while open_entries and open_entries[-1] is not parent_entry:
+                finished = open_entries.pop()
+                if finished[2] is None:
+                    finished[2] = entry[1]
+            open_entries.append(entry)
+
+        if entries:
+            last_line = max(entry[1][0] for entry in entries)
+            for entry in open_entries:
+                if entry[2] is None:
+                    entry[2] = (last_line + 1, 0)
+
+    def mark(self, position, owner):
+        """owner covers position onwards, a position at or before the last boundary replaces its owner"""
+        if self.boundaries and position <= self.boundaries[-1]:
+            self.owners[-1] = owner
+        else:
+            self.boundaries.append(position)
+            self.owners.append(owner)
+
+    def flatten(self, entries):
+        open_entries = []
+        for entry in entries:
+            ast_row, start, end, parent_entry = entry
+            while open_entries and open_entries[-1] is not parent_entry:
+                self.close(open_entries)
+
+            if parent_entry is not None:
+                parent_start, parent_end = self.spans[parent_entry[0]]
+                start = min(max(start, parent_start), parent_end)
+                end = min(end, parent_end)
+            end = max(start, end)
+
+            self.spans[ast_row] = (start, end)
+            self.mark(start, ast_row)
+            open_entries.append(entry)
+
+        while open_entries:
+            self.close(open_entries)
+
+    def close(self, open_entries):
+        ast_row = open_entries.pop()[0]
+        self.mark(self.spans[ast_row][1], open_entries[-1][0] if open_entries else None)
+
+    def span_of(self, ast_row):
+        """(start, end) of ast_row or of its closest positioned ancestor, None if there is none"""
+        for candidate in [ast_row] + list(ast_row.ancestors()):
+            if candidate in self.spans:
+                return self.spans[candidate]
+        return None
+
+    def row_at(self, line, column):
+        """the innermost positioned row whose span contains line, column"""
+        index = bisect_right(self.boundaries, (line, column)) - 1
+        if index < 0:
+            return None
+        return self.owners[index]
@@ -0,0 +1,93 @@
+"""
+transform one subtree of a tree and splice the result into a new version
+of the whole tree
+
+only the nodes on the path from the root down to the transformed subtree
+are copied, each one shallowly with the one field that leads down the path
+replaced, every other subtree is shared with the original tree.  The
+subtree itself is transformed with transform_copy, so the cost of a small
+targeted rewrite follows the size of the subtree and the depth of the path
+rather than the size of the tree
+"""
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+import ast
+
+from ast_tool_box.models.code_models.ast_row import AstRow
+from ast_tool_box.models.code_models.shared_tree import transform_copy
+
+
+def node_path(tree, row_path):
+    """
+    the ast nodes from tree down to the node at row_path in the rows of
+    tree, a row_path ending on a field value stops at the node that holds it
+    """
+    ast_row = AstRow(tree, "root").descendant(row_path)
+    rows = [ast_row] + list(ast_row.ancestors())
+    rows.reverse()
+    return [row.ast_node for row in rows if row.is_ast()]
+
+
+def find_child(parent, child):
+    """the field name of parent holding child and its index when that field is a list"""
+    for name in parent._fields:
+        value = getattr(parent, name, None)
+        if value is child:
+            return name, None
+        if isinstance(value, (list, tuple)):
+            for index, element in enumerate(value):
+                if element is child:
+                    return name, index
+    raise ValueError("%s is not a child of %s" % (type(child).__name__, type(parent).__name__))
+
+
+def replaced_child(parent, child, replacement):
+    """
+    a shallow copy of parent with child replaced by replacement, in a list
+    field a list replacement is spliced in and None removes the child
+    """
+    name, index = find_child(parent, child)
+    new_parent = type(parent).__new__(type(parent))
+    new_parent.__dict__.update(parent.__dict__)
+    if index is None:
+        if isinstance(replacement, list):
+            raise ValueError("cannot put a list of %d nodes in the %s field of %s" % (
+                len(replacement), name, type(parent).__name__
+            ))
+        setattr(new_parent, name, replacement)
+        return new_parent
+
+    elements = list(getattr(parent, name))
+    if replacement is None:
+        elements[index:index + 1] = []
+    elif isinstance(replacement, list):
+        elements[index:index + 1] = replacement
+    else:
+        elements[index] = replacement
+    setattr(new_parent, name, elements)
+    return new_parent
+
+
+def splice(nodes, replacement):
+    """
+    a new root for the tree nodes[0] in which nodes[-1] is replaced by
+    replacement, nodes is the path from the root down as made by node_path
+    """
+    if len(nodes) < 2:
+        if not isinstance(replacement, ast.AST):
+            raise ValueError("the root of a tree can only be replaced by a single node")
+        return replacement
+    for parent, child in zip(reversed(nodes[:-1]), reversed(nodes[1:])):
+        replacement = replaced_child(parent, child, replacement)
+    return replacement
+
+
+def transform_subtree(tree, row_path, transform, share_unchanged=True):
+    """
+    a new version of tree with the node at row_path replaced by what
+    transform makes of a copy of it, tree itself is never modified
+    """
+    nodes = node_path(tree, row_path)
+    return splice(nodes, transform_copy(nodes[-1], transform, share_unchanged))
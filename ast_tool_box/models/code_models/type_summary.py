@@ -0,0 +1,209 @@
+"""
+which node types occur in the subtree of each node of an ast, as a bitmap
+per node, so transforms can skip subtrees they cannot change
+
+a transform that leaves visit and generic_visit alone only does something
+to the node types it has visit_ methods for, every other node just has its
+children visited.  A subtree with none of those types below it comes back
+from the transform exactly as it went in, so it does not need to be walked
+at all.  Bits are handed out to node type names as they are first seen,
+names that end up sharing a bit only make pruning less effective
+"""
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+import ast
+import inspect
+
+from ast_tool_box.models.code_models.shared_tree import field_nodes, SharedTreeBuilder, transform_copy
+from ast_tool_box.models.code_models.ast_clone import AstCloner
+from ast_tool_box.models.transform_models.fused_transform import FusedNodeTransformer
+from ast_tool_box.transformers.fast_node_transformer import FastNodeTransformer
+
+type_bits = {}
+
+# the visit and generic_visit of these classes dispatch on the node type name and nothing else
+plain_dispatch_classes = (FastNodeTransformer, ast.NodeTransformer, ast.NodeVisitor, object)
+
+
+def type_bit(type_name):
+    bit = type_bits.get(type_name)
+    if bit is None:
+        bit = type_bits.setdefault(type_name, 1 << len(type_bits))
+    return bit
+
+
+def types_mask(type_names):
+    mask = 0
+    for type_name in type_names:
+        mask |= type_bit(type_name)
+    return mask
+
+
+def child_nodes(node):
+    node_dict = node.__dict__
+    children = []
+    for name in node._fields:
+        children.extend(field_nodes(node_dict.get(name)))
+    return children
+
+
+def handled_types(transformer_class):
+    """
+    the node type names transformer_class has visit_ methods for, None if
+    it replaces visit or generic_visit and so may do something anywhere
+    """
+    names = set()
+    for klass in inspect.getmro(transformer_class):
+        if klass in plain_dispatch_classes:
+            continue
+        if 'visit' in klass.__dict__ or 'generic_visit' in klass.__dict__:
+            return None
+        names.update(name[len('visit_'):] for name in klass.__dict__ if name.startswith('visit_'))
+    return names
+
+
+def visitor_handled_types(visitor):
+    """handled_types for a transformer instance, a fused one handles what its transformers do"""
+    if isinstance(visitor, FusedNodeTransformer):
+        names = set()
+        for transformer in visitor.transformers:
+            transformer_names = visitor_handled_types(transformer)
+            if transformer_names is None:
+                return None
+            names.update(transformer_names)
+        return names
+    return handled_types(type(visitor))
+
+
+class TypeSummary(object):
+    """a bitmap of the node types at and below every ast node of tree, keyed by node id"""
+    def __init__(self, tree):
+        self.tree = tree
+        self.masks = {}
+
+        masks = self.masks
+        stack = [(tree, None)]
+        while stack:
+            node, children = stack.pop()
+            if children is not None:
+                mask = type_bit(type(node).__name__)
+                for child in children:
+                    mask |= masks[id(child)]
+                masks[id(node)] = mask
+                continue
+            if id(node) in masks:
+                continue
+            children = child_nodes(node)
+            stack.append((node, children))
+            stack.extend((child, None) for child in children)
+
+    def mask_of(self, node):
+        """the bitmap for node, None for a node that is not in the tree"""
+        return self.masks.get(id(node))
+
+    def types_below(self, node):
+        """names of the node types at and below node, None for a node that is not in the tree"""
+        mask = self.mask_of(node)
+        if mask is None:
+            return None
+        return set(type_name for type_name, bit in type_bits.items() if bit & mask)
+
+    def can_change(self, node, transformer_class):
+        """False when transformer_class is sure to leave the subtree at node as it is"""
+        names = handled_types(transformer_class)
+        mask = self.mask_of(node)
+        if names is None or mask is None:
+            return True
+        return bool(mask & types_mask(names))
+
+
+def prune(visitor, summary, originals=None):
+    """
+    make visitor skip the subtrees summary says it cannot change, returns
+    visitor.  originals maps the ids of the nodes visitor will see to the
+    nodes of summary's tree they were copied from, nodes that are in
+    neither are always visited
+    """
+    names = visitor_handled_types(visitor)
+    if names is None:
+        return visitor
+    handled = types_mask(names)
+    masks = summary.masks
+    visit = visitor.visit
+
+    def pruned_visit(node):
+        key = id(node)
+        if originals is not None:
+            original = originals.get(key)
+            key = id(original) if original is not None else None
+        mask = masks.get(key)
+        if mask is not None and not mask & handled:
+            return node
+        return visit(node)
+
+    visitor.visit = pruned_visit
+    return visitor
+
+
+class PruningCloner(AstCloner):
+    """
+    clones only the part of a tree a transform handling the types in the
+    handled bitmap can reach, the nodes whose subtree holds a handled type
+    and everything below a node of a handled type, whose visit_ method may
+    change any of it.  The rest is shared with the tree, shared lists the
+    roots of those subtrees.  The root is always cloned
+    """
+    def __init__(self, summary, handled):
+        super(PruningCloner, self).__init__()
+        self.masks = summary.masks
+        self.handled = handled
+        self.shared = []
+        # ids of the originals that are or are below a node of a handled type
+        self.inside = set()
+        self.copying_inside = False
+
+    def copy_value(self, value):
+        if isinstance(value, ast.AST) and id(value) not in self.memo:
+            if self.copying_inside or type_bit(type(value).__name__) & self.handled:
+                self.inside.add(id(value))
+            else:
+                mask = self.masks.get(id(value))
+                if mask is not None and not mask & self.handled:
+                    self.shared.append(value)
+                    return value
+        return super(PruningCloner, self).copy_value(value)
+
+    def copy_root(self, tree):
+        return super(PruningCloner, self).copy_value(tree)
+
+    def start_node(self, original):
+        self.copying_inside = id(original) in self.inside
+
+
+def pruned_transform_copy(tree, summary, visitor, share_unchanged=True):
+    """
+    transform_copy(tree, visitor.visit, share_unchanged) without walking
+    the subtrees of tree that summary says visitor cannot change, sharing
+    them is what share_unchanged would do anyway so they are not copied
+    either
+    """
+    names = visitor_handled_types(visitor)
+    if names is None:
+        return transform_copy(tree, visitor.visit, share_unchanged)
+    if not share_unchanged:
+        cloner = AstCloner()
+        clone = cloner.clone(tree)
+        originals = dict((id(copy), original) for original, copy in cloner.copies)
+        return prune(visitor, summary, originals).visit(clone)
+
+    cloner = PruningCloner(summary, types_mask(names))
+    clone = cloner.clone(tree)
+    builder = SharedTreeBuilder(cloner.copies)
+    builder.settled.update((id(node), node) for node in cloner.shared)
+    # the shared originals are the only nodes of the clone summary knows
+    result = prune(visitor, summary).visit(clone)
+    if not isinstance(result, ast.AST):
+        return result
+    return builder.share_unchanged(result)
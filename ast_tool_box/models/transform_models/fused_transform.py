@@ -0,0 +1,278 @@
+"""
+run several node local NodeTransformers in one walk of a tree instead of
+one walk, and one copy, per transform
+
+a transform is node local when what it does to a node depends on that node
+alone, not on its children, it keeps no state from one node to the next
+and it visits the children of every node it keeps.  For such transforms,
+offering every node to each transform's visit_ method in turn, after the
+node's children are done, gives the tree running them one after another
+would.  A transform class says so with node_local = True, or
+node_local_problems looks at its source and accepts it when no method
+other than __init__ changes self, it does not call self.visit itself, it
+does not replace visit or generic_visit, other than through
+FastNodeTransformer, and its visit_ methods only touch the node's own
+scalar fields, like Name.id, and call generic_visit before returning the
+node they were given.  The check is conservative, node_local = False opts
+out
+"""
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+import ast
+import inspect
+import textwrap
+
+from ast_tool_box.transformers.fast_node_transformer import FastNodeTransformer
+
+
+def self_attribute(node):
+    """the name of the attribute of self that node stores into or works on, if any"""
+    while isinstance(node, (ast.Attribute, ast.Subscript)):
+        value = node.value
+        if isinstance(node, ast.Attribute) and isinstance(value, ast.Name) and value.id == 'self':
+            return node.attr
+        node = value
+    return None
+
+
+def method_problems(class_name, function, method_names):
+    problems = []
+    for node in ast.walk(function):
+        targets = []
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AugAssign):
+            targets = [node.target]
+        for target in targets:
+            for target_node in ast.walk(target):
+                attribute = self_attribute(target_node)
+                if attribute is not None and function.name != '__init__':
+                    problems.append("%s.%s changes self.%s" % (class_name, function.name, attribute))
+                    break
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            called = node.func
+            if isinstance(called.value, ast.Name) and called.value.id == 'self' and called.attr == 'visit':
+                problems.append("%s.%s calls self.visit" % (class_name, function.name))
+            attribute = self_attribute(called.value)
+            if attribute is not None and attribute not in method_names and function.name != '__init__':
+                problems.append("%s.%s calls %s on self.%s" % (class_name, function.name, called.attr, attribute))
+    return problems
+
+
+# fields that hold a value rather than child nodes
+scalar_fields = frozenset([
+    'id', 'n', 's', 'attr', 'name', 'arg', 'asname', 'module', 'level', 'kind', 'is_async', 'conversion',
+    'type_comment',
+])
+
+# things a visit_ method may hand its node to without reading the node's children
+node_safe_calls = frozenset(['generic_visit', 'copy_location', 'isinstance', 'type', 'id'])
+
+
+def child_fields(class_name):
+    """the fields of the ast class class_name that can hold nodes, None if there is no such class"""
+    node_class = getattr(ast, class_name, None)
+    if not (inspect.isclass(node_class) and issubclass(node_class, ast.AST)):
+        return None
+    scalars = scalar_fields
+    if class_name in ('Constant', 'NameConstant'):
+        scalars = scalars | set(['value'])
+    elif class_name == 'ExceptHandler':
+        # a string in python 3, an expression in python 2
+        scalars = scalars - set(['name'])
+    return [field for field in node_class._fields if field not in scalars]
+
+
+def called_name(call):
+    if isinstance(call.func, ast.Attribute):
+        return call.func.attr
+    if isinstance(call.func, ast.Name):
+        return call.func.id
+    return None
+
+
+def argument_name(argument):
+    return argument.id if isinstance(argument, ast.Name) else getattr(argument, 'arg', None)
+
+
+def visits_children_first(function, node_name):
+    """true if the first statement of function, after any docstring, is self.generic_visit(node) or node = ..."""
+    statements = function.body
+    if statements and isinstance(statements[0], ast.Expr) and ast.get_docstring(function) is not None:
+        statements = statements[1:]
+    if not statements:
+        return False
+    first = statements[0]
+    if isinstance(first, ast.Assign):
+        if not (len(first.targets) == 1 and isinstance(first.targets[0], ast.Name) and
+                first.targets[0].id == node_name):
+            return False
+    elif not isinstance(first, ast.Expr):
+        return False
+    call = first.value
+    return isinstance(call, ast.Call) and called_name(call) == 'generic_visit'
+
+
+def visit_method_problems(class_name, function, handled_names):
+    """
+    why the visit_ method function could give a different tree fused, it
+    must not read or set the node's children, which later transforms have
+    already changed when it runs fused, nor keep the node without visiting
+    its children
+    """
+    where = "%s.%s" % (class_name, function.name)
+    if len(function.args.args) < 2:
+        return []
+    node_name = argument_name(function.args.args[1])
+    visited_class = function.name[len('visit_'):]
+    children = child_fields(visited_class)
+    problems = []
+    if children is None:
+        problems.append("%s cannot tell which fields of %s hold nodes" % (where, visited_class))
+
+    parents = {}
+    for parent in ast.walk(function):
+        for child in ast.iter_child_nodes(parent):
+            parents[child] = parent
+    for use in ast.walk(function):
+        if not (isinstance(use, ast.Name) and use.id == node_name) or use not in parents:
+            continue
+        parent = parents[use]
+        if isinstance(parent, ast.Attribute):
+            if children is not None and parent.attr in children:
+                problems.append("%s uses %s.%s, a child of the node" % (where, node_name, parent.attr))
+        elif isinstance(parent, ast.Call):
+            if use is not parent.func and called_name(parent) not in node_safe_calls:
+                problems.append("%s passes %s to %s" % (where, node_name, called_name(parent)))
+        elif isinstance(parent, ast.Assign):
+            if use not in parent.targets:
+                problems.append("%s copies %s" % (where, node_name))
+        elif not isinstance(parent, (ast.Return, ast.Compare, ast.arguments)):
+            problems.append("%s uses %s in a %s" % (where, node_name, type(parent).__name__))
+
+    context_methods = set('visit_' + context.__name__ for context in ast.expr_context.__subclasses__())
+    has_no_children = children is not None and (
+        not children or (children == ['ctx'] and not context_methods & handled_names)
+    )
+    if not has_no_children and not visits_children_first(function, node_name):
+        for node in ast.walk(function):
+            if isinstance(node, ast.Return) and isinstance(node.value, ast.Name) and node.value.id == node_name:
+                problems.append("%s returns %s without calling generic_visit first" % (where, node_name))
+                break
+    return problems
+
+
+def node_local_problems(transformer_class):
+    """why transformer_class cannot be fused with other transforms, an empty list if it can"""
+    declared = getattr(transformer_class, 'node_local', None)
+    if declared is True:
+        return []
+    name = getattr(transformer_class, '__name__', str(transformer_class))
+    if declared is False:
+        return ["%s declares node_local = False" % name]
+    if not (inspect.isclass(transformer_class) and issubclass(transformer_class, ast.NodeTransformer)):
+        return ["%s is not an ast.NodeTransformer" % name]
+
+    problems = []
+    handled_names = set(name for name in dir(transformer_class) if name.startswith('visit_'))
+    for klass in inspect.getmro(transformer_class):
+        if klass in (FastNodeTransformer, ast.NodeTransformer, ast.NodeVisitor, object):
+            continue
+        for method_name in ('visit', 'generic_visit'):
+            if method_name in klass.__dict__:
+                problems.append("%s replaces %s" % (klass.__name__, method_name))
+        try:
+            class_def = ast.parse(textwrap.dedent(inspect.getsource(klass))).body[0]
+        except (IOError, TypeError, SyntaxError, IndexError):
+            problems.append("source of %s is not available" % klass.__name__)
+            continue
+        functions = [node for node in class_def.body if isinstance(node, ast.FunctionDef)]
+        method_names = set(function.name for function in functions)
+        for function in functions:
+            problems.extend(method_problems(klass.__name__, function, method_names))
+            if function.name.startswith('visit_'):
+                problems.extend(visit_method_problems(klass.__name__, function, handled_names))
+    return problems
+
+
+def returns_node(node):
+    return node
+
+
+class FusedNodeTransformer(ast.NodeTransformer):
+    """
+    a single post order walk that offers each node to the visit_ method of
+    each transformer in turn.  A replacement node, or list of nodes, is
+    walked, children included, by the transformers after the one that made
+    it and None ends the node.  The transformers'
+    generic_visit does nothing, the walk does the recursion
+    """
+    def __init__(self, transformers):
+        super(FusedNodeTransformer, self).__init__()
+        self.transformers = list(transformers)
+        for transformer in self.transformers:
+            transformer.generic_visit = returns_node
+        self.visit_methods = {}
+
+    def methods_for(self, node_class):
+        """(index, bound visit_ method) of each transformer that handles node_class"""
+        methods = self.visit_methods.get(node_class)
+        if methods is None:
+            method_name = 'visit_' + node_class.__name__
+            methods = [
+                (index, getattr(transformer, method_name))
+                for index, transformer in enumerate(self.transformers)
+                if hasattr(transformer, method_name)
+            ]
+            self.visit_methods[node_class] = methods
+        return methods
+
+    def visit(self, node):
+        self.generic_visit(node)
+        return self.offer(node)
+
+    def offer(self, node, start=0):
+        """node after each transformer from start on has had its turn at it"""
+        for index, method in self.methods_for(type(node)):
+            if index < start:
+                continue
+            result = method(node)
+            if result is node:
+                continue
+            if result is None:
+                return None
+            return self.walk(result, index + 1)
+        return node
+
+    def walk(self, result, start):
+        """
+        a replacement made by transformer start - 1 after the transformers
+        from start on have walked all of it, run one after another they
+        would visit its new children too.  The replacement is taken to be
+        made of new nodes, a transform that declares node_local = True
+        must not hand back the children of the node it was given
+        """
+        if isinstance(result, list):
+            walked = []
+            for node in result:
+                if isinstance(node, ast.AST):
+                    node = self.walk(node, start)
+                if isinstance(node, list):
+                    walked.extend(node)
+                elif node is not None:
+                    walked.append(node)
+            return walked
+        if start >= len(self.transformers):
+            return result
+        for field, value in ast.iter_fields(result):
+            if isinstance(value, list):
+                setattr(result, field, self.walk(value, start))
+            elif isinstance(value, ast.AST):
+                new_value = self.walk(value, start)
+                if new_value is None:
+                    delattr(result, field)
+                else:
+                    setattr(result, field, new_value)
+        return self.offer(result, start)
@@ -0,0 +1,342 @@
+"""
+results of applying transforms, so applying the same transform with the
+same arguments to the same tree again costs a lookup instead of a copy and
+a visit
+
+the key of a result combines a fingerprint of the structure of the input
+tree, a hash of the source_text of the transform, the repr of the
+evaluated arguments and the dependency_signature of the transform, so a
+result on disk is not reused after the modules the transform relies on,
+ctree or python change.  The most recently used results are kept in memory,
+and optionally in a directory as pickles, which is how the gui and the
+AstTransformInterpreter shell share them.  Cached trees are handed out as
+they are, derived trees are never changed in place so that is safe
+"""
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+import ast
+import hashlib
+import inspect
+import os
+import sys
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+default_cache_directory = os.path.join(os.path.expanduser("~"), ".ast_tool_box_cache")
+
+
+def tree_fingerprint(tree):
+    """
+    sha1 hex digest of the node types and attributes of tree, trees with the
+    same structure and values have the same fingerprint in any process.
+    Every entry of a node's attribute dict counts, as it does for AstCloner,
+    so ctree's FunctionDecl.name or SymbolRef._global do even though they
+    are not in _fields
+    """
+    # scalars are written where they occur, nodes and lists are written as @
+    # and follow in order, every node and list gives its length so nothing is
+    # ambiguous.  A node met again, say through a parent link, is written as
+    # its number in the order nodes were first met
+    parts = []
+    append = parts.append
+    numbers = {}
+    stack = [tree]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, ast.AST):
+            number = numbers.get(id(value))
+            if number is not None:
+                append("^%d" % number)
+                continue
+            numbers[id(value)] = len(numbers)
+            items = sorted(value.__dict__.items())
+            append("%s/%d" % (type(value).__name__, len(items)))
+            children = []
+            for name, field in items:
+                if isinstance(field, (ast.AST, list, tuple)):
+                    append(name + "@")
+                    children.append(field)
+                else:
+                    append("%s=%r" % (name, field))
+        else:
+            append("[%d" % len(value))
+            children = []
+            for element in value:
+                if isinstance(element, (ast.AST, list, tuple)):
+                    append("@")
+                    children.append(element)
+                else:
+                    append("=%r" % (element,))
+        children.reverse()
+        stack.extend(children)
+    return hashlib.sha1("\n".join(parts).encode('utf-8')).hexdigest()
+
+
+def transform_source(transform_thing):
+    """
+    the source_text of a transform item, or of the class it wraps, plus the
+    rest of its file when the item knows it
+    """
+    source_text = getattr(transform_thing, 'source_text', None)
+    if source_text is None:
+        transform_class = getattr(transform_thing, 'node_transformer', transform_thing)
+        try:
+            source_text = inspect.getsource(transform_class)
+        except (IOError, TypeError):
+            source_text = "%s.%s" % (transform_class.__module__, transform_class.__name__)
+    shared_source = getattr(transform_thing, 'shared_source', '')
+    return source_text + "\n" + shared_source if shared_source else source_text
+
+
+# files under these belong to the python installation, which the python version stands for
+installation_directories = tuple(set(
+    os.path.join(os.path.realpath(directory), '') for directory in (sys.prefix, sys.exec_prefix)
+))
+
+
+def transform_classes(transform_thing):
+    """the classes a transform item, or a transform class, runs"""
+    transform_items = getattr(transform_thing, 'transform_items', None)
+    if transform_items is not None:
+        return [transform_class for item in transform_items for transform_class in transform_classes(item)]
+    transform_class = getattr(transform_thing, 'node_transformer', None) or \
+        getattr(transform_thing, 'transform', None) or transform_thing
+    return [transform_class] if inspect.isclass(transform_class) else []
+
+
+def module_files(transform_class):
+    """
+    the source file of the module defining transform_class and of the
+    modules it imports, or imports names from, other than those installed
+    with python
+    """
+    module = sys.modules.get(getattr(transform_class, '__module__', None))
+    if module is None:
+        return []
+    modules = [module]
+    for value in list(vars(module).values()):
+        if inspect.ismodule(value):
+            modules.append(value)
+        else:
+            module_name = getattr(value, '__module__', None)
+            if isinstance(module_name, str):
+                modules.append(sys.modules.get(module_name))
+    file_names = set()
+    for used_module in modules:
+        file_name = getattr(used_module, '__file__', None)
+        if not file_name:
+            continue
+        file_name = os.path.realpath(file_name)
+        if file_name.endswith(('.pyc', '.pyo')) and os.path.exists(file_name[:-1]):
+            file_name = file_name[:-1]
+        if not file_name.startswith(installation_directories):
+            file_names.add(file_name)
+    return sorted(file_names)
+
+
+ctree_versions = []
+
+
+def ctree_version():
+    """ctree.__version__, or when it has none the modification time of the installed ctree, None without ctree"""
+    if not ctree_versions:
+        try:
+            import ctree
+            version = getattr(ctree, '__version__', None) or repr(os.stat(ctree.__file__).st_mtime)
+        except (ImportError, OSError):
+            version = None
+        ctree_versions.append(version)
+    return ctree_versions[0]
+
+
+def dependency_signature(transform_thing):
+    """
+    the python and ctree versions plus the size and modification time of
+    each of the module_files of transform_thing's classes
+    """
+    parts = ["python %d.%d" % sys.version_info[:2], "ctree %s" % ctree_version()]
+    for transform_class in transform_classes(transform_thing):
+        for file_name in module_files(transform_class):
+            try:
+                status = os.stat(file_name)
+            except OSError:
+                continue
+            parts.append("%s %d %r" % (file_name, status.st_size, status.st_mtime))
+    return "\n".join(parts)
+
+
+def remove_file(path):
+    """delete path, if it is still there"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class TransformCache(object):
+    """
+    size bounded lru cache of transform results with an optional on disk
+    tier, hits, disk_hits and misses count the lookups.  A result that
+    cannot be pickled is only kept in memory.  Lookups can come from
+    background transforms, the lock guards the in memory state but not the
+    transforms themselves
+    """
+    entry_limit = 64
+    disk_entry_limit = 512
+    # seconds after which a temporary file is taken to be left over rather than being written
+    temporary_file_age = 3600
+    fingerprint_limit = 64
+
+    def __init__(self, directory=None):
+        self.entries = OrderedDict()
+        self.fingerprints = OrderedDict()
+        self.directory = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if directory:
+            self.use_directory(directory)
+
+    def use_directory(self, directory=default_cache_directory):
+        """keep results in directory as well as in memory, None turns the disk tier off"""
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+
+    def fingerprint(self, tree):
+        """tree_fingerprint of tree, remembered for the most recent trees since derived trees do not change"""
+        with self.lock:
+            entry = self.fingerprints.pop(id(tree), None)
+        if entry is None or entry[0]() is not tree:
+            entry = (weakref.ref(tree), tree_fingerprint(tree))
+        with self.lock:
+            self.fingerprints[id(tree)] = entry
+            if len(self.fingerprints) > self.fingerprint_limit:
+                self.fingerprints.popitem(last=False)
+        return entry[1]
+
+    def key(self, tree, transform_thing, arguments=()):
+        key_hash = hashlib.sha1(self.fingerprint(tree).encode('utf-8'))
+        key_hash.update(transform_source(transform_thing).encode('utf-8'))
+        key_hash.update(repr(list(arguments)).encode('utf-8'))
+        key_hash.update(dependency_signature(transform_thing).encode('utf-8'))
+        return key_hash.hexdigest()
+
+    def result(self, tree, transform_thing, arguments, compute):
+        """
+        the result of transform_thing with arguments applied to tree, compute()
+        is called to make it if it has not been cached yet
+        """
+        key = self.key(tree, transform_thing, arguments)
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                value = self.entries.pop(key)
+                self.entries[key] = value
+                return value
+
+        value = self.load(key)
+        if value is not None:
+            with self.lock:
+                self.disk_hits += 1
+        else:
+            with self.lock:
+                self.misses += 1
+            value = compute()
+            self.save(key, value)
+        self.remember(key, value)
+        return value
+
+    def remember(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            if len(self.entries) > self.entry_limit:
+                self.entries.popitem(last=False)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".pickle")
+
+    def load(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self.path(key), "rb") as cache_file:
+                value = pickle.load(cache_file)
+            os.utime(self.path(key), None)
+            return value
+        except (IOError, OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+
+    def save(self, key, value):
+        if not self.directory or value is None:
+            return
+        try:
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, RuntimeError) as exception:
+            print("transform result not cached on disk %s" % exception)
+            return
+        # write then rename so another process never reads half a file, a
+        # cancelled transform can be interrupted anywhere in here
+        handle, temporary_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        renamed = False
+        try:
+            with os.fdopen(handle, "wb") as cache_file:
+                cache_file.write(data)
+            os.rename(temporary_name, self.path(key))
+            renamed = True
+        finally:
+            if not renamed:
+                remove_file(temporary_name)
+        self.trim_directory()
+
+    def trim_directory(self):
+        """
+        delete the least recently used pickles beyond disk_entry_limit and
+        temporary files older than temporary_file_age, which a save that was
+        interrupted before it could clean up left behind
+        """
+        old_enough = time.time() - self.temporary_file_age
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                path = os.path.join(self.directory, name)
+                try:
+                    if os.path.getmtime(path) < old_enough:
+                        remove_file(path)
+                except OSError:
+                    pass
+        names = [name for name in os.listdir(self.directory) if name.endswith(".pickle")]
+        if len(names) <= self.disk_entry_limit:
+            return
+        paths = sorted((os.path.join(self.directory, name) for name in names), key=os.path.getmtime)
+        for path in paths[:len(paths) - self.disk_entry_limit]:
+            remove_file(path)
+
+    def clear(self, include_directory=False):
+        with self.lock:
+            self.entries.clear()
+            self.fingerprints.clear()
+            self.hits = self.disk_hits = self.misses = 0
+        if include_directory and self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".pickle"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        return "transform cache: %d results in memory, %d hits, %d disk hits, %d misses%s" % (
+            len(self.entries), self.hits, self.disk_hits, self.misses,
+            ", directory %s" % self.directory if self.directory else ""
+        )
@@ -5,10 +5,12 @@ from __future__ import print_function
 import sys
 import os.path
 import inspect
+import linecache
 import ast
 from operator import methodcaller
 from ctree.codegen import CodeGenVisitor
 from ast_tool_box.util import Util
+from ast_tool_box.models.transform_models.fused_transform import FusedNodeTransformer, node_local_problems
 from collections import namedtuple
 import codegen
 
@@ -27,6 +29,8 @@ class TransformThing(object):
             print("Failed to get source for %s error %s" % (self.transform, e.message))
             self.source_text = 'Unavailable'
         self.file_name = file_name
+        # the parts of the transform's file outside its own class, set by TransformFile
+        self.shared_source = ''
         # print(self.source_text)
         self.ast_root = ast.parse(self.source_text)
         self.init_source = ''
@@ -186,12 +190,57 @@ class CodeGeneratorItem(TransformThing):
         )
 
 
+class FusedTransformItem(AstTransformItem):
+    """
+    several AstTransformItems applied in one walk, it stands in for them in
+    code item links and transform cache keys.  Its arguments are a list of
+    argument lists, one per transform
+    """
+    def __init__(self, transform_items):
+        # there is no single class to read, so TransformThing.__init__ is not used
+        self.transform_items = list(transform_items)
+        first_item = self.transform_items[0]
+        self.transform = FusedNodeTransformer
+        self.package_name = first_item.package_name
+        self.transform_file = first_item.transform_file
+        self.file_name = first_item.file_name
+        self.source_text = "\n".join(item.source_text for item in self.transform_items)
+        self.shared_source = "\n".join(getattr(item, 'shared_source', '') for item in self.transform_items)
+        self.ast_root = None
+        self.init_source = ''
+        self.positional_args = []
+        self._has_varargs = False
+        self._has_kwargs = False
+        self._super_classes = []
+        self.doc = "%s in one pass" % ", ".join(item.name() for item in self.transform_items)
+
+    def name(self):
+        return "+".join(item.name() for item in self.transform_items)
+
+    def problems(self):
+        """why these transforms cannot be fused, an empty list if they can"""
+        problems = []
+        for item in self.transform_items:
+            problems.extend(node_local_problems(item.transform))
+        return problems
+
+    def get_instance(self, positional_args=None):
+        argument_lists = positional_args or [[] for _ in self.transform_items]
+        return FusedNodeTransformer([
+            item.get_instance(arguments) for item, arguments in zip(self.transform_items, argument_lists)
+        ])
+
+
+# subclasses of these are transforms, the base classes themselves are not
+transformer_base_names = ("NodeTransformer", "FastNodeTransformer")
+
+
 class TransformFactory(object):
     @staticmethod
     def get(class_def, file_name=None, transform_collection=None):
         if inspect.isclass(class_def):
             if issubclass(class_def, ast.NodeTransformer):
-                if class_def.__name__ != "NodeTransformer":
+                if class_def.__name__ not in transformer_base_names:
                     try:
                         return AstTransformItem(
                             class_def,
@@ -273,6 +322,8 @@ class TransformFile(TransformCollection):
         self.source_text = ''
         with open(self.file_name, "r") as f:
             self.source_text = f.read()
+        # inspect.getsource reads through linecache, which would hand back the file as it was before the save
+        linecache.checkcache(self.file_name)
 
         self.class_def_nodes = {}
         self.node_transforms = []
@@ -319,6 +370,22 @@ class TransformFile(TransformCollection):
         self.node_transforms.sort(key=methodcaller('name'))
         self.code_generators.sort(key=methodcaller('name'))
 
+        shared_source = self.shared_source()
+        for transform_item in self.node_transforms + self.code_generators:
+            transform_item.shared_source = shared_source
+
+    def shared_source(self):
+        """
+        a dump of every statement in the file except the transform classes,
+        helpers and imports here can change what any transform does.  Line
+        numbers are left out so moving code around is not a change
+        """
+        transform_names = set(item.name() for item in self.node_transforms + self.code_generators)
+        return "\n".join(
+            ast.dump(node) for node in self.ast_tree.body
+            if not (isinstance(node, ast.ClassDef) and node.name in transform_names)
+        )
+
 
 class TransformPackage(TransformCollection):
     """
@@ -369,7 +436,7 @@ class TransformPackage(TransformCollection):
             # print("  got %s -> %s" % (key, thing))
             if inspect.isclass(thing):
                 if issubclass(thing, ast.NodeTransformer):
-                    if thing.__name__ != "NodeTransformer":
+                    if thing.__name__ not in transformer_base_names:
                         self.node_transforms.append(AstTransformItem(
                             thing,
                             file_name=self.file_name,
@@ -0,0 +1,146 @@
+"""
+a saved chain of transforms that can be run on a tree without the gui
+
+a pipeline is an ordered list of steps, each one the name of a transform
+and the source text of the arguments it is constructed with, the text is
+evaluated when the pipeline runs just like arguments typed into the gui.
+Pipelines are saved as json.  Every step goes through the
+TreeTransformController's transform cache, so after step k is edited
+running the pipeline again only recomputes steps k to n
+
+    python -m ast_tool_box.models.transform_models.transform_pipeline lowering.json a.py b.py
+"""
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+import ast
+import json
+import sys
+from collections import namedtuple
+
+
+PipelineStage = namedtuple('PipelineStage', ['step', 'tree', 'computed'])
+
+
+class PipelineStep(object):
+    def __init__(self, transform_name, arguments=None):
+        self.transform_name = transform_name
+        self.arguments = list(arguments) if arguments else []
+
+    def argument_values(self):
+        return [eval(argument) for argument in self.arguments]
+
+    def to_dict(self):
+        return {"transform": self.transform_name, "arguments": self.arguments}
+
+    def __str__(self):
+        return "%s(%s)" % (self.transform_name, ", ".join(self.arguments))
+
+
+class TransformPipeline(object):
+    """
+    ordered steps plus the modules their transforms are found in, modules
+    are loaded into the controller's ast_transformer_manager before a run
+    """
+    def __init__(self, name="pipeline", steps=None, modules=None):
+        self.name = name
+        self.steps = list(steps) if steps else []
+        self.modules = list(modules) if modules else []
+
+    def add_step(self, transform_name, arguments=None):
+        self.steps.append(PipelineStep(transform_name, arguments))
+
+    def set_step(self, index, transform_name, arguments=None):
+        self.steps[index] = PipelineStep(transform_name, arguments)
+
+    def delete_step(self, index):
+        del self.steps[index]
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "modules": self.modules,
+            "steps": [step.to_dict() for step in self.steps],
+        }
+
+    def save(self, file_name):
+        with open(file_name, "w") as pipeline_file:
+            json.dump(self.to_dict(), pipeline_file, indent=2)
+
+    @staticmethod
+    def load(file_name):
+        with open(file_name, "r") as pipeline_file:
+            saved = json.load(pipeline_file)
+        return TransformPipeline(
+            name=saved.get("name", "pipeline"),
+            steps=[PipelineStep(step["transform"], step.get("arguments")) for step in saved.get("steps", [])],
+            modules=saved.get("modules"),
+        )
+
+    def transform_items(self, controller):
+        """the transform item of each step, an unknown transform name raises ValueError"""
+        transformer_manager = controller.ast_transformer_manager
+        for module_name in self.modules:
+            transformer_manager.get_ast_transformers(module_name)
+        if any(step.transform_name not in transformer_manager.transformers_by_name for step in self.steps):
+            transformer_manager.reload()
+
+        items = []
+        for step in self.steps:
+            if step.transform_name not in transformer_manager.transformers_by_name:
+                raise ValueError("pipeline %s has unknown transform %s" % (self.name, step.transform_name))
+            items.append(transformer_manager.transformers_by_name[step.transform_name])
+        return items
+
+    def run(self, controller, tree):
+        """
+        a PipelineStage for every step, each with the tree the step made and
+        whether it had to be computed or came from the controller's cache
+        """
+        transform_cache = controller.transform_cache
+        stages = []
+        for step, transform_item in zip(self.steps, self.transform_items(controller)):
+            misses = transform_cache.misses
+            tree = controller.transform_tree(tree, transform_item, step.argument_values())
+            stages.append(PipelineStage(step, tree, transform_cache.misses > misses))
+        return stages
+
+    def __str__(self):
+        return "%s: %s" % (self.name, " -> ".join(str(step) for step in self.steps))
+
+
+def main(argv):
+    """run the pipeline saved in argv[1] on each python file after it and print the final trees"""
+    from ast_tool_box.controllers.tree_transform_controller import TreeTransformController
+
+    if len(argv) < 3:
+        print("usage: transform_pipeline pipeline.json source.py ...")
+        return 1
+
+    pipeline = TransformPipeline.load(argv[1])
+    controller = TreeTransformController()
+    for file_name in argv[2:]:
+        with open(file_name, "r") as source_file:
+            tree = ast.parse(source_file.read(), file_name)
+        stages = pipeline.run(controller, tree)
+        result = stages[-1].tree if stages else tree
+        print("# %s" % file_name)
+        if hasattr(result, 'codegen'):
+            print(result.codegen())
+        elif isinstance(result, ast.AST):
+            print(ast.dump(result))
+        else:
+            print(result)
+    print(controller.transform_cache)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,107 @@
+"""
+opt in instrumentation of a transform run, where the time goes by node type
+
+instrument(visitor) replaces the visit method of one visitor instance with
+a timed version.  NodeVisitor.generic_visit and every visit_* method that
+recurses through self.visit or self.generic_visit go through it, so each
+visited node is counted once under its type.  Cumulative time includes the
+nodes below, self time does not, and a node type nested in itself counts
+the inner time in both.  For a NodeTransformer the nodes it replaced or
+removed are counted as well
+"""
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+import ast
+from timeit import default_timer
+
+
+class NodeTypeStats(object):
+    __slots__ = ('visits', 'handled', 'cumulative', 'own')
+
+    def __init__(self, handled):
+        self.visits = 0
+        self.handled = handled
+        self.cumulative = 0.0
+        self.own = 0.0
+
+
+class TransformProfile(object):
+    """visit counts and times by node type, changes and wall time of one transform run"""
+    columns = ["node type", "visits", "visit_ method", "cumulative s", "self s"]
+
+    def __init__(self, name=None):
+        self.name = name
+        self.stats = {}
+        self.replaced = 0
+        self.removed = 0
+        self.seconds = 0.0
+
+    def instrument(self, visitor):
+        """record every visit visitor makes from now on in this profile, returns visitor"""
+        visit = visitor.visit
+        stats = self.stats
+        counts_changes = isinstance(visitor, ast.NodeTransformer)
+        # time spent in the visits below each visit that is in progress
+        inner_times = [0.0]
+        timer = default_timer
+
+        def timed_visit(node):
+            started = timer()
+            inner_times.append(0.0)
+            try:
+                result = visit(node)
+            finally:
+                elapsed = timer() - started
+                inner = inner_times.pop()
+                inner_times[-1] += elapsed
+                type_name = type(node).__name__
+                node_stats = stats.get(type_name)
+                if node_stats is None:
+                    node_stats = stats[type_name] = NodeTypeStats(hasattr(visitor, 'visit_' + type_name))
+                node_stats.visits += 1
+                node_stats.cumulative += elapsed
+                node_stats.own += elapsed - inner
+            if counts_changes and result is not node:
+                if result is None:
+                    self.removed += 1
+                else:
+                    self.replaced += 1
+            return result
+
+        visitor.visit = timed_visit
+        return visitor
+
+    def timed(self, compute):
+        """compute(), with the wall time it takes added to seconds"""
+        started = default_timer()
+        try:
+            return compute()
+        finally:
+            self.seconds += default_timer() - started
+
+    def visits(self):
+        return sum(node_stats.visits for node_stats in self.stats.values())
+
+    def rows(self):
+        """a row per node type, in the order of columns, most cumulative time first"""
+        return [
+            [type_name, node_stats.visits, node_stats.handled, node_stats.cumulative, node_stats.own]
+            for type_name, node_stats in sorted(self.stats.items(), key=lambda entry: -entry[1].cumulative)
+        ]
+
+    def summary(self):
+        return "%s: %.3f s, %d visits, %d nodes replaced, %d removed" % (
+            self.name, self.seconds, self.visits(), self.replaced, self.removed
+        )
+
+    def __str__(self):
+        lines = [self.summary()]
+        if self.stats:
+            lines.append("%-24s %8s %8s %14s %10s" % tuple(self.columns))
+            for type_name, visits, handled, cumulative, own in self.rows():
+                lines.append("%-24s %8d %8s %14.4f %10.4f" % (
+                    type_name, visits, "yes" if handled else "", cumulative, own
+                ))
+        return "\n".join(lines)
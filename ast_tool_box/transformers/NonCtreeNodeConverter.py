@@ -22,13 +22,20 @@ class NonCtreeNode(CtreeNode):
         for field, value in iter_fields(node):
             setattr(self, field, value)
 
-    def codegen(self, indent=0):
-        str = self.string
+    def codegen_to(self, write, indent=0):
+        """hand the code for this node to write a piece at a time instead of building one string"""
+        write(self.string)
         for field in self._fields:
-            if isinstance(getattr(self,field),CtreeNode):
-                str += getattr(self,field).codegen(indent)
+            value = getattr(self, field)
+            if isinstance(value, NonCtreeNode):
+                value.codegen_to(write, indent)
+            elif isinstance(value, CtreeNode):
+                write(value.codegen(indent))
         if 'body' in self._fields:
             visitor = CodeGenVisitor(indent = indent)
-            str += visitor._genblock(self.body)
+            write(visitor._genblock(self.body))
 
-        return str
+    def codegen(self, indent=0):
+        chunks = []
+        self.codegen_to(chunks.append, indent)
+        return ''.join(chunks)
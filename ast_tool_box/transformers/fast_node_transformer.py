@@ -0,0 +1,83 @@
+"""
+a drop in replacement for ast.NodeTransformer that does less work per node
+
+ast.NodeVisitor.visit builds 'visit_' + the node's class name and looks it
+up with getattr for every node it visits, FastNodeTransformer looks each
+node class up once per transformer class and keeps the method it found in
+a table on that class.  generic_visit walks the node's _fields directly and
+leaves a field's list alone unless one of its elements was replaced or
+removed, where ast.NodeTransformer builds a new list for every list field
+of every node.
+
+visit_ methods are found on the class, not on instances, and a subclass
+gets a table of its own, so overriding visit or generic_visit works as it
+does with ast.NodeTransformer
+"""
+from __future__ import print_function
+
+__author__ = 'Chick Markley'
+
+import ast
+
+
+class FastNodeTransformer(ast.NodeTransformer):
+    @classmethod
+    def dispatch_table(cls):
+        """node class -> visit_ function of cls or None for generic_visit, filled as nodes are seen"""
+        table = cls.__dict__.get('_dispatch_table')
+        if table is None:
+            table = {}
+            cls._dispatch_table = table
+        return table
+
+    @classmethod
+    def find_visit_method(cls, node_class):
+        method = getattr(cls, 'visit_' + node_class.__name__, None)
+        method = getattr(method, '__func__', method)
+        cls.dispatch_table()[node_class] = method
+        return method
+
+    def visit(self, node):
+        node_class = node.__class__
+        table = self.__class__.__dict__.get('_dispatch_table')
+        if table is not None and node_class in table:
+            method = table[node_class]
+        else:
+            method = self.find_visit_method(node_class)
+        if method is None:
+            return self.generic_visit(node)
+        return method(self, node)
+
+    def generic_visit(self, node):
+        visit = self.visit
+        for field in node._fields:
+            old_value = getattr(node, field, None)
+            if isinstance(old_value, list):
+                new_values = None
+                for index, value in enumerate(old_value):
+                    if not isinstance(value, ast.AST):
+                        if new_values is not None:
+                            new_values.append(value)
+                        continue
+                    new_value = visit(value)
+                    if new_value is value:
+                        if new_values is not None:
+                            new_values.append(value)
+                        continue
+                    if new_values is None:
+                        new_values = old_value[:index]
+                    if new_value is None:
+                        continue
+                    if isinstance(new_value, ast.AST):
+                        new_values.append(new_value)
+                    else:
+                        new_values.extend(new_value)
+                if new_values is not None:
+                    old_value[:] = new_values
+            elif isinstance(old_value, ast.AST):
+                new_node = visit(old_value)
+                if new_node is None:
+                    delattr(node, field)
+                elif new_node is not old_value:
+                    setattr(node, field, new_node)
+        return node
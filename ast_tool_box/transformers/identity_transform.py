@@ -2,6 +2,7 @@ from __future__ import print_function
 
 import ast
 from ctree.codegen import CodeGenVisitor
+from ast_tool_box.transformers.fast_node_transformer import FastNodeTransformer
 
 
 class IdentityTransform(ast.NodeTransformer):
@@ -47,6 +48,19 @@ class NoisyIdentityTransform(ast.NodeTransformer):
         return super(NoisyIdentityTransform, self).visit(node)
 
 
+class FastIdentityTransform(FastNodeTransformer):
+    pass
+
+
+class FastNoisyIdentityTransform(FastNodeTransformer):
+    def __init__(self):
+        super(FastNoisyIdentityTransform, self).__init__()
+
+    def visit(self, node):
+        print("node %s" % node)
+        return super(FastNoisyIdentityTransform, self).visit(node)
+
+
 class LambdaIdentityTransform(ast.NodeTransformer):
     def __init__(self, func):
         super(LambdaIdentityTransform, self).__init__()
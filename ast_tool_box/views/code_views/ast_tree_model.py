@@ -0,0 +1,127 @@
+__author__ = 'Chick Markley'
+
+from PySide import QtGui, QtCore
+
+from ast_tool_box.models.code_models.ast_row import AstRow
+from ast_tool_box.models.code_models.ast_diff import INSERTED, DELETED, MOVED, UPDATED
+
+mark_colors = {
+    INSERTED: "#c8f0c8",
+    DELETED: "#f4c8c8",
+    MOVED: "#c8d8f4",
+    UPDATED: "#f4e8a8",
+}
+
+
+class AstTreeModel(QtCore.QAbstractItemModel):
+    """
+    item model over a tree of AstRows.  Qt is only told about the children
+    of a row when the view asks for them through canFetchMore/fetchMore,
+    and labels are only formatted when a row is painted, so the cost of
+    opening a tree does not depend on its size
+    """
+    def __init__(self, root_row, parent=None):
+        super(AstTreeModel, self).__init__(parent)
+        assert isinstance(root_row, AstRow)
+        self.root_row = root_row
+        self.fetched_rows = set()
+        self.node_marks = {}
+
+    def row_for_index(self, index):
+        if not index.isValid():
+            return None
+        return index.internalPointer()
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QtCore.QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, self.root_row)
+        parent_row = parent.internalPointer()
+        return self.createIndex(row, column, parent_row.children()[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        ast_row = index.internalPointer()
+        if ast_row is self.root_row or ast_row.parent is None:
+            return QtCore.QModelIndex()
+        parent_row = ast_row.parent
+        if parent_row is self.root_row:
+            return self.createIndex(0, 0, parent_row)
+        return self.createIndex(parent_row.row, 0, parent_row)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        if not parent.isValid():
+            return 1
+        ast_row = parent.internalPointer()
+        if ast_row in self.fetched_rows:
+            return len(ast_row.children())
+        return 0
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        if not parent.isValid():
+            return True
+        return parent.internalPointer().has_children()
+
+    def canFetchMore(self, parent):
+        if not parent.isValid():
+            return False
+        ast_row = parent.internalPointer()
+        return ast_row not in self.fetched_rows and ast_row.has_children()
+
+    def fetchMore(self, parent):
+        if not parent.isValid():
+            return
+        ast_row = parent.internalPointer()
+        if ast_row in self.fetched_rows:
+            return
+        children = ast_row.children()
+        if children:
+            self.beginInsertRows(parent, 0, len(children) - 1)
+            self.fetched_rows.add(ast_row)
+            self.endInsertRows()
+        else:
+            self.fetched_rows.add(ast_row)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            return index.internalPointer().label()
+        if role in (QtCore.Qt.BackgroundRole, QtCore.Qt.ToolTipRole) and self.node_marks:
+            ast_row = index.internalPointer()
+            mark = self.node_marks.get(ast_row.ast_node) if ast_row.is_ast() else None
+            if mark is None:
+                return None
+            return QtGui.QBrush(QtGui.QColor(mark_colors[mark])) if role == QtCore.Qt.BackgroundRole else mark
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole and section == 0:
+            return "Node"
+        return None
+
+    def index_for_row(self, ast_row):
+        """
+        the model index of ast_row, fetching any of its ancestors that Qt
+        has not been told about yet
+        """
+        if ast_row is self.root_row:
+            return self.createIndex(0, 0, ast_row)
+        path = []
+        current = ast_row
+        while current is not self.root_row and current is not None:
+            path.append(current)
+            current = current.parent
+        index = self.createIndex(0, 0, self.root_row)
+        for step in reversed(path):
+            if step.parent not in self.fetched_rows:
+                self.fetchMore(index)
+            index = self.index(step.row, 0, index)
+        return index
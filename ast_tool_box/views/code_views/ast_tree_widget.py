@@ -2,9 +2,19 @@ __author__ = 'Chick Markley'
 
 import types
 import ast
+import time
 import tempfile
 import os
 from ast_tool_box.views.search_widget import SearchLineEdit
+from ast_tool_box.views.code_views.ast_tree_model import AstTreeModel, mark_colors
+from ast_tool_box.models.code_models.ast_row import AstRow, is_value_capped
+from ast_tool_box.models.code_models.label_index import LabelIndex
+from ast_tool_box.models.code_models.ast_query import NodeTypeIndex, AstQueryError, compile_query
+from ast_tool_box.models.code_models.expansion import subtree_sizes, breadth_first_expansion
+from ast_tool_box.models.code_models.span_index import SpanIndex
+from ast_tool_box.models.code_models.code_model import AstTreeItem
+from ast_tool_box.models.transform_models.transform_file import AstTransformItem
+from ast_tool_box.views.code_views.transform_profile_table import TransformProfileTable
 
 from PySide import QtGui, QtCore
 
@@ -12,108 +22,336 @@ DEBUGGING = False
 
 
 class AstTreePane(QtGui.QGroupBox):
-    def __init__(self, code_presenter=None, ast_root=None, tab_name=None):
+    """
+    a search box over a tree of ast nodes, the tree is an AstTreeView that
+    builds rows as they are expanded when lazy_trees is set, otherwise an
+    AstTreeWidget that builds every row up front.  A pane for a subtree of
+    another tree is an AstTreeView rooted at the subtree's row of the
+    source tree's model, so nothing is built or indexed twice
+    """
+    lazy_trees = True
+    search_tool_tip = "Search node labels, or start with / for an ast query e.g. //For[target.id=i]//BinOp[op=Mult]"
+
+    def __init__(self, code_presenter=None, ast_root=None, tab_name=None, code_item=None, source_tree=None):
         super(AstTreePane, self).__init__()
         self.code_presenter = code_presenter
 
         self.search_next_index = 0
         self.last_search = ''
+        self.search_hits = []
+        self.editor = None
+        self.following_editor = False
 
         layout = QtGui.QVBoxLayout()
 
         self.search_box = SearchLineEdit(on_changed=self.search_box_changed, on_next=self.search_next)
+        self.search_box.setToolTip(AstTreePane.search_tool_tip)
         layout.addWidget(self.search_box)
 
-        self.ast_tree_widget = AstTreeWidget(code_presenter=self.code_presenter, ast_root=ast_root, tab_name=tab_name)
-        layout.addWidget(self.ast_tree_widget)
+        if source_tree is not None and code_item is not None and code_item.root_row is not None:
+            self.ast_tree_widget = AstTreeView(code_presenter=self.code_presenter, tab_name=tab_name, code_item=code_item)
+            self.ast_tree_widget.show_subtree(source_tree, code_item.root_row)
+        else:
+            tree_class = AstTreeView if AstTreePane.lazy_trees else AstTreeWidget
+            self.ast_tree_widget = tree_class(
+                code_presenter=self.code_presenter, ast_root=ast_root, tab_name=tab_name, code_item=code_item
+            )
+
+        profile = code_item.transform_profile if code_item is not None else None
+        if profile is not None:
+            # the tree over the profile of the transform that made it, either can be dragged smaller
+            splitter = QtGui.QSplitter(QtCore.Qt.Vertical)
+            splitter.addWidget(self.ast_tree_widget)
+            splitter.addWidget(TransformProfileTable(profile))
+            splitter.setSizes([700, 300])
+            layout.addWidget(splitter)
+        else:
+            layout.addWidget(self.ast_tree_widget)
 
         self.setLayout(layout)
 
     def expand_all(self):
-        print("got to %s" % self)
-        self.ast_tree_widget.expand_descendants()
+        self.ast_tree_widget.expand_all()
 
     def collapse_all(self):
-        print("got to %s" % self)
-        self.ast_tree_widget.collapse_descendants()
+        self.ast_tree_widget.collapseAll()
 
     def make_tree_from(self, syntax_tree, file_name="", display_depth=1):
         self.ast_tree_widget.make_tree_from(syntax_tree, file_name=file_name, display_depth=display_depth)
 
+    def is_building(self):
+        return isinstance(self.ast_tree_widget, AstTreeWidget) and self.ast_tree_widget.is_building()
+
+    def cancel_build(self):
+        if isinstance(self.ast_tree_widget, AstTreeWidget):
+            self.ast_tree_widget.cancel_build()
+
+    def link_editor(self, editor):
+        """
+        clicking a row selects its source in editor and moving the cursor in
+        editor selects the innermost node there, both through the span index
+        """
+        self.editor = editor
+        self.ast_tree_widget.row_clicked.connect(self.show_row_in_editor)
+        editor.cursorPositionChanged.connect(self.editor_cursor_moved)
+
+    def unlink_editor(self):
+        if self.editor is not None:
+            self.ast_tree_widget.row_clicked.disconnect(self.show_row_in_editor)
+            self.editor.cursorPositionChanged.disconnect(self.editor_cursor_moved)
+            self.editor = None
+
+    def show_row_in_editor(self, ast_row):
+        span = self.ast_tree_widget.span_index().span_of(ast_row)
+        if self.editor is None or span is None:
+            return
+        self.following_editor = True
+        try:
+            self.editor.select_span(*span)
+            self.editor.ensureCursorVisible()
+        finally:
+            self.following_editor = False
+
+    @QtCore.Slot()
+    def editor_cursor_moved(self):
+        if self.following_editor or self.editor.textCursor().hasSelection():
+            return
+        ast_row = self.ast_tree_widget.span_index().row_at(*self.editor.cursor_position())
+        if ast_row is not None:
+            self.ast_tree_widget.select_row(ast_row)
+
+    def find_rows(self, text):
+        try:
+            rows = self.ast_tree_widget.find_rows(text)
+        except AstQueryError as error:
+            self.search_box.setToolTip(str(error))
+            return []
+        self.search_box.setToolTip(AstTreePane.search_tool_tip)
+        return rows
+
     def search_next(self):
-        if self.search_box.text() != self.last_search:
+        """step to the next hit of the current search, the hit list is only computed when the text changes"""
+        text = self.search_box.text()
+        if text != self.last_search:
+            self.search_hits = self.find_rows(text) if text else []
             self.search_next_index = 0
+            self.last_search = text
         else:
             self.search_next_index += 1
 
-        self.last_search = self.search_box.text()
-
-        current_tree = self.ast_tree_widget
-        items = current_tree.findItems(
-            self.search_box.text(),
-            QtCore.Qt.MatchContains | QtCore.Qt.MatchRecursive,
-            column=AstTreeWidget.COL_NODE
-        )
-        # print("Found %d items" % len(items))
-        if len(items) > 0:
-            if self.search_next_index >= len(items):
-                self.search_next_index = 0
-
-            # print(items[0])
-            current_tree.setCurrentItem(items[self.search_next_index])
-            current_tree.expandItem(items[self.search_next_index])
-
+        if len(self.search_hits) > 0:
+            self.search_next_index %= len(self.search_hits)
+            self.ast_tree_widget.select_row(self.search_hits[self.search_next_index])
 
     def search_box_changed(self):
-        if not self.search_box.text():
+        text = self.search_box.text()
+        if not text:
             return
 
-        current_tree = self.ast_tree_widget
-        # print("current tree %s" % current_tree)
-        #
-        # for widget_index in range(self.ast_tree_tabs.count()):
-        #     widget = self.ast_tree_tabs.widget(widget_index)
-        #     print("widget %s ast_tree %s" % (widget, widget.ast_root))
-
-        items = current_tree.findItems(
-            self.search_box.text(),
-            QtCore.Qt.MatchContains | QtCore.Qt.MatchRecursive,
-            column=AstTreeWidget.COL_NODE
-        )
-        # print("Found %d items" % len(items))
-        if len(items) > 0:
-            # print(items[0])
-            current_tree.setCurrentItem(items[0])
-            current_tree.expandItem(items[0])
+        self.search_hits = self.find_rows(text)
+        self.search_next_index = 0
+        self.last_search = text
+        # print("Found %d items" % len(self.search_hits))
+        if len(self.search_hits) > 0:
+            self.ast_tree_widget.select_row(self.search_hits[0])
 
 
-class AstTreeWidget(QtGui.QTreeWidget):
+class AstTreeActions(object):
     """
-    displays an ast as a tree widget
+    context menu, actions and searching shared by the eager AstTreeWidget
+    and the lazy AstTreeView, the tree class supplies root_row,
+    current_ast_node, nearest_ast_node and select_row, plus expand_row
+    and expand_subtree for the expansion policy.  A tree showing a subtree
+    of source_tree uses source_tree's label, span and size caches.
+
+    Trees are expanded breadth first until expand_row_budget rows are
+    visible, expanding everything below a row that has more than
+    expand_all_limit rows must be confirmed and can instead be done a
+    page of expand_row_budget rows at a time
     """
-    COL_NODE = 0
-    COL_FIELD = 1
-    COL_CLASS = 2
-    COL_VALUE = 3
-    COL_POS = 4
-    COL_HIGHLIGHT = 5
+    expand_row_budget = 2000
+    expand_all_limit = 20000
+
+    source_tree = None
+    diff_pending = False
+
+    def reset_tree_caches(self):
+        self.tree_model = None
+        self._label_index = None
+        self._node_type_index = None
+        self._span_index = None
+        self._subtree_sizes = None
+        self.expansion_pages = {}
+        self.tree_diff = None
+        self.hidden_rows = []
+
+    def shared_model(self):
+        """an AstTreeModel over this tree's rows for views of its subtrees"""
+        if self.tree_model is None:
+            self.tree_model = AstTreeModel(self.root_row)
+        return self.tree_model
+
+    def contains_row(self, ast_row):
+        return ast_row is self.root_row or self.root_row in ast_row.ancestors()
+
+    def subtree_sizes(self):
+        """rows in the subtree of each row, computed the first time they are needed"""
+        if self.source_tree is not None:
+            return self.source_tree.subtree_sizes()
+        if self._subtree_sizes is None:
+            self._subtree_sizes = subtree_sizes(self.root_row)
+        return self._subtree_sizes
+
+    def expand_within_budget(self, ast_row=None, budget=None):
+        """expand breadth first below ast_row until budget rows are showing"""
+        ast_row = ast_row if ast_row is not None else self.root_row
+        budget = budget if budget is not None else AstTreeActions.expand_row_budget
+        for row_to_expand in breadth_first_expansion(ast_row, budget):
+            self.expand_row(row_to_expand)
 
-    expand_all_at_create = True
+    def expand_all(self):
+        self.expand_descendants(self.root_row)
+
+    def expand_descendants(self, ast_row=None):
+        """Expand all descendants of the current row, big subtrees are checked with the user first"""
+        if not isinstance(ast_row, AstRow):
+            ast_row = self.current_row()
+        if ast_row is None:
+            ast_row = self.root_row
+        if ast_row is None:
+            return
 
-    def __init__(self, code_presenter=None, ast_root=None, tab_name='tab'):
-        super(AstTreeWidget, self).__init__()
+        size = self.subtree_sizes()[ast_row]
+        if size > AstTreeActions.expand_all_limit:
+            pages = self.expansion_pages.get(ast_row, 0) + 1
+            answer = self.ask_to_expand(size, pages * AstTreeActions.expand_row_budget)
+            if answer == 'page':
+                self.expansion_pages[ast_row] = pages
+                self.expand_within_budget(ast_row, pages * AstTreeActions.expand_row_budget)
+            elif answer == 'all':
+                self.expand_subtree(ast_row)
+            return
 
-        self.code_presenter = code_presenter
-        self.tab_name = tab_name
+        self.expand_subtree(ast_row)
+
+    def ask_to_expand(self, size, page_size):
+        """returns 'all', 'page' or None"""
+        message_box = QtGui.QMessageBox(self)
+        message_box.setText("Expanding all %d rows may take a long time" % size)
+        all_button = message_box.addButton("Expand all", QtGui.QMessageBox.AcceptRole)
+        page_button = message_box.addButton("Show %d rows" % page_size, QtGui.QMessageBox.ActionRole)
+        message_box.addButton(QtGui.QMessageBox.Cancel)
+        message_box.setDefaultButton(page_button)
+        message_box.exec_()
+        if message_box.clickedButton() is all_button:
+            return 'all'
+        if message_box.clickedButton() is page_button:
+            return 'page'
+        return None
+
+    def label_index(self):
+        """the search index over this tree's rows, built the first time it is needed"""
+        if self.source_tree is not None:
+            return self.source_tree.label_index()
+        if self._label_index is None:
+            self._label_index = LabelIndex(self.root_row)
+        return self._label_index
+
+    def node_type_index(self):
+        """pre-order numbering and per class lists of this tree's ast nodes for structural queries"""
+        if self._node_type_index is None:
+            self._node_type_index = NodeTypeIndex(self.root_row)
+        return self._node_type_index
+
+    def span_index(self):
+        """source spans of this tree's ast nodes, for moving between rows and editor positions"""
+        if self.source_tree is not None:
+            return self.source_tree.span_index()
+        if self._span_index is None:
+            self._span_index = SpanIndex(self.root_row)
+        return self._span_index
+
+    def parent_ast_tree(self):
+        """the ast this tree was derived from, None if it was not made from another tree"""
+        if self.source_tree is not None:
+            return None
+        link = self.code_item.parent_code_item if self.code_item is not None else None
+        if link is None or not isinstance(link.code_item, AstTreeItem):
+            return None
+        return link.code_item.ast_tree
 
-        self.ast_root = ast_root
-        self.setColumnCount(2)
-        self.setHeaderLabels(["Node"])
-        self.header().resizeSection(AstTreeWidget.COL_NODE, 800)
-        self.header().setStretchLastSection(True)
+    def show_differences(self, then=None):
+        """
+        colour the rows that were inserted, updated, moved or lost children
+        relative to the parent tree.  The diff is worked out on a worker
+        thread, then is called once it is shown
+        """
+        parent_tree = self.parent_ast_tree()
+        if parent_tree is None:
+            self.code_presenter.show_error("This tree was not derived from another ast")
+            return
+        if self.diff_pending:
+            return
+        ast_root = self.ast_root
 
-        self.transform_signal = QtCore.Signal(int)
+        def finished(tree_diff):
+            self.diff_pending = False
+            if self.ast_root is not ast_root:
+                return
+            self.tree_diff = tree_diff
+            self.show_node_marks(tree_diff.node_marks())
+            if then is not None:
+                then()
+
+        self.diff_pending = True
+        self.code_presenter.diff_trees(parent_tree, ast_root, finished)
+
+    def row_for_node(self, ast_node):
+        return self.root_row.descendant(self.tree_diff.new.row_path(ast_node))
+
+    def show_changed_only(self, changed_only=True):
+        """hide every row outside the changed nodes and their ancestors, changed nodes keep all their rows"""
+        for ast_row in self.hidden_rows:
+            self.set_row_hidden(ast_row, False)
+        self.hidden_rows = []
+        if not changed_only:
+            return
+        if self.tree_diff is None:
+            self.show_differences(then=lambda: self.show_changed_only(self.show_changed_only_action.isChecked()))
+            return
 
+        region = self.tree_diff.changed_regions()
+        marks = self.tree_diff.node_marks()
+        for ast_node in self.tree_diff.new.nodes:
+            if ast_node not in region:
+                continue
+            ast_row = self.row_for_node(ast_node)
+            children = ast_row.children()
+            if any(child.ast_node in region for child in children):
+                self.expand_row(ast_row)
+            if ast_node in marks:
+                continue
+            for child in children:
+                if child.ast_node not in region:
+                    self.set_row_hidden(child, True)
+                    self.hidden_rows.append(child)
+
+    def find_rows(self, text):
+        """
+        rows in tree order, text starting with / is an ast query such as
+        //For[target.id=i]//BinOp[op=Mult] evaluated against the ast nodes,
+        anything else is matched against the row labels ignoring case
+        """
+        if self.root_row is None:
+            return []
+        if text.startswith('/'):
+            return compile_query(text).evaluate(self.node_type_index())
+        hits = self.label_index().search(text)
+        if self.source_tree is not None:
+            hits = [ast_row for ast_row in hits if self.contains_row(ast_row)]
+        return hits
+
+    def create_actions(self):
         self.show_with_dot_action = QtGui.QAction(
             "&show tree using dot",
             self,
@@ -132,59 +370,75 @@ class AstTreeWidget(QtGui.QTreeWidget):
             statusTip="Expand all descendant nodes",
             triggered=self.expand_descendants
         )
-
-        if ast_root:
-            self.make_tree_from(self.ast_root)
+        self.show_full_value_action = QtGui.QAction(
+            "Show &full value",
+            self,
+            statusTip="Show the whole of a value whose label was shortened",
+            triggered=self.show_full_value
+        )
+        self.show_differences_action = QtGui.QAction(
+            "Show &differences from parent tree",
+            self,
+            statusTip="Colour the nodes the transform inserted, updated or moved",
+            triggered=lambda: self.show_differences()
+        )
+        self.show_changed_only_action = QtGui.QAction(
+            "Show only &changed regions",
+            self,
+            statusTip="Hide the parts of the tree the transform did not change",
+            checkable=True,
+            toggled=self.show_changed_only
+        )
 
     def contextMenuEvent(self, event):
         menu = QtGui.QMenu(self)
         menu.addAction(self.show_with_dot_action)
         menu.addAction(self.expand_descendants_action)
+        ast_row = self.current_row()
+        if ast_row is not None and is_value_capped(ast_row.ast_node):
+            menu.addAction(self.show_full_value_action)
+        has_parent_tree = self.parent_ast_tree() is not None
+        self.show_differences_action.setEnabled(has_parent_tree)
+        self.show_changed_only_action.setEnabled(has_parent_tree)
+        menu.addAction(self.show_differences_action)
+        menu.addAction(self.show_changed_only_action)
 
         sub_menu = QtGui.QMenu(self)
         sub_menu.setTitle("Available transformers")
 
+        type_summary, ast_node = self.type_summary(), self.nearest_ast_node()
         for transform_item in self.code_presenter.transform_presenter.transform_items():
             sub_menu_action = TransformerAction(transform_item=transform_item, ast_tree_widget=self)
+            if (type_summary is not None and isinstance(transform_item, AstTransformItem) and
+                    not type_summary.can_change(ast_node, transform_item.transform)):
+                sub_menu_action.setEnabled(False)
+                sub_menu_action.setStatusTip("There is nothing below this node that %s changes" % transform_item.name())
             sub_menu.addAction(sub_menu_action)
 
         menu.addMenu(sub_menu)
         menu.addAction(self.make_root_action)
         menu.exec_(event.globalPos())
 
+    def type_summary(self):
+        """
+        the node types below each node of this tree's code item, None if it
+        has no ast or they are still being worked out on a worker thread
+        """
+        if not isinstance(self.code_item, AstTreeItem):
+            return None
+        type_summary = self.code_item.built_type_summary()
+        if type_summary is None:
+            self.code_presenter.prepare_type_summary(self.code_item)
+        return type_summary
+
     def transform_current_ast(self, name):
         transformer = self.ast_transformers.get_instance_by_name(name)
         self.main_window.add_tree_tab(transformer=transformer)
 
     def show_with_dot(self):
         from ctree.visual.dot_manager import DotManager
-        # start_node = self.currentItem().ast_node
-        #
-        # def find_appropriate_node(node):
-        #     if not node:
-        #         return None
-        #     if isinstance(node, ast.AST):
-        #         return node
-        #     if hasattr(node, 'parent'):
-        #         return find_appropriate_node(node.parent)
-        #     return None
-        #
-        # start_node = find_appropriate_node(start_node)
-        start_item = self.currentItem()
-
-        def find_appropriate_node(item):
-            if not item:
-                return None
-            if hasattr(item, 'ast_node') and isinstance(item.ast_node, ast.AST):
-                return item.ast_node
-            if hasattr(item, 'parent'):
-                return find_appropriate_node(item.parent())
-            print("bad node %s" % item)
-            import pprint
-            pprint(dir(item))
-            return None
 
-        start_node = find_appropriate_node(start_item)
+        start_node = self.nearest_ast_node()
         if not start_node:
             self.code_presenter.show_error("Sorry, cannot find an ast node to begin graph")
             return
@@ -192,37 +446,259 @@ class AstTreeWidget(QtGui.QTreeWidget):
         file_name = os.path.join(tempfile.gettempdir(), 'tree_%s.png' % self.tab_name)
         DotManager.dot_ast_to_browser(start_node, file_name)
 
+    def show_full_value(self):
+        """the complete repr of the current value in a read only text box"""
+        ast_row = self.current_row()
+        if ast_row is None or ast_row.is_ast():
+            return
+        dialog = QtGui.QDialog(self)
+        dialog.setWindowTitle(ast_row.field_label)
+        dialog.setSizeGripEnabled(True)
+        text_box = QtGui.QPlainTextEdit()
+        text_box.setReadOnly(True)
+        text_box.setPlainText(repr(ast_row.ast_node))
+        close_button = QtGui.QPushButton("Close")
+        close_button.clicked.connect(dialog.accept)
+        layout = QtGui.QVBoxLayout()
+        layout.addWidget(text_box)
+        layout.addWidget(close_button)
+        dialog.setLayout(layout)
+        dialog.resize(800, 500)
+        dialog.exec_()
+
     def make_root(self):
-        """make the current item the displayed root of the tree"""
-        # self.ast_root = self.currentItem().ast_node
-        # self.make_tree_from(self.ast_root)
-        self.code_presenter.apply_transform(code_item=self.currentItem().ast_node, transform_item=None)
-
-    def expand_descendants(self, item=None):
-        """Expand all descendants of the current item"""
-        if item is None:
-            print("item is none")
-            item = self.currentItem()
-            print("item is %s" % item)
+        """show the current node in a new pane that shares this tree's rows"""
+        ast_row = self.current_row()
+        while ast_row is not None and not ast_row.is_ast():
+            ast_row = ast_row.parent
+        if ast_row is None or self.code_item is None:
+            self.code_presenter.apply_transform(code_item=self.current_ast_node(), transform_item=None)
+            return
+        self.code_presenter.show_subtree(self.code_item, ast_row)
+
+
+class AstTreeWidget(AstTreeActions, QtGui.QTreeWidget):
+    """
+    displays an ast as a tree widget
+    """
+    COL_NODE = 0
+    COL_FIELD = 1
+    COL_CLASS = 2
+    COL_VALUE = 3
+    COL_POS = 4
+    COL_HIGHLIGHT = 5
+
+    expand_all_at_create = True
+    use_iterative_builder = True
+    build_incrementally = True
+    build_slice_seconds = 0.008
+
+    build_progress = QtCore.Signal(int)
+    build_finished = QtCore.Signal()
+    row_clicked = QtCore.Signal(object)
+
+    def __init__(self, code_presenter=None, ast_root=None, tab_name='tab', code_item=None):
+        super(AstTreeWidget, self).__init__()
 
-        item.setExpanded(True)
-        for child_index in range(item.childCount()):
-            self.expand_descendants(item.child(child_index))
+        self.code_presenter = code_presenter
+        self.tab_name = tab_name
+        self.code_item = code_item
+        self.marked_items = []
+        self.builder = None
+        self.build_timer = None
+        self.root_row = None
+        self.reset_tree_caches()
+
+        self.ast_root = ast_root
+        self.setColumnCount(2)
+        self.setHeaderLabels(["Node"])
+        self.header().resizeSection(AstTreeWidget.COL_NODE, 800)
+        self.header().setStretchLastSection(True)
+
+        self.transform_signal = QtCore.Signal(int)
+
+        self.create_actions()
+        self.itemClicked.connect(self.item_clicked)
+
+        if ast_root:
+            self.make_tree_from(self.ast_root)
+
+    def current_ast_node(self):
+        item = self.currentItem()
+        return item.ast_node if item else None
+
+    @QtCore.Slot(QtGui.QTreeWidgetItem, int)
+    def item_clicked(self, item, column):
+        if getattr(item, 'ast_row', None) is not None:
+            self.row_clicked.emit(item.ast_row)
+
+    def nearest_ast_node(self):
+        """the ast node of the current item or the closest ancestor that has one"""
+        item = self.currentItem()
+        while item:
+            if hasattr(item, 'ast_node') and isinstance(item.ast_node, ast.AST):
+                return item.ast_node
+            item = item.parent()
+        return None
+
+    def item_for_row(self, ast_row):
+        """
+        the widget item showing ast_row, found by following row numbers down from
+        the top item since the items mirror the rows, any unfinished build is
+        completed first so the item exists
+        """
+        if self.builder is not None:
+            self.builder.build()
+            self.build_slice()
+        path = [ast_row.row for ast_row in [ast_row] + list(ast_row.ancestors())][:-1]
+        item = self.topLevelItem(0)
+        for row_number in reversed(path):
+            item = item.child(row_number)
+        return item
+
+    def select_row(self, ast_row):
+        item = self.item_for_row(ast_row)
+        self.setCurrentItem(item)
+        self.expandItem(item)
+
+    def current_row(self):
+        item = self.currentItem()
+        return item.ast_row if item else None
+
+    def expand_row(self, ast_row):
+        self.item_for_row(ast_row).setExpanded(True)
+
+    def set_row_hidden(self, ast_row, hidden):
+        self.item_for_row(ast_row).setHidden(hidden)
+
+    def show_node_marks(self, marks):
+        """colour the items of the ast nodes in marks, the tree is finished first so every item exists"""
+        if self.builder is not None:
+            self.builder.build()
+            self.build_slice()
+        for item in self.marked_items:
+            item.setBackground(AstTreeWidget.COL_NODE, QtGui.QBrush())
+            item.setToolTip(AstTreeWidget.COL_NODE, "")
+        self.marked_items = []
+
+        iterator = QtGui.QTreeWidgetItemIterator(self)
+        while iterator.value():
+            item = iterator.value()
+            mark = marks.get(item.ast_node) if isinstance(item.ast_node, ast.AST) else None
+            if mark is not None:
+                item.setBackground(AstTreeWidget.COL_NODE, QtGui.QBrush(QtGui.QColor(mark_colors[mark])))
+                item.setToolTip(AstTreeWidget.COL_NODE, mark)
+                self.marked_items.append(item)
+            iterator += 1
+
+    def expand_subtree(self, ast_row):
+        if ast_row is self.root_row:
+            self.expandAll()
+            return
+        stack = [self.item_for_row(ast_row)]
+        while stack:
+            item = stack.pop()
+            item.setExpanded(True)
+            stack.extend(item.child(child_index) for child_index in range(item.childCount()))
 
     def collapse_descendants(self, item=None):
-        """Expand all descendants of the current item"""
-        if item is None:
+        """Collapse all descendants of the current item"""
+        if not isinstance(item, QtGui.QTreeWidgetItem):
             item = self.currentItem()
 
-        item.setExpanded(False)
-        for child_index in range(item.childCount()):
-            self.collapse_descendants(item.child(child_index))
+        stack = [item]
+        while stack:
+            item = stack.pop()
+            item.setExpanded(False)
+            stack.extend(item.child(child_index) for child_index in range(item.childCount()))
 
     def make_tree_from(self, syntax_tree, file_name="", display_depth=1):
         """
         Populates the tree widget.
         """
+        self.cancel_build()
         self.clear()
+        self.ast_root = syntax_tree
+        self.reset_tree_caches()
+        self.marked_items = []
+
+        if AstTreeWidget.build_incrementally:
+            self.populate_incrementally(syntax_tree, file_name=file_name, display_depth=display_depth)
+            return
+
+        if AstTreeWidget.use_iterative_builder:
+            self.populate_iterative(syntax_tree, file_name=file_name)
+        else:
+            self.populate_recursive(syntax_tree, file_name=file_name)
+
+        if AstTreeWidget.expand_all_at_create:
+            self.expand_within_budget()
+        else:
+            self.expandToDepth(display_depth)
+
+    def populate_iterative(self, syntax_tree, file_name=""):
+        """
+        Populates the tree widget using an explicit stack, so deeply nested
+        trees cannot hit the recursion limit.  All the children of a node are
+        created before any of them is attached and then inserted with a single
+        addChildren call
+        """
+        self.root_row = AstRow(syntax_tree, '"{}"'.format(file_name))
+        builder = TreeItemBuilder(self, self.root_row)
+        builder.build()
+
+    def populate_incrementally(self, syntax_tree, file_name="", display_depth=1):
+        """
+        Populates the tree widget a slice at a time from a timer so the event loop
+        keeps running, the first slice is built straight away so the top of the
+        tree shows up immediately.  build_progress is emitted after each slice
+        and build_finished at the end, cancel_build stops the work
+        """
+        self.root_row = AstRow(syntax_tree, '"{}"'.format(file_name))
+        if AstTreeWidget.expand_all_at_create:
+            self.builder = TreeItemBuilder(
+                self, self.root_row,
+                expand_rows=set(breadth_first_expansion(self.root_row, AstTreeActions.expand_row_budget))
+            )
+        else:
+            self.builder = TreeItemBuilder(self, self.root_row, expand_depth=display_depth)
+        self.build_timer = QtCore.QTimer(self)
+        self.build_timer.timeout.connect(self.build_slice)
+        self.build_slice()
+        if self.builder is not None:
+            self.build_timer.start(0)
+
+    @QtCore.Slot()
+    def build_slice(self):
+        if self.builder is None:
+            return
+        done = self.builder.build(seconds=AstTreeWidget.build_slice_seconds)
+        self.build_progress.emit(self.builder.item_count)
+        if done:
+            self.stop_build_timer()
+            self.builder = None
+            self.build_finished.emit()
+
+    def is_building(self):
+        return self.builder is not None
+
+    def cancel_build(self):
+        if self.builder is not None:
+            self.stop_build_timer()
+            self.builder = None
+            self.build_finished.emit()
+
+    def stop_build_timer(self):
+        if self.build_timer is not None:
+            self.build_timer.stop()
+            self.build_timer = None
+
+    def populate_recursive(self, syntax_tree, file_name=""):
+        """
+        Populates the tree widget one item at a time by recursing over the ast,
+        kept for comparison with populate_iterative
+        """
+        self.root_row = AstRow(syntax_tree, '"{}"'.format(file_name))
 
         # State we keep during the recursion.
         # Is needed to populate the selection column.
@@ -291,13 +767,146 @@ class AstTreeWidget(QtGui.QTreeWidget):
         #logger.debug(ast.dump(syntax_tree))
         add_node(syntax_tree, self, '"{}"'.format(file_name))
 
+
+class AstTreeView(AstTreeActions, QtGui.QTreeView):
+    """
+    displays an ast through an AstTreeModel, rows are created when their
+    parent is expanded rather than all at once
+    """
+    row_clicked = QtCore.Signal(object)
+
+    def __init__(self, code_presenter=None, ast_root=None, tab_name='tab', code_item=None):
+        super(AstTreeView, self).__init__()
+        self.source_tree = None
+
+        self.code_presenter = code_presenter
+        self.tab_name = tab_name
+        self.code_item = code_item
+
+        self.ast_root = ast_root
+        self.root_row = None
+        self.reset_tree_caches()
+        self.setUniformRowHeights(True)
+        self.header().setStretchLastSection(True)
+
+        self.create_actions()
+        self.clicked.connect(self.index_clicked)
+
+        if ast_root:
+            self.make_tree_from(self.ast_root)
+
+    def current_row(self):
+        return self.model().row_for_index(self.currentIndex()) if self.model() else None
+
+    def current_ast_node(self):
+        ast_row = self.current_row()
+        return ast_row.ast_node if ast_row else None
+
+    @QtCore.Slot(QtCore.QModelIndex)
+    def index_clicked(self, index):
+        ast_row = self.model().row_for_index(index)
+        if ast_row is not None:
+            self.row_clicked.emit(ast_row)
+
+    def nearest_ast_node(self):
+        ast_row = self.current_row()
+        return ast_row.nearest_ast_node() if ast_row else None
+
+    def select_row(self, ast_row):
+        index = self.model().index_for_row(ast_row)
+        self.setCurrentIndex(index)
+        self.scrollTo(index)
+        self.expand(index)
+
+    def expand_to_depth(self, depth):
+        """expand rows down to depth, fetching them as needed"""
+        model = self.model()
+        level = [model.index_for_row(self.root_row)]
+        for _ in range(depth + 1):
+            next_level = []
+            for index in level:
+                if model.canFetchMore(index):
+                    model.fetchMore(index)
+                self.expand(index)
+                next_level.extend(model.index(row, 0, index) for row in range(model.rowCount(index)))
+            level = next_level
+
+    def expand_row(self, ast_row):
+        self.expand(self.model().index_for_row(ast_row))
+
+    def set_row_hidden(self, ast_row, hidden):
+        self.setRowHidden(ast_row.row, self.model().index_for_row(ast_row.parent), hidden)
+
+    def show_node_marks(self, marks):
+        self.model().node_marks = marks
+        self.viewport().update()
+
+    def expand_subtree(self, ast_row):
+        """fetch every row below ast_row then expand them, all at once with expandAll for the root"""
+        model = self.model()
+        indexes = []
+        stack = [model.index_for_row(ast_row)]
+        while stack:
+            index = stack.pop()
+            if model.canFetchMore(index):
+                model.fetchMore(index)
+            row_count = model.rowCount(index)
+            if row_count:
+                indexes.append(index)
+                stack.extend(model.index(row, 0, index) for row in range(row_count))
+        if ast_row is model.root_row:
+            self.expandAll()
+        else:
+            for index in indexes:
+                self.expand(index)
+
+    def collapse_descendants(self, index=None):
+        """Collapse all descendants of the current item, only rows that have been fetched can be expanded"""
+        if not isinstance(index, QtCore.QModelIndex):
+            index = self.currentIndex()
+        model = self.model()
+        stack = [index]
+        while stack:
+            index = stack.pop()
+            self.collapse(index)
+            stack.extend(model.index(row, 0, index) for row in range(model.rowCount(index)))
+
+    def make_tree_from(self, syntax_tree, file_name="", display_depth=1):
+        """
+        Replaces the model, nothing below the root is built until it is expanded
+        """
+        self.root_row = AstRow(syntax_tree, '"{}"'.format(file_name))
+        self.reset_tree_caches()
+        self.setModel(self.shared_model())
+        self.header().hide()
+
         if AstTreeWidget.expand_all_at_create:
-            self.expandToDepth(100)
+            self.expand_within_budget()
         else:
-            self.expandToDepth(display_depth)
+            self.expand_to_depth(display_depth)
+        self.setCurrentIndex(self.model().index(0, 0))
 
         self.ast_root = syntax_tree
 
+    def show_subtree(self, source_tree, ast_row):
+        """
+        show the rows below ast_row of source_tree through source_tree's
+        model, the rows, their labels and the search indexes are shared
+        """
+        self.source_tree = source_tree
+        self.root_row = ast_row
+        self.ast_root = ast_row.ast_node
+        self.reset_tree_caches()
+        self.tree_model = source_tree.shared_model()
+        self.setModel(self.tree_model)
+        self.header().hide()
+        self.setRootIndex(self.tree_model.index_for_row(ast_row))
+
+        if AstTreeWidget.expand_all_at_create:
+            self.expand_within_budget()
+        else:
+            self.expand_to_depth(1)
+
 
 def class_name(obj):
     """ Returns the class name of an object"""
@@ -308,9 +917,88 @@ class AstTreeWidgetItem(QtGui.QTreeWidgetItem):
     """
     connects a gui tree item with the corresponding node in the actual ast tree
     """
-    def __init__(self, parent, source_node=None):
+    def __init__(self, parent, source_node=None, ast_row=None):
         super(AstTreeWidgetItem, self).__init__(parent)
-        self.ast_node = source_node
+        self.ast_row = ast_row
+        self.ast_node = ast_row.ast_node if ast_row is not None else source_node
+
+
+class PositionTracker(object):
+    """
+    fills in AstTreeWidget.COL_HIGHLIGHT, items are added in pre-order and each
+    one that has no position of its own gets the range from the last position
+    seen to the next new one
+    """
+    def __init__(self):
+        self.from_position = '? : ?'
+        self.to_position = '1 : 0'
+        self.to_be_updated = []
+
+    def add(self, node_item):
+        ast_node = node_item.ast_node
+        if hasattr(ast_node, 'lineno'):
+            position_str = " ({:d}:{:d})".format(ast_node.lineno, ast_node.col_offset)
+            if position_str != self.to_position:
+                self.from_position = self.to_position
+                self.to_position = position_str
+                highlight = "{} : {}".format(self.from_position, self.to_position)
+                for item in self.to_be_updated:
+                    item.setText(AstTreeWidget.COL_HIGHLIGHT, highlight)
+                self.to_be_updated = [node_item]
+                return
+        self.to_be_updated.append(node_item)
+
+
+class TreeItemBuilder(object):
+    """
+    builds the AstTreeWidgetItems below a root AstRow without recursion,
+    the pending items are kept on an explicit stack so building can stop
+    after a time limit and pick up again on the next call.  Each item's
+    children are created together and attached with one addChildren call
+    """
+    def __init__(self, tree_widget, root_row, expand_depth=None, expand_rows=None):
+        self.tree_widget = tree_widget
+        self.expand_depth = expand_depth
+        self.expand_rows = expand_rows
+        self.positions = PositionTracker()
+
+        root_item = AstTreeWidgetItem(None, ast_row=root_row)
+        root_item.setText(AstTreeWidget.COL_NODE, root_row.label())
+        tree_widget.addTopLevelItem(root_item)
+        tree_widget.setCurrentItem(root_item)
+
+        self.item_count = 1
+        self.stack = [(root_item, 0)]
+
+    def build(self, seconds=None):
+        """
+        build until finished or until seconds have passed,
+        returns True when there is nothing left to build
+        """
+        deadline = time.time() + seconds if seconds is not None else None
+        stack = self.stack
+        while stack:
+            node_item, depth = stack.pop()
+            self.positions.add(node_item)
+
+            children = node_item.ast_row.children()
+            if children:
+                child_items = []
+                for child_row in children:
+                    child_item = AstTreeWidgetItem(None, ast_row=child_row)
+                    child_item.setText(AstTreeWidget.COL_NODE, child_row.label())
+                    child_items.append(child_item)
+                node_item.addChildren(child_items)
+                if self.expand_depth is not None and depth < self.expand_depth:
+                    node_item.setExpanded(True)
+                elif self.expand_rows is not None and node_item.ast_row in self.expand_rows:
+                    node_item.setExpanded(True)
+                self.item_count += len(child_items)
+                stack.extend((child_item, depth + 1) for child_item in reversed(child_items))
+
+            if deadline is not None and time.time() > deadline:
+                break
+        return not stack
 
 
 class TransformerAction(QtGui.QAction):
@@ -323,8 +1011,14 @@ class TransformerAction(QtGui.QAction):
 
     def do_transform(self):
         print("Triggered with string %s" % self.text)
+        ast_row = self.ast_tree_widget.current_row()
+        if ast_row is not None and self.ast_tree_widget.code_item is not None:
+            self.ast_tree_widget.code_presenter.apply_transform_at(
+                self.ast_tree_widget.code_item, ast_row, self.transform_item
+            )
+            return
         self.ast_tree_widget.code_presenter.apply_transform(
-            code_item=self.ast_tree_widget.currentItem().ast_node,
+            code_item=self.ast_tree_widget.current_ast_node(),
             transform_item=self.transform_item
         )
 
@@ -2,7 +2,10 @@ __author__ = 'Chick Markley'
 
 from PySide import QtGui, QtCore
 from ast_tool_box.models.code_models.code_model import AstTreeItem, CodeItem, FileItem, GeneratedCodeItem
+from ast_tool_box.models.code_models.code_model import PendingCodeItem
 from ast_tool_box.views.code_views.ast_tree_widget import AstTreePane, AstTreeWidget
+from ast_tool_box.views.code_views.pending_transform_pane import PendingTransformPane
+from ast_tool_box.views.code_views.parameter_sweep_table import ParameterSweepTable
 from ast_tool_box.views.editor_widget import EditorPane
 
 
@@ -108,14 +111,25 @@ class CodePane(QtGui.QGroupBox):
     def reload_panel(self):
         for index in range(self.code_splitter.count()-1, 1, -1):
             self.tab_bar.removeTab(index)
+            CodePane.cancel_work(self.code_splitter.widget(index))
             self.code_splitter.widget(index).deleteLater()
 
 
     def clear(self):
         for index in range(self.code_splitter.count()-1, -1, -1):
             self.tab_bar.removeTab(index)
+            CodePane.cancel_work(self.code_splitter.widget(index))
             self.code_splitter.widget(index).deleteLater()
 
+    @staticmethod
+    def cancel_work(widget):
+        """stop any incremental work a widget is doing before it goes away"""
+        if isinstance(widget, AstTreePane):
+            widget.cancel_build()
+            widget.unlink_editor()
+        elif isinstance(widget, PendingTransformPane):
+            widget.cancel_work()
+
     @QtCore.Slot(int)
     def tab_selected(self, index):
         if index < self.tab_bar.count():
@@ -125,15 +139,25 @@ class CodePane(QtGui.QGroupBox):
     @QtCore.Slot(int)
     def delete_at(self, index):
         item = self.code_splitter.widget(index)
-        item.deleteLater()
-        self.code_presenter.delete_last_item()
-        # item.destroy(destroyWindow=True, destroySubWindows=True)
+        if isinstance(item, PendingTransformPane):
+            self.code_presenter.cancel_pending(item.pending_item)
+            return
+        # through the presenter, so its items and the panes stay lined up
+        self.code_presenter.remove_code_item(self.code_presenter[index])
+
+    def remove_at(self, index):
+        """
+        take the widget at index out of the splitter straight away, unlike
+        deleteLater alone, so the following panes keep lining up with the
+        code_presenter's items
+        """
+        widget = self.code_splitter.widget(index)
+        CodePane.cancel_work(widget)
         self.tab_bar.removeTab(index)
-        #
-        # TODO the following call does not work as expected due to the deleteLater above
-        #
-        # self.set_panel_sizes()
-        self.xxx.delete_signal.emit(index)
+        widget.hide()
+        widget.setParent(None)
+        widget.deleteLater()
+        self.set_panel_sizes()
 
     @QtCore.Slot(int)
     def delete_tab_happened(self, index):
@@ -208,29 +232,128 @@ class CodePane(QtGui.QGroupBox):
         add a new code item widget to the right hand side of the
         splitter, reduce size of left hand members
         """
+        self.insert_code_item(self.code_splitter.count(), code_item)
+
+    def replace_at(self, index, code_item):
+        """
+        swap the pane at index for one showing code_item, the presenter
+        already has code_item at index.  Generated code that was streamed
+        into a pending pane keeps the editor it is already in
+        """
+        code_editor = None
+        widget = self.code_splitter.widget(index)
+        if isinstance(widget, PendingTransformPane) and isinstance(code_item, GeneratedCodeItem):
+            code_editor = widget.take_code_editor(code_item.code)
+        self.remove_at(index)
+        self.insert_code_item(index, code_item, code_editor)
+
+    def insert_code_item(self, index, code_item, code_editor=None):
+        """
+        add a widget for code_item to the splitter at index, with its tab,
+        code_editor is an editor that already shows a GeneratedCodeItem's code
+        """
         assert isinstance(code_item, CodeItem)
 
         if isinstance(code_item, FileItem):
             widget = EditorPane()
             widget.setPlainText(code_item.code)
         elif isinstance(code_item, AstTreeItem):
-            widget = AstTreePane(self.code_presenter, code_item.code, tab_name=code_item.code_name)
+            widget = AstTreePane(
+                self.code_presenter, code_item.code, tab_name=code_item.code_name,
+                code_item=code_item, source_tree=self.source_tree_for(code_item)
+            )
         elif isinstance(code_item, GeneratedCodeItem):
-            widget = EditorPane()
-            widget.setPlainText(code_item.code)
+            if code_editor is not None:
+                widget = code_editor
+                widget.setReadOnly(False)
+            else:
+                widget = EditorPane()
+                widget.setPlainText(code_item.code)
+        elif isinstance(code_item, PendingCodeItem):
+            widget = PendingTransformPane(self.code_presenter, code_item)
         else:
             CodePane.show_error("add_code_item got %s %s" % (type(code_item), code_item))
             return
 
-        self.tab_bar.addTab(code_item.code_name)
-        self.tab_bar.setCurrentIndex(self.tab_bar.count()-1)
+        self.tab_bar.insertTab(index, code_item.code_name)
+        self.tab_bar.setCurrentIndex(index)
+        if code_item.transform_profile is not None:
+            self.tab_bar.setTabToolTip(index, code_item.transform_profile.summary())
 
-        self.code_splitter.addWidget(widget)
+        self.code_splitter.insertWidget(index, widget)
         if self.code_splitter.count() > 2:
             self.three_button.setEnabled(True)
-        self.code_splitter.setCollapsible(self.code_splitter.count()-1, True)
+        self.code_splitter.setCollapsible(index, True)
         self.set_panel_sizes()
 
+        if isinstance(widget, AstTreePane):
+            editor = self.source_editor_for(code_item)
+            if editor is not None:
+                widget.link_editor(editor)
+
+        if isinstance(widget, AstTreePane) and widget.is_building():
+            tree_widget = widget.ast_tree_widget
+            tree_widget.build_progress.connect(
+                lambda count, pane=widget, name=code_item.code_name: self.show_build_progress(pane, name, count)
+            )
+            tree_widget.build_finished.connect(
+                lambda pane=widget, name=code_item.code_name: self.build_finished(pane, name)
+            )
+            self.show_build_progress(widget, code_item.code_name, tree_widget.builder.item_count)
+
+        if isinstance(widget, PendingTransformPane):
+            widget.elapsed_changed.connect(
+                lambda text, pane=widget, name=code_item.code_name: self.show_pending_elapsed(pane, name, text)
+            )
+            self.show_pending_elapsed(widget, code_item.code_name, widget.elapsed_text())
+
+    def widget_for(self, code_item):
+        for index in range(min(self.code_splitter.count(), self.code_presenter.count())):
+            if self.code_presenter[index] is code_item:
+                return self.code_splitter.widget(index)
+        return None
+
+    def source_editor_for(self, code_item):
+        """the editor showing the file code_item was parsed from, if it is still open"""
+        link = code_item.parent_code_item
+        if link is None or not isinstance(link.code_item, FileItem):
+            return None
+        widget = self.widget_for(link.code_item)
+        return widget if isinstance(widget, EditorPane) else None
+
+    def source_tree_for(self, code_item):
+        """the tree whose rows a subtree item shows, if its pane is still open"""
+        link = code_item.parent_code_item
+        if code_item.root_row is None or link is None:
+            return None
+        widget = self.widget_for(link.code_item)
+        return widget.ast_tree_widget if isinstance(widget, AstTreePane) else None
+
+    def show_build_progress(self, pane, name, count):
+        """the tab of a tree that is still being built shows how many rows are done"""
+        index = self.code_splitter.indexOf(pane)
+        if index >= 0:
+            self.tab_bar.setTabText(index, u"%s (%d rows\u2026)" % (name, count))
+
+    def show_pending_elapsed(self, pane, name, elapsed_text):
+        """the tab of a transform running in the background shows how long it has taken so far"""
+        index = self.code_splitter.indexOf(pane)
+        if index >= 0:
+            self.tab_bar.setTabText(index, u"%s (%s\u2026)" % (name, elapsed_text))
+
+    def show_updating(self, code_item, updating):
+        """mark the tab of an item that is being recomputed after its transform changed"""
+        widget = self.widget_for(code_item)
+        index = self.code_splitter.indexOf(widget) if widget is not None else -1
+        if index >= 0:
+            name = code_item.code_name
+            self.tab_bar.setTabText(index, u"%s (updating\u2026)" % name if updating else name)
+
+    def build_finished(self, pane, name):
+        index = self.code_splitter.indexOf(pane)
+        if index >= 0:
+            self.tab_bar.setTabText(index, name)
+
     def resolve_transform_arguments(self, transform_thing):
         settings = QtCore.QSettings()
         group_name = "transforms/%s/parameters" % transform_thing.package_name
@@ -309,6 +432,74 @@ class CodePane(QtGui.QGroupBox):
 
         return result
 
+    def resolve_sweep_arguments(self, transform_thing):
+        """
+        the argument sources for a parameter sweep of transform_thing, a list
+        of values per positional argument for a grid or one argument set per
+        line, as (sources, grid, generate, processes), None if cancelled
+        """
+        settings = QtCore.QSettings()
+        group_name = "transforms/%s/sweep" % transform_thing.package_name
+        settings.beginGroup(group_name)
+
+        dialog = QtGui.QDialog()
+        dialog.setWindowTitle("Sweep arguments of %s" % transform_thing.name())
+        dialog.setSizeGripEnabled(True)
+        form_layout = QtGui.QFormLayout()
+        form_layout.addRow(QtGui.QLabel("Values to try for each parameter, every combination is run"))
+
+        grid_boxes = []
+        for positional_arg in transform_thing.positional_args:
+            default_text = "[%s]" % positional_arg.default_source if positional_arg.default_source else ""
+            text_editor = QtGui.QLineEdit()
+            text_editor.setText(settings.value(positional_arg.name, default_text))
+            grid_boxes.append(text_editor)
+            form_layout.addRow(QtGui.QLabel(positional_arg.name), text_editor)
+
+        list_check_box = QtGui.QCheckBox("Run these argument sets instead, one per line")
+        list_editor = QtGui.QPlainTextEdit()
+        list_editor.setPlainText(settings.value("argument sets", ""))
+        list_editor.setEnabled(False)
+        list_check_box.toggled.connect(list_editor.setEnabled)
+        form_layout.addRow(list_check_box)
+        form_layout.addRow(list_editor)
+
+        generate_check_box = QtGui.QCheckBox("Generate code from each result")
+        form_layout.addRow(generate_check_box)
+        processes_box = QtGui.QSpinBox()
+        processes_box.setRange(1, 256)
+        processes_box.setValue(QtCore.QThread.idealThreadCount())
+        form_layout.addRow(QtGui.QLabel("Worker processes"), processes_box)
+        form_layout.addRow(QtGui.QLabel("Every box is processed by the python eval() function"))
+
+        cancel_button = QtGui.QPushButton("Cancel")
+        cancel_button.clicked.connect(dialog.reject)
+        accept_button = QtGui.QPushButton("Go")
+        accept_button.clicked.connect(dialog.accept)
+        form_layout.addRow(cancel_button, accept_button)
+        dialog.setLayout(form_layout)
+        accept_button.setFocus()
+
+        if not dialog.exec_():
+            settings.endGroup()
+            return None
+
+        grid_sources = [text_box.text().strip() for text_box in grid_boxes]
+        list_source = list_editor.toPlainText()
+        for positional_arg, source in zip(transform_thing.positional_args, grid_sources):
+            settings.setValue(positional_arg.name, source)
+        settings.setValue("argument sets", list_source)
+        settings.endGroup()
+
+        grid = not list_check_box.isChecked()
+        sources = grid_sources if grid else list_source.splitlines()
+        return sources, grid, generate_check_box.isChecked(), processes_box.value()
+
+    def show_sweep(self, title, points, open_point):
+        """a window with the results of a parameter sweep, left open alongside the code"""
+        sweep_table = ParameterSweepTable(title, points, open_point, parent=self)
+        sweep_table.show()
+
     @staticmethod
     def show_error(message):
         # QtGui.QErrorMessage().showMessage(message)
@@ -0,0 +1,65 @@
+__author__ = 'Chick Markley'
+
+from PySide import QtGui, QtCore
+
+from ast_tool_box.controllers.parameter_sweep import columns, argument_text, sweep_summary
+
+
+class ParameterSweepTable(QtGui.QDialog):
+    """
+    the SweepPoints of a parameter sweep, a summary line over a sortable
+    table with a row per argument set.  Double clicking a row, or Open,
+    calls open_point with that row's point so its output gets a tab
+    """
+    def __init__(self, title, points, open_point, parent=None):
+        super(ParameterSweepTable, self).__init__(parent)
+        self.points = points
+        self.open_point = open_point
+        self.setWindowTitle(title)
+        self.setSizeGripEnabled(True)
+
+        layout = QtGui.QVBoxLayout()
+        layout.addWidget(QtGui.QLabel(sweep_summary(points)))
+
+        self.table = QtGui.QTableWidget(len(points), len(columns))
+        self.table.setHorizontalHeaderLabels(columns)
+        self.table.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QtGui.QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        for row_number, point in enumerate(points):
+            self.set_cell(row_number, 0, argument_text(point.arguments))
+            self.table.item(row_number, 0).setData(QtCore.Qt.UserRole, point.index)
+            self.set_cell(row_number, 1, point.status)
+            self.set_cell(row_number, 2, round(point.seconds, 4))
+            self.set_cell(row_number, 3, point.node_count)
+            self.set_cell(row_number, 4, point.output_size)
+        self.table.setSortingEnabled(True)
+        self.table.resizeColumnsToContents()
+        self.table.cellDoubleClicked.connect(self.open_row)
+        layout.addWidget(self.table)
+
+        open_button = QtGui.QPushButton("Open")
+        open_button.setToolTip("Show the output of the selected argument set in a new tab")
+        open_button.clicked.connect(lambda: self.open_row(self.table.currentRow()))
+        close_button = QtGui.QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        button_layout = QtGui.QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(open_button)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+        self.resize(600, 400)
+
+    def set_cell(self, row_number, column, value):
+        """numbers are stored as display data so the column sorts numerically"""
+        cell = QtGui.QTableWidgetItem()
+        cell.setData(QtCore.Qt.DisplayRole, value)
+        self.table.setItem(row_number, column, cell)
+
+    def open_row(self, row_number, column=None):
+        if row_number < 0:
+            return
+        index = self.table.item(row_number, 0).data(QtCore.Qt.UserRole)
+        self.open_point(self.points[int(index)])
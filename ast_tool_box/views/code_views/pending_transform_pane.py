@@ -0,0 +1,94 @@
+__author__ = 'Chick Markley'
+
+from PySide import QtGui, QtCore
+
+from ast_tool_box.views.editor_widget import EditorPane
+
+
+class PendingTransformPane(QtGui.QWidget):
+    """
+    the tab of a transform that is running in the background, shows how
+    long it has been running and lets it be cancelled.  When the task is done
+    the code_presenter swaps this pane for the result.  A code generator's
+    code is shown in code_editor as it arrives, the result's pane takes
+    the editor over instead of filling a new one
+    """
+    refresh_interval = 200
+    elapsed_changed = QtCore.Signal(str)
+
+    def __init__(self, code_presenter, pending_item, parent=None):
+        super(PendingTransformPane, self).__init__(parent)
+        self.code_presenter = code_presenter
+        self.pending_item = pending_item
+
+        self.code_editor = None
+        self.streamed_size = 0
+
+        layout = QtGui.QVBoxLayout()
+        if not pending_item.streams_code:
+            layout.addStretch(1)
+        self.status_label = QtGui.QLabel()
+        self.status_label.setAlignment(QtCore.Qt.AlignCenter)
+        layout.addWidget(self.status_label)
+        self.cancel_button = QtGui.QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_clicked)
+        layout.addWidget(self.cancel_button, alignment=QtCore.Qt.AlignCenter)
+        if pending_item.streams_code:
+            self.code_editor = EditorPane()
+            self.code_editor.setReadOnly(True)
+            layout.addWidget(self.code_editor, 1)
+            pending_item.task.signals.progress.connect(self.append_code)
+        else:
+            layout.addStretch(1)
+        self.setLayout(layout)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.show_elapsed)
+        self.timer.start(PendingTransformPane.refresh_interval)
+        self.show_elapsed()
+
+        pending_item.task.signals.finished.connect(self.task_finished)
+        pending_item.task.signals.failed.connect(self.task_failed)
+
+    def elapsed_text(self):
+        return u"%.1f s" % self.pending_item.task.elapsed()
+
+    def show_elapsed(self):
+        elapsed_text = self.elapsed_text()
+        self.status_label.setText(u"Running %s\u2026 %s" % (self.pending_item.name(), elapsed_text))
+        self.elapsed_changed.emit(elapsed_text)
+
+    def cancel_work(self):
+        self.timer.stop()
+        self.pending_item.task.cancel()
+
+    @QtCore.Slot()
+    def cancel_clicked(self):
+        self.code_presenter.cancel_pending(self.pending_item)
+
+    @QtCore.Slot(object)
+    def append_code(self, chunk):
+        cursor = QtGui.QTextCursor(self.code_editor.document())
+        cursor.movePosition(QtGui.QTextCursor.End)
+        cursor.insertText(chunk)
+        self.streamed_size += len(chunk)
+
+    def take_code_editor(self, code):
+        """the editor holding the streamed code if it holds all of code, removed from this pane, else None"""
+        if self.code_editor is None or self.streamed_size != len(code):
+            return None
+        editor = self.code_editor
+        self.code_editor = None
+        self.layout().removeWidget(editor)
+        editor.setParent(None)
+        return editor
+
+    @QtCore.Slot(object)
+    def task_finished(self, result):
+        self.timer.stop()
+        self.code_presenter.pending_finished(self.pending_item, result)
+
+    @QtCore.Slot(str)
+    def task_failed(self, message):
+        self.timer.stop()
+        self.code_presenter.pending_failed(self.pending_item, message)
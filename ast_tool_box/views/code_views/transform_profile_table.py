@@ -0,0 +1,43 @@
+__author__ = 'Chick Markley'
+
+from PySide import QtGui, QtCore
+
+from ast_tool_box.models.transform_models.transform_profile import TransformProfile
+
+
+class TransformProfileTable(QtGui.QGroupBox):
+    """
+    the TransformProfile of the transform that made a tree, a summary line
+    over a sortable table with a row per node type
+    """
+    def __init__(self, profile, parent=None):
+        super(TransformProfileTable, self).__init__(parent)
+        self.profile = profile
+
+        layout = QtGui.QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.summary_label = QtGui.QLabel(profile.summary())
+        layout.addWidget(self.summary_label)
+
+        rows = profile.rows()
+        self.table = QtGui.QTableWidget(len(rows), len(TransformProfile.columns))
+        self.table.setHorizontalHeaderLabels(TransformProfile.columns)
+        self.table.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        for row_number, (type_name, visits, handled, cumulative, own) in enumerate(rows):
+            self.set_cell(row_number, 0, type_name)
+            self.set_cell(row_number, 1, visits)
+            self.set_cell(row_number, 2, "yes" if handled else "")
+            self.set_cell(row_number, 3, round(cumulative, 4))
+            self.set_cell(row_number, 4, round(own, 4))
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(3, QtCore.Qt.DescendingOrder)
+        self.table.resizeColumnsToContents()
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+    def set_cell(self, row_number, column, value):
+        """numbers are stored as display data so the column sorts numerically"""
+        cell = QtGui.QTableWidgetItem()
+        cell.setData(QtCore.Qt.DisplayRole, value)
+        self.table.setItem(row_number, column, cell)
@@ -42,6 +42,24 @@ class EditorPane(QtGui.QPlainTextEdit):
             self.parent_panel.undo_button.setEnabled(True)
         super(EditorPane, self).setPlainText(text)
 
+    def text_position(self, line, column):
+        """document position of a 1 based line and 0 based column, clamped to the text"""
+        block = self.document().findBlockByNumber(line - 1)
+        if not block.isValid():
+            return self.document().characterCount() - 1
+        return block.position() + min(column, block.length() - 1)
+
+    def select_span(self, start, end):
+        """select from start to end, both (line, column) as the ast records them"""
+        cursor = QtGui.QTextCursor(self.document())
+        cursor.setPosition(self.text_position(*start))
+        cursor.setPosition(self.text_position(*end), QtGui.QTextCursor.KeepAnchor)
+        self.setTextCursor(cursor)
+
+    def cursor_position(self):
+        cursor = self.textCursor()
+        return cursor.blockNumber() + 1, cursor.positionInBlock()
+
 
 class EditorPanel(QtGui.QGroupBox):
     def __init__(self, transform_pane=None):
@@ -4,9 +4,20 @@ from PySide import QtGui, QtCore
 
 
 class SearchLineEdit(QtGui.QLineEdit):
-    def __init__(self, parent=None, on_changed=None, on_next=None):
+    """
+    line edit with clear and search buttons, on_changed is called once typing
+    has paused for debounce_ms rather than on every keystroke
+    """
+    debounce_ms = 200
+
+    def __init__(self, parent=None, on_changed=None, on_next=None, debounce_ms=None):
         QtGui.QLineEdit.__init__(self, parent)
 
+        self.on_next = on_next
+        self.change_timer = QtCore.QTimer(self)
+        self.change_timer.setSingleShot(True)
+        self.change_timer.setInterval(debounce_ms if debounce_ms is not None else SearchLineEdit.debounce_ms)
+
         self.clear_button = QtGui.QToolButton(self)
         self.clear_button.setIcon(
             QtGui.QIcon.fromTheme(
@@ -21,7 +32,8 @@ class SearchLineEdit(QtGui.QLineEdit):
         self.clear_button.clicked.connect(self.clear)
         self.textChanged.connect(self.updateCloseButton)
         if on_changed:
-            self.textChanged.connect(on_changed)
+            self.change_timer.timeout.connect(on_changed)
+            self.textChanged.connect(self.restart_change_timer)
 
         self.search_button = QtGui.QToolButton(self)
         self.search_button.setIcon(
@@ -34,8 +46,8 @@ class SearchLineEdit(QtGui.QLineEdit):
         self.search_button.setStyleSheet("QToolButton { border: none; padding: 0px;}")
 
         if on_next:
-            self.search_button.clicked.connect(on_next)
-            self.returnPressed.connect(on_next)
+            self.search_button.clicked.connect(self.next_requested)
+            self.returnPressed.connect(self.next_requested)
 
         frame_width = self.style().pixelMetric(QtGui.QStyle.PM_DefaultFrameWidth)
         self.setStyleSheet(
@@ -63,6 +75,14 @@ class SearchLineEdit(QtGui.QLineEdit):
         self.search_button.move(self.rect().left() + 1,
                            (self.rect().bottom() + 1 - sz.height()) / 2)
 
+    def restart_change_timer(self, text):
+        self.change_timer.start()
+
+    def next_requested(self):
+        """asking for the next hit makes a pending change search unnecessary"""
+        self.change_timer.stop()
+        self.on_next()
+
     def updateCloseButton(self, text):
         if text:
             self.clear_button.setVisible(True)
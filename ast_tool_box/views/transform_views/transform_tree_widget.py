@@ -57,6 +57,19 @@ class TransformTreeWidget(QtGui.QTreeWidget):
             statusTip="Expand all descendant nodes",
             triggered=self.expand_descendants
         )
+        self.setSelectionMode(QtGui.QAbstractItemView.ExtendedSelection)
+        self.fused_transform_action = QtGui.QAction(
+            "Apply selected transforms in one pass",
+            self,
+            statusTip="Run the selected node local transforms together in a single walk of the tree",
+            triggered=self.apply_fused_transform
+        )
+        self.sweep_action = QtGui.QAction(
+            "Sweep arguments...",
+            self,
+            statusTip="Run the selected transform for every argument set of a grid or list, in worker processes",
+            triggered=self.sweep_transform
+        )
         self.itemClicked.connect(self.clicked)
         self.itemDoubleClicked.connect(self.double_clicked)
 
@@ -78,9 +91,26 @@ class TransformTreeWidget(QtGui.QTreeWidget):
         else:
             self.transform_pane.show_error("Only works for Ast Transforms and Code Generators")
 
+    def selected_transform_items(self):
+        """the AstTransformItems of the selected rows, in the order they were selected"""
+        return [item.source for item in self.selectedItems() if isinstance(item.source, AstTransformItem)]
+
+    def apply_fused_transform(self):
+        self.transform_presenter.apply_fused_transform(self.selected_transform_items())
+
+    def sweep_transform(self):
+        selected = self.selected_transform_items()
+        if len(selected) == 1:
+            self.transform_presenter.sweep_transform(selected[0])
+
     def contextMenuEvent(self, event):
         menu = QtGui.QMenu(self)
         menu.addAction(self.expand_descendants_action)
+        selected = self.selected_transform_items()
+        self.fused_transform_action.setEnabled(len(selected) > 1)
+        menu.addAction(self.fused_transform_action)
+        self.sweep_action.setEnabled(len(selected) == 1 and selected[0].has_positional_args())
+        menu.addAction(self.sweep_action)
 
         sub_menu = QtGui.QMenu(self)
         sub_menu.setTitle("Available transformers")
@@ -0,0 +1,64 @@
+"""
+compare copy.deepcopy with clone_ast on python modules of growing size,
+a deep expression chain and a ctree tree
+
+    python benchmarks/benchmark_ast_clone.py
+"""
+from __future__ import print_function
+
+import ast
+import copy
+import time
+
+from ast_tool_box.models.code_models.ast_clone import clone_ast
+
+
+def module_source(function_count):
+    return "\n".join(
+        "def f%d(a, b):\n    x = a * %d + b\n    return g(x, a) if x else None\n" % (index, index)
+        for index in range(function_count)
+    )
+
+
+def binary_op_chain(depth):
+    expression = ast.Num(n=1)
+    for _ in range(depth):
+        expression = ast.BinOp(left=expression, op=ast.Add(), right=ast.Num(n=1))
+    return ast.Expression(body=expression)
+
+
+def ctree_tree(statement_count):
+    from ctree.c.nodes import Assign, Add, SymbolRef, Constant, FunctionDecl, Return
+    body = [Assign(SymbolRef("x%d" % index), Add(SymbolRef("a"), Constant(index))) for index in range(statement_count)]
+    body.append(Return(SymbolRef("x0")))
+    return FunctionDecl(name="f", params=[SymbolRef("a")], defn=body)
+
+
+def time_copier(copier, tree):
+    start = time.time()
+    try:
+        copier(tree)
+    except RuntimeError as e:
+        return "failed: %s" % str(e)[:30]
+    return "%8.3f s" % (time.time() - start)
+
+
+def main():
+    trees = [
+        ("100 functions", ast.parse(module_source(100))),
+        ("1000 functions", ast.parse(module_source(1000))),
+        ("5000 functions", ast.parse(module_source(5000))),
+        ("binop chain 5000", binary_op_chain(5000)),
+    ]
+    try:
+        trees.append(("ctree 5000 assigns", ctree_tree(5000)))
+    except ImportError:
+        pass
+
+    print("%-20s %-20s %-20s" % ("tree", "deepcopy", "clone_ast"))
+    for name, tree in trees:
+        print("%-20s %-20s %-20s" % (name, time_copier(copy.deepcopy, tree), time_copier(clone_ast, tree)))
+
+
+if __name__ == '__main__':
+    main()
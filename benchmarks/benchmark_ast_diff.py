@@ -0,0 +1,67 @@
+"""
+time AstDiff on generated modules of growing size against a copy with a
+few statements updated, inserted, deleted and moved, with the cost of a
+deepcopy of the same tree for scale.  The same edit is also made through
+transform_copy, which shares what it leaves alone, as derived trees do
+
+    python benchmarks/benchmark_ast_diff.py
+"""
+from __future__ import print_function
+
+import ast
+import copy
+import time
+
+from ast_tool_box.models.code_models.ast_diff import AstDiff
+from ast_tool_box.models.code_models.shared_tree import transform_copy
+
+
+def module_source(function_count):
+    return "\n".join(
+        "def f%d(a, b):\n    x = a * %d + b\n    return g(x, a) if x else None\n" % (index, index)
+        for index in range(function_count)
+    )
+
+
+def edit(tree):
+    body = tree.body
+    body[len(body) // 2].body[0].value.left.right.n = -1
+    del body[len(body) // 3]
+    body.insert(len(body) // 4, ast.Pass())
+    body[10].body.append(body[11].body.pop(0))
+    return tree
+
+
+def edited_copy(tree):
+    return edit(copy.deepcopy(tree))
+
+
+def edited_shared(tree):
+    return transform_copy(tree, edit)
+
+
+def time_diff(tree, new_tree):
+    start = time.time()
+    diff = AstDiff(tree, new_tree)
+    return time.time() - start, diff
+
+
+def main():
+    print("%-10s %-10s %-10s %-10s %-10s %s" % ("functions", "nodes", "deepcopy", "diff", "shared", "changes"))
+    for function_count in [100, 1000, 3000, 6000]:
+        tree = ast.parse(module_source(function_count))
+        start = time.time()
+        new_tree = edited_copy(tree)
+        copy_time = time.time() - start
+
+        diff_time, diff = time_diff(tree, new_tree)
+        shared_time, shared_diff = time_diff(tree, edited_shared(tree))
+        assert len(shared_diff.edit_script()) == len(diff.edit_script())
+
+        print("%-10d %-10d %-10.3f %-10.3f %-10.3f %d" % (
+            function_count, len(diff.new), copy_time, diff_time, shared_time, len(diff.edit_script())
+        ))
+
+
+if __name__ == '__main__':
+    main()
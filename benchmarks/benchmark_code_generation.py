@@ -0,0 +1,68 @@
+"""
+compare building generated code by string concatenation, as NonCtreeNode
+used to, with streaming it into a list of chunks or a file, on python
+modules of growing size
+
+    python benchmarks/benchmark_code_generation.py
+"""
+from __future__ import print_function
+
+import ast
+import os
+import tempfile
+import time
+
+from ctree.nodes import CtreeNode
+from ctree.codegen import CodeGenVisitor
+
+from ast_tool_box.models.code_models.ast_clone import clone_ast
+from ast_tool_box.models.code_models.code_generation import generate_code, generate_code_file
+from ast_tool_box.transformers.NonCtreeNodeConverter import NonCtreeNodeConverter, NonCtreeNode
+
+
+def concatenated_code(node, indent=0):
+    """the code for a converted tree the way NonCtreeNode.codegen used to make it"""
+    text = node.string
+    for field in node._fields:
+        value = getattr(node, field)
+        if isinstance(value, NonCtreeNode):
+            text += concatenated_code(value, indent)
+        elif isinstance(value, CtreeNode):
+            text += value.codegen(indent)
+    if 'body' in node._fields:
+        text += CodeGenVisitor(indent=indent)._genblock(node.body)
+    return text
+
+
+def module_source(function_count):
+    return "\n".join(
+        "def f%d(a, b):\n    x = a * %d + b\n    return g(x, a) if x else None\n" % (index, index)
+        for index in range(function_count)
+    )
+
+
+def time_call(call):
+    start = time.time()
+    result = call()
+    return time.time() - start, result
+
+
+def main():
+    file_name = os.path.join(tempfile.gettempdir(), "benchmark_code_generation.txt")
+    print("%-20s %-14s %-14s %-14s" % ("tree", "concatenated", "streamed", "to file"))
+    for function_count in [100, 1000, 5000]:
+        tree = ast.parse(module_source(function_count))
+        concatenated_time, concatenated = time_call(
+            lambda: concatenated_code(NonCtreeNodeConverter().visit(clone_ast(tree)))
+        )
+        streamed_time, streamed = time_call(lambda: generate_code(clone_ast(tree)))
+        file_time, _ = time_call(lambda: generate_code_file(clone_ast(tree), file_name))
+        assert concatenated == streamed
+        print("%-20s %10.3f s %10.3f s %10.3f s" % (
+            "%d functions" % function_count, concatenated_time, streamed_time, file_time
+        ))
+    os.remove(file_name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+compare ast.NodeTransformer with FastNodeTransformer on identity passes,
+a plain one like IdentityTransform and one that overrides visit like
+NoisyIdentityTransform (counting instead of printing), and a pass that
+renames names, on python modules of growing size
+
+    python benchmarks/benchmark_fast_node_transformer.py
+"""
+from __future__ import print_function
+
+import ast
+import time
+
+from ast_tool_box.transformers.fast_node_transformer import FastNodeTransformer
+
+
+class SlowIdentity(ast.NodeTransformer):
+    pass
+
+
+class FastIdentity(FastNodeTransformer):
+    pass
+
+
+class SlowCountingIdentity(ast.NodeTransformer):
+    def __init__(self):
+        super(SlowCountingIdentity, self).__init__()
+        self.visits = 0
+
+    def visit(self, node):
+        self.visits += 1
+        return super(SlowCountingIdentity, self).visit(node)
+
+
+class FastCountingIdentity(FastNodeTransformer):
+    def __init__(self):
+        super(FastCountingIdentity, self).__init__()
+        self.visits = 0
+
+    def visit(self, node):
+        self.visits += 1
+        return super(FastCountingIdentity, self).visit(node)
+
+
+class SlowUpperNames(ast.NodeTransformer):
+    def visit_Name(self, node):
+        node.id = node.id.upper()
+        return node
+
+
+class FastUpperNames(FastNodeTransformer):
+    def visit_Name(self, node):
+        node.id = node.id.upper()
+        return node
+
+
+passes = [
+    ("identity", SlowIdentity, FastIdentity),
+    ("counting identity", SlowCountingIdentity, FastCountingIdentity),
+    ("upper names", SlowUpperNames, FastUpperNames),
+]
+
+
+def module_source(function_count):
+    return "\n".join(
+        "def f%d(a, b):\n    x = a * %d + b\n    return g(x, a) if x else [a, b, None]\n" % (index, index)
+        for index in range(function_count)
+    )
+
+
+def time_call(call):
+    start = time.time()
+    call()
+    return time.time() - start
+
+
+def main():
+    print("%-20s %-20s %-16s %-16s %-8s" % ("tree", "pass", "NodeTransformer", "Fast", "speedup"))
+    for function_count in [100, 1000, 5000]:
+        tree = ast.parse(module_source(function_count))
+        for name, slow_class, fast_class in passes:
+            slow = time_call(lambda: slow_class().visit(tree))
+            fast = time_call(lambda: fast_class().visit(tree))
+            print("%-20s %-20s %14.3f s %14.3f s %7.2fx" % (
+                "%d functions" % function_count, name, slow, fast, slow / fast if fast else 0.0
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+compare running four small node local transforms one after another, each
+on its own copy, with running them fused into one walk of one copy
+
+    python benchmarks/benchmark_fused_transform.py
+"""
+from __future__ import print_function
+
+import ast
+import time
+
+from ast_tool_box.models.code_models.shared_tree import transform_copy
+from ast_tool_box.models.transform_models.fused_transform import FusedNodeTransformer
+
+
+class UpperNames(ast.NodeTransformer):
+    def visit_Name(self, node):
+        node.id = node.id.upper()
+        return node
+
+
+class DoubleNumbers(ast.NodeTransformer):
+    def visit_Num(self, node):
+        return ast.copy_location(ast.Num(n=node.n * 2), node)
+
+
+class PrefixFunctions(ast.NodeTransformer):
+    def visit_FunctionDef(self, node):
+        self.generic_visit(node)
+        node.name = "k_" + node.name
+        return node
+
+
+class ZeroNone(ast.NodeTransformer):
+    def visit_Name(self, node):
+        if node.id == 'None':
+            return ast.copy_location(ast.Num(n=0), node)
+        return node
+
+
+transforms = [ZeroNone, UpperNames, DoubleNumbers, PrefixFunctions]
+
+
+def module_source(function_count):
+    return "\n".join(
+        "def f%d(a, b):\n    x = a * %d + b\n    return g(x, a) if x else None\n" % (index, index)
+        for index in range(function_count)
+    )
+
+
+def sequential(tree):
+    for transform in transforms:
+        tree = transform_copy(tree, transform().visit)
+    return tree
+
+
+def fused(tree):
+    return transform_copy(tree, FusedNodeTransformer([transform() for transform in transforms]).visit)
+
+
+def time_call(call, tree):
+    start = time.time()
+    result = call(tree)
+    return time.time() - start, result
+
+
+def main():
+    print("%-20s %-14s %-14s %s" % ("tree", "sequential", "fused", "same result"))
+    for function_count in [100, 1000, 5000]:
+        tree = ast.parse(module_source(function_count))
+        sequential_seconds, sequential_tree = time_call(sequential, tree)
+        fused_seconds, fused_tree = time_call(fused, tree)
+        print("%-20s %8.3f s     %8.3f s     %s" % (
+            "%d functions" % function_count, sequential_seconds, fused_seconds,
+            ast.dump(sequential_tree) == ast.dump(fused_tree)
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+compare transforming a whole module with transforming one function and
+splicing it back, on python modules of growing size
+
+    python benchmarks/benchmark_subtree_splice.py
+"""
+from __future__ import print_function
+
+import ast
+import time
+
+from ast_tool_box.models.code_models.ast_row import AstRow
+from ast_tool_box.models.code_models.shared_tree import transform_copy
+from ast_tool_box.models.code_models.subtree_splice import transform_subtree
+
+
+class UpperNames(ast.NodeTransformer):
+    def visit_Name(self, node):
+        node.id = node.id.upper()
+        return node
+
+
+def module_source(function_count):
+    return "\n".join(
+        "def f%d(a, b):\n    x = a * %d + b\n    return g(x, a) if x else None\n" % (index, index)
+        for index in range(function_count)
+    )
+
+
+def middle_function_path(tree):
+    module_row = AstRow(tree, "root")
+    body_row = [row for row in module_row.children() if row.field_name == 'body'][0]
+    function_rows = [row for row in body_row.walk() if isinstance(row.ast_node, ast.FunctionDef)]
+    return function_rows[len(function_rows) // 2].path()
+
+
+def time_call(call):
+    start = time.time()
+    call()
+    return "%8.3f s" % (time.time() - start)
+
+
+def main():
+    print("%-20s %-20s %-20s" % ("tree", "whole module", "one function"))
+    for function_count in [100, 1000, 5000]:
+        tree = ast.parse(module_source(function_count))
+        row_path = middle_function_path(tree)
+        print("%-20s %-20s %-20s" % (
+            "%d functions" % function_count,
+            time_call(lambda: transform_copy(tree, UpperNames().visit)),
+            time_call(lambda: transform_subtree(tree, row_path, UpperNames().visit)),
+        ))
+
+
+if __name__ == '__main__':
+    main()
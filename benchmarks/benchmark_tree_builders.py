@@ -0,0 +1,76 @@
+"""
+compare the recursive and the iterative ways AstTreeWidget builds its items
+on deep trees (long elif chains, long binary operator chains) and wide ones
+(modules with many statements)
+
+    python benchmarks/benchmark_tree_builders.py
+"""
+from __future__ import print_function
+
+import ast
+import sys
+import time
+
+from PySide import QtGui
+
+from ast_tool_box.views.code_views.ast_tree_widget import AstTreeWidget
+
+
+def elif_chain(depth):
+    """if x == 0: ... elif x == 1: ... nested depth deep"""
+    tail = []
+    for index in range(depth - 1, -1, -1):
+        test = ast.Compare(left=ast.Name(id='x', ctx=ast.Load()), ops=[ast.Eq()], comparators=[ast.Num(n=index)])
+        tail = [ast.If(test=test, body=[ast.Pass()], orelse=tail)]
+    return ast.Module(body=tail)
+
+
+def binary_op_chain(depth):
+    """1 + 1 + 1 ... depth times"""
+    expression = ast.Num(n=1)
+    for _ in range(depth):
+        expression = ast.BinOp(left=expression, op=ast.Add(), right=ast.Num(n=1))
+    return ast.Module(body=[ast.Expr(value=expression)])
+
+
+def wide_module(statement_count):
+    return ast.parse("\n".join("a%d = b%d * %d" % (index, index, index) for index in range(statement_count)))
+
+
+def time_builder(widget, builder, tree):
+    widget.clear()
+    start = time.time()
+    try:
+        builder(tree)
+    except RuntimeError as e:
+        return "failed: %s" % str(e)[:40]
+    return "%8.3f s" % (time.time() - start)
+
+
+def main():
+    app = QtGui.QApplication(sys.argv)
+    widget = AstTreeWidget()
+
+    trees = [
+        ("elif chain 200", elif_chain(200)),
+        ("elif chain 2000", elif_chain(2000)),
+        ("binop chain 300", binary_op_chain(300)),
+        ("binop chain 5000", binary_op_chain(5000)),
+        ("1000 statements", wide_module(1000)),
+        ("20000 statements", wide_module(20000)),
+    ]
+
+    print("%-20s %-20s %-20s" % ("tree", "recursive", "iterative"))
+    for name, tree in trees:
+        print("%-20s %-20s %-20s" % (
+            name,
+            time_builder(widget, widget.populate_recursive, tree),
+            time_builder(widget, widget.populate_iterative, tree),
+        ))
+
+    widget.close()
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+compare a full transform with one that skips the subtrees holding none of
+the node types the transform has visit_ methods for, on python modules of
+growing size where one function in fifty has a loop
+
+    python benchmarks/benchmark_type_summary.py
+"""
+from __future__ import print_function
+
+import ast
+import time
+
+from ast_tool_box.models.code_models.shared_tree import transform_copy
+from ast_tool_box.models.code_models.type_summary import TypeSummary, pruned_transform_copy
+
+
+class UnrollMarker(ast.NodeTransformer):
+    def visit_For(self, node):
+        node.orelse = []
+        return self.generic_visit(node)
+
+
+def module_source(function_count):
+    functions = []
+    for index in range(function_count):
+        if index % 50 == 0:
+            body = "    for i in range(a):\n        b += i * %d\n    return b\n" % index
+        else:
+            body = "    x = a * %d + b\n    return g(x, a) if x else None\n" % index
+        functions.append("def f%d(a, b):\n%s" % (index, body))
+    return "\n".join(functions)
+
+
+def time_call(call):
+    start = time.time()
+    result = call()
+    return time.time() - start, result
+
+
+def main():
+    print("%-20s %-14s %-14s %-14s" % ("tree", "summary", "full", "pruned"))
+    for function_count in [100, 1000, 5000]:
+        tree = ast.parse(module_source(function_count))
+        summary_time, summary = time_call(lambda: TypeSummary(tree))
+        full_time, full = time_call(lambda: transform_copy(tree, UnrollMarker().visit))
+        pruned_time, pruned = time_call(lambda: pruned_transform_copy(tree, summary, UnrollMarker()))
+        assert ast.dump(full) == ast.dump(pruned)
+        print("%-20s %10.3f s %10.3f s %10.3f s" % (
+            "%d functions" % function_count, summary_time, full_time, pruned_time
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -28,7 +28,10 @@ setup(
     ],
 
     entry_points={
-        'console_scripts': ['ast_tool_box = ast_tool_box.main:main', ],
+        'console_scripts': [
+            'ast_tool_box = ast_tool_box.main:main',
+            'ast_tool_box_corpus = ast_tool_box.controllers.corpus_runner:main',
+        ],
     }
 
 )
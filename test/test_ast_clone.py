@@ -0,0 +1,83 @@
+import unittest
+import ast
+
+from nose.tools import assert_equal, assert_true, assert_false, assert_is
+
+from ast_tool_box.models.code_models.ast_clone import clone_ast
+
+
+class TestAstClone(unittest.TestCase):
+    def test_clone_has_the_same_structure_and_no_shared_nodes(self):
+        tree = ast.parse(sample_source)
+        clone = clone_ast(tree)
+
+        assert_equal(ast.dump(clone, include_attributes=True), ast.dump(tree, include_attributes=True))
+        original_nodes = set(id(node) for node in ast.walk(tree))
+        assert_false(any(id(node) in original_nodes for node in ast.walk(clone)))
+        assert_false(clone.body is tree.body)
+
+    def test_immutable_leaves_are_shared(self):
+        tree = ast.parse("name_of_something = 'a string'")
+        clone = clone_ast(tree)
+
+        assert_is(clone.body[0].targets[0].id, tree.body[0].targets[0].id)
+        assert_is(clone.body[0].value.s, tree.body[0].value.s)
+
+    def test_changing_the_clone_leaves_the_original_alone(self):
+        tree = ast.parse(sample_source)
+        clone = clone_ast(tree)
+        clone.body[0].body.append(ast.Pass())
+        clone.body[0].name = 'renamed'
+
+        assert_equal(ast.dump(tree), ast.dump(ast.parse(sample_source)))
+
+    def test_shared_nodes_stay_shared(self):
+        shared = ast.Name(id='x', ctx=ast.Load())
+        tree = ast.Module(body=[ast.Expr(value=shared), ast.Expr(value=shared)])
+        clone = clone_ast(tree)
+
+        assert_is(clone.body[0].value, clone.body[1].value)
+        assert_false(clone.body[0].value is shared)
+
+    def test_deep_trees(self):
+        expression = ast.Num(n=1)
+        for _ in range(5000):
+            expression = ast.BinOp(left=expression, op=ast.Add(), right=ast.Num(n=1))
+        clone = clone_ast(ast.Expression(body=expression))
+
+        depth = 0
+        node = clone.body
+        while isinstance(node, ast.BinOp):
+            assert_false(node is expression)
+            node = node.left
+            depth += 1
+        assert_equal(depth, 5000)
+
+    def test_other_attributes_are_copied(self):
+        tree = ast.parse("x = 1")
+        tree.body[0].notes = {'seen': [1, 2]}
+        clone = clone_ast(tree)
+
+        assert_equal(clone.body[0].notes, {'seen': [1, 2]})
+        assert_false(clone.body[0].notes is tree.body[0].notes)
+
+    def test_ctree_nodes(self):
+        try:
+            from ctree.c.nodes import Constant, Add, SymbolRef
+        except ImportError:
+            return
+        tree = Add(SymbolRef("a"), Constant(3))
+        tree._force_parentheses = True
+        clone = clone_ast(tree)
+
+        assert_equal(clone.codegen(), tree.codegen())
+        assert_true(clone._force_parentheses)
+        assert_false(clone.left is tree.left)
+        assert_equal(sorted(clone.__dict__), sorted(tree.__dict__))
+
+
+sample_source = """
+def first(a, b):
+    x = a * 2 + b
+    return [x, (a, b)]
+"""
@@ -0,0 +1,100 @@
+import unittest
+import ast
+import copy
+
+from nose.tools import assert_equal, assert_true, assert_false
+
+from ast_tool_box.models.code_models.ast_diff import AstDiff, INSERTED, DELETED, MOVED, UPDATED
+from ast_tool_box.models.code_models.ast_row import AstRow, list_page_size
+from ast_tool_box.models.code_models.shared_tree import transform_copy
+
+
+class ThirdCallsH(ast.NodeTransformer):
+    def visit_Name(self, node):
+        if node.id == 'g':
+            node.id = 'h'
+        return node
+
+
+class TestAstDiff(unittest.TestCase):
+    def setUp(self):
+        self.old = ast.parse(sample_source)
+        self.new = copy.deepcopy(self.old)
+
+    def operations(self, diff):
+        return [(operation, (new_node or old_node).__class__.__name__) for operation, old_node, new_node in diff.edit_script()]
+
+    def test_identical_trees_have_no_changes(self):
+        diff = AstDiff(self.old, self.new)
+        assert_false(diff.has_changes())
+        assert_equal(len(diff.match), len(diff.new))
+        assert_equal(diff.changed_regions(), set())
+
+    def test_updated_value(self):
+        self.new.body[1].body[0].value.left.right.n = 7
+        diff = AstDiff(self.old, self.new)
+        assert_equal(self.operations(diff), [(UPDATED, 'Num')])
+        assert_equal(diff.new.row_path(self.new.body[1].body[0].value.left.right), [1, 2, 1, 0, 2])
+
+    def test_insert_and_delete(self):
+        self.new.body.insert(1, ast.Pass())
+        del self.new.body[3]
+        diff = AstDiff(self.old, self.new)
+        assert_equal(self.operations(diff), [(DELETED, 'FunctionDef'), (INSERTED, 'Pass')])
+        assert_equal(diff.node_marks()[self.new], DELETED)
+        assert_equal(diff.deleted_roots, [self.old.body[2]])
+
+    def test_moved_statement(self):
+        self.new.body[0].body.append(self.new.body[1].body.pop(0))
+        diff = AstDiff(self.old, self.new)
+        moved = self.new.body[0].body[-1]
+        assert_equal(diff.statuses, {moved: MOVED})
+        assert_true(diff.match[moved] is self.old.body[1].body[0])
+
+    def test_changed_regions_are_the_changes_and_their_ancestors(self):
+        changed = self.new.body[2].body[0].value
+        changed.func.id = 'h'
+        diff = AstDiff(self.old, self.new)
+        assert_equal(diff.changed_regions(), set([self.new, self.new.body[2], self.new.body[2].body[0], changed, changed.func]))
+
+    def test_shared_subtrees_are_not_looked_into(self):
+        new = transform_copy(self.old, ThirdCallsH().visit)
+        diff = AstDiff(self.old, new)
+        call = new.body[2].body[0].value
+
+        assert_equal(self.operations(diff), [(UPDATED, 'Name')])
+        assert_equal(diff.changed_regions(), set([new, new.body[2], new.body[2].body[0], call, call.func]))
+        assert_true(diff.match[new.body[0]] is self.old.body[0])
+        assert_true(len(diff.new) < len(list(ast.walk(new))))
+
+    def test_row_paths_go_through_list_pages(self):
+        old = ast.parse("\n".join("a%d = %d" % (index, index) for index in range(list_page_size + 10)))
+        new = copy.deepcopy(old)
+        new.body[list_page_size + 2].value.n = -1
+        diff = AstDiff(old, new)
+        changed = new.body[list_page_size + 2].value
+
+        assert_equal(self.operations(diff), [(UPDATED, 'Num')])
+        path = diff.new.row_path(changed)
+        assert_equal(path, [1, 2, 1])
+        assert_true(AstRow(new, "").descendant(path).ast_node is changed)
+
+    def test_repeated_subtrees_stay_with_their_own_parents(self):
+        """x = a * 3 + b now appears twice, the function named second still matches the old second"""
+        self.new.body[0].body[0].value.left.right.n = 3
+        diff = AstDiff(self.old, self.new)
+        assert_equal(self.operations(diff), [(UPDATED, 'Num')])
+
+
+sample_source = """
+def first(a, b):
+    x = a * 2 + b
+    return x
+
+def second(a, b):
+    x = a * 3 + b
+    return x
+
+def third():
+    return g(1)
+"""
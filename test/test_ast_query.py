@@ -0,0 +1,58 @@
+import unittest
+import ast
+
+from nose.tools import assert_equal, assert_raises, assert_is
+
+from ast_tool_box.models.code_models.ast_row import AstRow
+from ast_tool_box.models.code_models.ast_query import NodeTypeIndex, AstQueryError, compile_query
+
+
+class TestAstQuery(unittest.TestCase):
+    def setUp(self):
+        self.tree = ast.parse(sample_source)
+        self.index = NodeTypeIndex(AstRow(self.tree, '"sample"'))
+
+    def run_query(self, text):
+        return [row.ast_node for row in compile_query(text).evaluate(self.index)]
+
+    def test_type_anywhere(self):
+        assert_equal(len(self.run_query("For")), 2)
+        assert_equal(len(self.run_query("//BinOp")), 3)
+
+    def test_predicates_and_descendants(self):
+        nodes = self.run_query("For[target.id=i]//BinOp[op=Mult]")
+        assert_equal(len(nodes), 1)
+        assert_equal(nodes[0].lineno, 4)
+
+        assert_equal(len(self.run_query("For[target.id!=i]//BinOp")), 1)
+
+    def test_child_axis(self):
+        assert_equal([node.name for node in self.run_query("/Module/FunctionDef")], ["loops"])
+        assert_equal(len(self.run_query("FunctionDef[name=loops]/Return")), 1)
+        assert_equal(len(self.run_query("FunctionDef/BinOp")), 0)
+
+    def test_existence_and_wildcards(self):
+        assert_equal(len(self.run_query("Call[func.attr]")), 2)
+        assert_equal(len(self.run_query("Return/*")), 1)
+        assert_equal(len(self.run_query("Num[n='3']")), 2)
+
+    def test_results_are_in_tree_order(self):
+        numbers = [self.index.number_of_row[row] for row in compile_query("Name").evaluate(self.index)]
+        assert_equal(numbers, sorted(numbers))
+
+    def test_compiled_queries_are_cached(self):
+        assert_is(compile_query("For//Name"), compile_query(" For//Name "))
+
+    def test_syntax_errors(self):
+        for text in ["For[", "For//", "For Name", "[x=1]", "For[1x]"]:
+            assert_raises(AstQueryError, compile_query, text)
+
+
+sample_source = """
+def loops(a):
+    for i in range(10):
+        a.append(i * 2)
+    for j in range(3):
+        a.append(j + 1)
+    return a[0] - 3
+"""
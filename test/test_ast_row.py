@@ -0,0 +1,74 @@
+import unittest
+import ast
+import inspect
+
+from nose.tools import assert_equal, assert_true, assert_false, assert_is_none
+
+from ast_tool_box.models.code_models.ast_row import AstRow, ListPage, list_page_size, label_value_limit, is_value_capped
+
+
+class TestAstRow(unittest.TestCase):
+    def test_children_are_built_on_demand(self):
+        root = AstRow(ast.parse(inspect.getsource(sample_code)), '"sample"')
+
+        assert_false(root.children_built())
+        assert_true(root.has_children())
+        assert_false(root.children_built())
+
+        children = root.children()
+        assert_true(root.children_built())
+        assert_equal([child.label() for child in children], ["body[0] = FunctionDef (1:0)"])
+
+    def test_labels(self):
+        root = AstRow(ast.parse(inspect.getsource(sample_code)), '"sample"')
+        labels = [row.label() for row in root.walk()]
+
+        assert_equal(labels[0], '"sample" = Module')
+        assert_true("name: 'sample_code'" in labels)
+        assert_true("op = Mult" in labels)
+
+    def test_list_fields_are_flattened(self):
+        root = AstRow(ast.parse("a = 1\nb = 2\n"), "")
+        children = root.children()
+
+        assert_equal([child.field_label for child in children], ["body[0]", "body[1]"])
+        assert_equal([child.list_index for child in children], [(0,), (1,)])
+        assert_equal(children[1].field_name, "body")
+        assert_equal(children[1].row, 1)
+
+    def test_nearest_ast_node(self):
+        root = AstRow(ast.parse("x"), "")
+        name_row = [row for row in root.walk() if row.field_label == 'id'][0]
+
+        assert_equal(name_row.ast_node, 'x')
+        assert_true(isinstance(name_row.nearest_ast_node(), ast.Name))
+        assert_is_none(AstRow(3, "").nearest_ast_node())
+
+    def test_long_lists_are_paged(self):
+        count = list_page_size * 2 + 3
+        root = AstRow(ast.parse("\n".join("a%d = %d" % (index, index) for index in range(count))), "")
+        pages = root.children()
+
+        assert_equal([page.label() for page in pages], [
+            "body[0:500] (500 items)", "body[500:1000] (500 items)", "body[1000:1003] (3 items)"
+        ])
+        assert_true(isinstance(pages[1].ast_node, ListPage))
+        assert_false(pages[1].children_built())
+        assert_equal(pages[2].children()[1].field_label, "body[1001]")
+        assert_equal(pages[2].children()[1].list_index, (1001,))
+        assert_true(pages[2].children()[1].ast_node is root.ast_node.body[1001])
+        assert_equal(pages[2].children()[1].nearest_ast_node(), root.ast_node.body[1001])
+        assert_equal(sum(len(page.children()) for page in pages), count)
+
+    def test_long_values_are_capped(self):
+        root = AstRow(ast.parse("s = '%s'" % ("x" * 10000)), "")
+        string_row = [row for row in root.walk() if row.field_label == 's'][0]
+
+        assert_true(is_value_capped(string_row.ast_node))
+        assert_true(len(string_row.label()) < label_value_limit + 50)
+        assert_true(string_row.label().endswith("(10000 characters)"))
+        assert_false(is_value_capped('short'))
+
+
+def sample_code(x):
+    return x * x
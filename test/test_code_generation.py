@@ -0,0 +1,52 @@
+import unittest
+import ast
+import os
+import shutil
+import tempfile
+
+from nose.tools import assert_equal, assert_true
+
+from ast_tool_box.models.code_models.code_generation import (
+    generate_code, generate_code_file, write_code, ChunkBatcher
+)
+
+sample_source = """
+def f(a):
+    x = a + 1
+    return x
+
+def g(b):
+    return f(b) * 2
+"""
+
+
+class TestCodeGeneration(unittest.TestCase):
+    def test_streamed_code_is_the_whole_code(self):
+        chunks = []
+        write_code(ast.parse(sample_source), chunks.append)
+        code = generate_code(ast.parse(sample_source))
+
+        assert_true(len(chunks) > 1)
+        assert_equal("".join(chunks), code)
+        assert_true(code.startswith("// Module"))
+        assert_equal(code.count("// FunctionDef"), 2)
+
+    def test_code_file(self):
+        directory = tempfile.mkdtemp()
+        try:
+            file_name = os.path.join(directory, "out.c")
+            generate_code_file(ast.parse(sample_source), file_name)
+            with open(file_name) as code_file:
+                assert_equal(code_file.read(), generate_code(ast.parse(sample_source)))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_chunk_batcher(self):
+        batches = []
+        batcher = ChunkBatcher(batches.append, min_size=4, interval=60)
+        for chunk in ["ab", "c", "de", "f"]:
+            batcher.write(chunk)
+        assert_equal(batches, ["abcde"])
+        batcher.flush()
+        batcher.flush()
+        assert_equal(batches, ["abcde", "f"])
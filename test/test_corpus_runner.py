@@ -0,0 +1,68 @@
+import unittest
+import ast
+import os
+import shutil
+import tempfile
+
+from nose.tools import assert_equal, assert_true
+
+from ast_tool_box.controllers.corpus_runner import source_files, run_corpus, summary_file_name
+from ast_tool_box.models.transform_models.transform_pipeline import TransformPipeline
+
+
+class CorpusUpperNames(ast.NodeTransformer):
+    def visit_Name(self, node):
+        node.id = node.id.upper()
+        return node
+
+
+class TestCorpusRunner(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.sources = os.path.join(self.directory, "sources")
+        self.output = os.path.join(self.directory, "output")
+        os.makedirs(os.path.join(self.sources, "nested"))
+        self.write("a.py", "alpha = beta\n")
+        self.write("nested/b.py", "gamma = 1\n")
+        self.write("nested/broken.py", "def (\n")
+        self.write("notes.txt", "not python\n")
+
+        self.pipeline = TransformPipeline(name="upper")
+        self.pipeline.add_step("CorpusUpperNames")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, text):
+        with open(os.path.join(self.sources, name), "w") as source_file:
+            source_file.write(text)
+
+    def read(self, name):
+        with open(os.path.join(self.output, name)) as output_file:
+            return output_file.read()
+
+    def test_source_files(self):
+        expected = [os.path.join(self.sources, name) for name in ["a.py", "nested/b.py", "nested/broken.py"]]
+
+        assert_equal(source_files([self.sources]), expected)
+        assert_equal(source_files([os.path.join(self.sources, "*.py")]), expected[:1])
+        assert_equal(source_files([os.path.join(self.sources, "missing.py")]), [])
+
+    def run_corpus(self, processes):
+        reports = []
+        results = run_corpus(self.pipeline, [self.sources], self.output, processes=processes, report=reports.append)
+
+        assert_equal(sorted((os.path.basename(result[0]), result[1]) for result in results), [
+            ("a.py", "ok"), ("b.py", "ok"), ("broken.py", "error")
+        ])
+        assert_true("ALPHA" in self.read("a.ast.txt"))
+        assert_true("GAMMA" in self.read("nested/b.ast.txt"))
+        assert_true("SyntaxError" in self.read("nested/broken.error.txt"))
+        assert_equal(len(self.read(summary_file_name).splitlines()), 4)
+        assert_equal(reports[-1].split(",")[:2], ["3 files", " 1 errors"])
+
+    def test_in_process(self):
+        self.run_corpus(1)
+
+    def test_process_pool(self):
+        self.run_corpus(2)
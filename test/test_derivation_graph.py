@@ -0,0 +1,148 @@
+import unittest
+import ast
+import os
+import shutil
+import tempfile
+import time
+
+from nose.tools import assert_equal, assert_true, assert_false
+
+from ast_tool_box.models.code_models.code_model import AstTreeItem, CodeTransformLink, PendingCodeItem
+from ast_tool_box.models.code_models.ast_row import AstRow
+from ast_tool_box.models.code_models.shared_tree import transform_copy
+from ast_tool_box.models.code_models.derivation_graph import DerivationGraph, transform_changed, recomputed_results
+from ast_tool_box.models.transform_models.transform_file import TransformFile
+
+transforms_source = """
+import ast
+
+SUFFIX = '_a'
+
+
+class DerivationSuffix(ast.NodeTransformer):
+    def visit_Name(self, node):
+        node.id += SUFFIX
+        return node
+
+
+class DerivationUpper(ast.NodeTransformer):
+    def visit_Name(self, node):
+        node.id = node.id.upper()
+        return node
+"""
+
+
+class TestDerivationGraph(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, "derivation_transforms.py")
+        self.write(transforms_source)
+        self.transform_file = TransformFile(self.file_name)
+        self.suffix, self.upper = self.transform_file.node_transforms
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, text):
+        with open(self.file_name, "w") as transform_file:
+            transform_file.write(text)
+        # a rewrite within the same second must not reuse the old .pyc or linecache entry
+        self.writes = getattr(self, 'writes', 0) + 1
+        modified = time.time() + 2 * self.writes
+        os.utime(self.file_name, (modified, modified))
+
+    @staticmethod
+    def derive(code_item, transform_item):
+        return AstTreeItem(
+            code_item.ast_tree, name="derived", parent_link=CodeTransformLink(code_item, transform_item)
+        )
+
+    def test_only_items_downstream_of_a_change_are_stale(self):
+        root = AstTreeItem(ast.parse("a = b"))
+        suffixed = self.derive(root, self.suffix)
+        upper = self.derive(root, self.upper)
+        suffixed_upper = self.derive(suffixed, self.upper)
+        subtree = self.derive(suffixed_upper, None)
+        graph = DerivationGraph([root, suffixed, upper, suffixed_upper, subtree])
+
+        assert_equal(graph.children(root), [suffixed, upper])
+        assert_equal(graph.descendants(suffixed), [suffixed_upper, subtree])
+        assert_equal(graph.stale_items(lambda transform_item: transform_item is self.suffix), [
+            suffixed, suffixed_upper, subtree
+        ])
+        assert_equal(graph.stale_items(lambda transform_item: transform_item is self.upper), [
+            upper, suffixed_upper, subtree
+        ])
+        assert_equal(graph.stale_items(lambda transform_item: False), [])
+
+    def test_transforms_of_a_subtree_view_start_from_the_recomputed_parent(self):
+        root = AstTreeItem(ast.parse("a = b\nc = d"))
+        suffixed = self.derive(root, self.suffix)
+        second_row = AstRow(suffixed.ast_tree, "root").children()[1]
+        subtree = AstTreeItem(
+            second_row.ast_node, name="SubTree", parent_link=CodeTransformLink(suffixed, None), root_row=second_row
+        )
+        upper = self.derive(subtree, self.upper)
+        whole_view = self.derive(suffixed, None)
+        steps = [
+            (code_item, code_item.parent_code_item.transform_item)
+            for code_item in DerivationGraph([root, suffixed, subtree, upper, whole_view]).stale_items(
+                lambda transform_item: transform_item is self.suffix
+            )
+        ]
+
+        def transform(link, tree, transform_item):
+            if tree is None:
+                tree = link.code_item.ast_tree
+            if transform_item is self.suffix:
+                transform_item = self.transform_file.node_transforms[0]
+            return transform_copy(tree, transform_item.get_instance().visit)
+
+        self.write(transforms_source.replace("'_a'", "'_b'"))
+        self.transform_file.update()
+        results = recomputed_results(steps, transform)
+
+        assert_equal(ast.dump(results[id(suffixed)]), ast.dump(ast.parse("a_b = b_b\nc_b = d_b")))
+        assert_equal(ast.dump(results[id(subtree)]), ast.dump(ast.parse("c_b = d_b").body[0]))
+        assert_equal(ast.dump(results[id(upper)]), ast.dump(ast.parse("C_B = D_B").body[0]))
+        assert_true(results[id(whole_view)] is results[id(suffixed)])
+
+    def test_nothing_is_made_from_a_subtree_view_whose_row_is_gone(self):
+        root = AstTreeItem(ast.parse("a = b\nc = d"))
+        dropped = self.derive(root, self.suffix)
+        second_row = AstRow(dropped.ast_tree, "root").children()[1]
+        subtree = AstTreeItem(
+            second_row.ast_node, name="SubTree", parent_link=CodeTransformLink(dropped, None), root_row=second_row
+        )
+        upper = self.derive(subtree, self.upper)
+        steps = [(dropped, self.suffix), (subtree, None), (upper, self.upper)]
+
+        results = recomputed_results(steps, lambda link, tree, transform_item: ast.parse("a = b"))
+
+        assert_equal(list(results), [id(dropped)])
+
+    def test_pending_items_are_not_followed(self):
+        root = AstTreeItem(ast.parse("a"))
+        pending = PendingCodeItem(None, None, name="pending", parent_link=CodeTransformLink(root, self.suffix))
+
+        assert_equal(DerivationGraph([root, pending]).stale_items(lambda transform_item: True), [])
+
+    def test_transform_changed(self):
+        old_suffix, old_upper = self.suffix, self.upper
+
+        self.write(transforms_source.replace(".upper()", ".lower()"))
+        self.transform_file.update()
+        new_suffix, new_upper = self.transform_file.node_transforms
+        assert_false(transform_changed(old_suffix, new_suffix))
+        assert_true(transform_changed(old_upper, new_upper))
+
+        self.write("\n\n" + transforms_source.replace("'_a'", "'_b'"))
+        self.transform_file.update()
+        assert_true(transform_changed(new_suffix, self.transform_file.node_transforms[0]))
+
+    def test_row_path(self):
+        root_row = AstRow(ast.parse("a = b\nc = d"), "root")
+        row = root_row.children()[0].children()[1]
+
+        assert_equal(root_row.path(), [])
+        assert_true(root_row.descendant(row.path()) is row)
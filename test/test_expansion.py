@@ -0,0 +1,32 @@
+import unittest
+import ast
+
+from nose.tools import assert_equal, assert_true
+
+from ast_tool_box.models.code_models.ast_row import AstRow
+from ast_tool_box.models.code_models.expansion import subtree_sizes, breadth_first_expansion
+
+
+class TestExpansion(unittest.TestCase):
+    def setUp(self):
+        self.root = AstRow(ast.parse("a = 1\nb = c * 2\n"), '"sample"')
+
+    def test_subtree_sizes(self):
+        sizes = subtree_sizes(self.root)
+
+        assert_equal(sizes[self.root], len(list(self.root.walk())))
+        for row in self.root.walk():
+            assert_equal(sizes[row], 1 + sum(sizes[child] for child in row.children()))
+
+    def test_budget_is_respected(self):
+        for budget in range(1, 30):
+            to_expand = breadth_first_expansion(self.root, budget)
+            visible = 1 + sum(len(row.children()) for row in to_expand)
+            assert_true(visible <= budget)
+
+    def test_breadth_first(self):
+        to_expand = breadth_first_expansion(self.root, 5)
+        assert_equal(to_expand, [self.root, self.root.children()[0]])
+
+        everything = breadth_first_expansion(self.root, 1000)
+        assert_equal(set(everything), set(row for row in self.root.walk() if row.has_children()))
@@ -0,0 +1,93 @@
+import unittest
+import ast
+
+from nose.tools import assert_equal, assert_is, assert_true
+
+from ast_tool_box.models.code_models.ast_clone import clone_ast
+from ast_tool_box.models.transform_models.fused_transform import node_local_problems
+from ast_tool_box.models.transform_models.transform_file import TransformFactory
+from ast_tool_box.transformers.fast_node_transformer import FastNodeTransformer
+
+
+class RenumberMixin(object):
+    def visit_Name(self, node):
+        node.id = node.id.upper()
+        return node
+
+    def visit_Num(self, node):
+        return ast.copy_location(ast.Num(n=node.n + 1), node)
+
+    def visit_Pass(self, node):
+        return None
+
+    def visit_Expr(self, node):
+        return [self.generic_visit(node), ast.Pass()]
+
+
+class SlowRenumber(RenumberMixin, ast.NodeTransformer):
+    pass
+
+
+class FastRenumber(RenumberMixin, FastNodeTransformer):
+    pass
+
+
+class FastUpperOnly(FastNodeTransformer):
+    def visit_Name(self, node):
+        node.id = node.id.upper()
+        return node
+
+
+class FastCounting(FastNodeTransformer):
+    def __init__(self):
+        super(FastCounting, self).__init__()
+        self.visits = 0
+
+    def visit(self, node):
+        self.visits += 1
+        return super(FastCounting, self).visit(node)
+
+
+sample_source = """
+def f(a, b):
+    pass
+    x = a + 1
+    g(x, b, 2)
+    return [x, 3]
+"""
+
+
+class TestFastNodeTransformer(unittest.TestCase):
+    def test_same_result_as_node_transformer(self):
+        tree = ast.parse(sample_source)
+
+        slow = SlowRenumber().visit(clone_ast(tree))
+        fast = FastRenumber().visit(clone_ast(tree))
+
+        assert_equal(ast.dump(fast), ast.dump(slow))
+
+    def test_unchanged_lists_are_kept(self):
+        tree = ast.parse(sample_source)
+        body = tree.body[0].body
+        statements = list(body)
+
+        FastUpperOnly().visit(tree)
+
+        assert_is(tree.body[0].body, body)
+        assert_true(all(new is old for new, old in zip(body, statements)))
+        assert_equal(tree.body[0].body[1].targets[0].id, 'X')
+
+    def test_each_class_has_its_own_table(self):
+        tree = ast.parse(sample_source)
+        FastUpperOnly().visit(clone_ast(tree))
+        counting = FastCounting()
+        counting.visit(tree)
+
+        assert_equal(counting.visits, len(list(ast.walk(tree))))
+        assert_true(FastCounting.dispatch_table()[ast.Name] is None)
+        assert_true(FastUpperOnly.dispatch_table()[ast.Name] is not None)
+
+    def test_discovered_and_fusable(self):
+        assert_equal(TransformFactory.get(FastNodeTransformer), None)
+        assert_equal(TransformFactory.get(FastUpperOnly).name(), "FastUpperOnly")
+        assert_equal(node_local_problems(FastUpperOnly), [])
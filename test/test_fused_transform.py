@@ -0,0 +1,148 @@
+import unittest
+import ast
+
+from nose.tools import assert_equal, assert_true
+
+from ast_tool_box.models.code_models.ast_clone import clone_ast
+from ast_tool_box.models.transform_models.fused_transform import FusedNodeTransformer, node_local_problems
+from ast_tool_box.models.transform_models.transform_profile import TransformProfile
+
+
+class FusedUpperNames(ast.NodeTransformer):
+    def visit_Name(self, node):
+        node.id = node.id.upper()
+        return node
+
+
+class FusedNamesToNumbers(ast.NodeTransformer):
+    def __init__(self, name='N'):
+        super(FusedNamesToNumbers, self).__init__()
+        self.name = name
+
+    def visit_Name(self, node):
+        if node.id == self.name:
+            return ast.copy_location(ast.Num(n=1), node)
+        return self.generic_visit(node)
+
+
+class FusedDoubleNumbers(ast.NodeTransformer):
+    def visit_Num(self, node):
+        return ast.copy_location(ast.Num(n=node.n * 2), node)
+
+
+class FusedDropPass(ast.NodeTransformer):
+    def visit_Pass(self, node):
+        return None
+
+
+class CountingTransform(ast.NodeTransformer):
+    def __init__(self):
+        super(CountingTransform, self).__init__()
+        self.count = 0
+
+    def visit_Name(self, node):
+        self.count += 1
+        return node
+
+
+class RecursingTransform(ast.NodeTransformer):
+    def visit_Expr(self, node):
+        return self.visit(node.value)
+
+
+class DeclaredLocal(RecursingTransform):
+    node_local = True
+
+
+class FoldNumbers(ast.NodeTransformer):
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.left, ast.Num) and isinstance(node.right, ast.Num):
+            return ast.copy_location(ast.Num(n=node.left.n + node.right.n), node)
+        return node
+
+
+class XToOne(ast.NodeTransformer):
+    def visit_Name(self, node):
+        if node.id == 'x':
+            return ast.copy_location(ast.Num(n=1), node)
+        return node
+
+
+class SkipFunctions(ast.NodeTransformer):
+    def visit_FunctionDef(self, node):
+        return node
+
+    def visit_Name(self, node):
+        node.id = node.id.upper()
+        return node
+
+
+class PassToX(ast.NodeTransformer):
+    def visit_Pass(self, node):
+        return ast.copy_location(ast.Expr(value=ast.Name(id='x', ctx=ast.Load())), node)
+
+
+sample_source = """
+def f(a, n):
+    pass
+    return a + n * 3
+
+x = f(b, 2)
+"""
+
+transforms = [FusedUpperNames, FusedNamesToNumbers, FusedDoubleNumbers, FusedDropPass]
+
+
+class TestFusedTransform(unittest.TestCase):
+    def test_one_pass_gives_the_sequential_result(self):
+        tree = ast.parse(sample_source)
+        sequential = clone_ast(tree)
+        for transform in transforms:
+            sequential = transform().visit(sequential)
+
+        fused = FusedNodeTransformer([transform() for transform in transforms]).visit(clone_ast(tree))
+
+        assert_equal(ast.dump(fused, include_attributes=True), ast.dump(sequential, include_attributes=True))
+
+    def test_replacements_are_walked_by_later_transforms(self):
+        tree = ast.parse("def f():\n    pass\n")
+        sequential = FusedUpperNames().visit(PassToX().visit(clone_ast(tree)))
+        fused = FusedNodeTransformer([PassToX(), FusedUpperNames()]).visit(clone_ast(tree))
+
+        assert_equal(fused.body[0].body[0].value.id, 'X')
+        assert_equal(ast.dump(fused), ast.dump(sequential))
+
+    def test_every_node_is_walked_once(self):
+        tree = ast.parse(sample_source)
+        node_count = len(list(ast.walk(tree)))
+        profile = TransformProfile()
+        profile.instrument(FusedNodeTransformer([transform() for transform in transforms])).visit(tree)
+
+        # ast.walk sees the shared Load and Store nodes once, the walk once per parent
+        assert_equal(profile.stats['Module'].visits, 1)
+        assert_equal(profile.stats['FunctionDef'].visits, 1)
+        assert_true(node_count <= profile.visits() < 2 * node_count)
+
+    def test_node_local_detection(self):
+        for transform in transforms:
+            assert_equal(node_local_problems(transform), [])
+
+        assert_equal(node_local_problems(CountingTransform), ["CountingTransform.visit_Name changes self.count"])
+        assert_equal(node_local_problems(RecursingTransform), [
+            "RecursingTransform.visit_Expr calls self.visit",
+            "RecursingTransform.visit_Expr uses node.value, a child of the node",
+        ])
+        assert_equal(node_local_problems(DeclaredLocal), [])
+        assert_true("FusedNodeTransformer replaces visit" in node_local_problems(FusedNodeTransformer))
+        assert_equal(node_local_problems(PassToX), [])
+
+    def test_transforms_that_read_or_skip_children_are_not_fused(self):
+        # folding reads the children, which XToOne has already changed when it runs fused
+        assert_true("FoldNumbers.visit_BinOp uses node.left, a child of the node" in node_local_problems(FoldNumbers))
+        assert_equal(node_local_problems(XToOne), [])
+        # the names inside a function are left alone, fused they would be walked
+        assert_equal(
+            node_local_problems(SkipFunctions),
+            ["SkipFunctions.visit_FunctionDef returns node without calling generic_visit first"]
+        )
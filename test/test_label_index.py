@@ -0,0 +1,53 @@
+import unittest
+import ast
+
+from nose.tools import assert_equal, assert_true, assert_is
+
+from ast_tool_box.models.code_models.ast_row import AstRow
+from ast_tool_box.models.code_models.label_index import LabelIndex
+
+
+class TestLabelIndex(unittest.TestCase):
+    def setUp(self):
+        self.root = AstRow(ast.parse(sample_source), '"sample"')
+        self.index = LabelIndex(self.root)
+
+    def test_matches_a_linear_scan(self):
+        for text in ["Fun", "functiondef", "Name", "id: 'y'", "(3:", "body[1]", "x", "zz", "no such label"]:
+            expected = [row for row in self.root.walk() if text.lower() in row.label().lower()]
+            assert_equal(self.index.search(text), expected)
+
+    def test_hits_are_in_tree_order(self):
+        hits = self.index.search("FunctionDef")
+        assert_equal([row.ast_node.name for row in hits], ["first", "second"])
+
+    def test_hits_are_cached_per_query(self):
+        hits = self.index.search("Name")
+        assert_is(self.index.search("name"), hits)
+
+    def test_extending_a_query_narrows_the_previous_hits(self):
+        self.index.search("F")
+        assert_is(self.index.candidates("fu"), self.index.recent_queries["f"][0])
+
+        self.index.search("Fun")
+        assert_true(len(self.index.candidates("functiondef")) <= len(self.index.recent_queries["fun"][0]))
+        assert_equal(len(self.index.search("FunctionDef")), 2)
+
+    def test_only_recent_queries_are_kept(self):
+        for count in range(LabelIndex.recent_query_count + 5):
+            self.index.search("body[%d]" % count)
+        assert_equal(len(self.index.recent_queries), LabelIndex.recent_query_count)
+        assert_true("body[0]" not in self.index.recent_queries)
+
+    def test_indexes_every_row(self):
+        assert_equal(len(self.index), len(list(self.root.walk())))
+        assert_true(len(self.index.candidates("FunctionDef".lower())) < len(self.index))
+
+
+sample_source = """
+def first(x):
+    return x * x
+
+def second(y):
+    return first(y) + 1
+"""
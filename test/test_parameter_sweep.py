@@ -0,0 +1,51 @@
+import unittest
+import ast
+
+from nose.tools import assert_equal, assert_true
+
+from ast_tool_box.controllers.parameter_sweep import sweep_arguments, run_sweep, argument_text
+
+
+class SweepScaleNumbers(ast.NodeTransformer):
+    def __init__(self, factor, offset=0):
+        super(SweepScaleNumbers, self).__init__()
+        self.factor = factor
+        self.offset = offset
+
+    def visit_Num(self, node):
+        if self.factor == 0:
+            raise ValueError("factor 0")
+        return ast.copy_location(ast.Num(n=node.n * self.factor + self.offset), node)
+
+
+sample_source = "x = 1 + 2\n"
+
+
+class TestParameterSweep(unittest.TestCase):
+    def test_grid_and_list_arguments(self):
+        assert_equal(sweep_arguments(["[1, 2]", "range(2)", " "]), [[1, 0], [1, 1], [2, 0], [2, 1]])
+        assert_equal(sweep_arguments(["4, 16", "8", ""], grid=False), [[4, 16], [8]])
+        assert_equal(argument_text([4, 'a']), "4, 'a'")
+
+    def run_sweep(self, processes):
+        tree = ast.parse(sample_source)
+        before = ast.dump(tree)
+        reported = []
+        points = run_sweep(
+            tree, SweepScaleNumbers, [[2], [0], [3, 1]], processes=processes, report=reported.append
+        )
+
+        assert_equal([point.index for point in points], [0, 1, 2])
+        assert_equal([point.status for point in points], ["ok", "error", "ok"])
+        assert_equal(sorted(point.index for point in reported), [0, 1, 2])
+        assert_true("factor 0" in points[1].text)
+        assert_equal(points[0].node_count, len(list(ast.walk(tree))))
+        assert_true(points[0].output_size > 0)
+        assert_true(points[0].text is None)
+        assert_equal(ast.dump(tree), before)
+
+    def test_in_process(self):
+        self.run_sweep(1)
+
+    def test_process_pool(self):
+        self.run_sweep(2)
@@ -0,0 +1,96 @@
+import unittest
+import ast
+
+from nose.tools import assert_equal, assert_true, assert_false, assert_is
+
+from ast_tool_box.models.code_models.shared_tree import transform_shared, transform_copy
+
+
+class RenameFunction(ast.NodeTransformer):
+    def visit_FunctionDef(self, node):
+        if node.name == 'second':
+            node.name = 'renamed'
+        return self.generic_visit(node)
+
+
+class ChangeConstant(ast.NodeTransformer):
+    def visit_Num(self, node):
+        if node.n == 2:
+            return ast.copy_location(ast.Num(n=20), node)
+        return node
+
+
+class TestSharedTree(unittest.TestCase):
+    def test_untouched_subtrees_are_shared(self):
+        tree = ast.parse(sample_source)
+        before = ast.dump(tree, include_attributes=True)
+        result = transform_shared(tree, RenameFunction().visit)
+
+        assert_equal(ast.dump(tree, include_attributes=True), before)
+        assert_equal([function.name for function in result.body], ['first', 'renamed', 'third'])
+        assert_false(result is tree)
+        assert_is(result.body[0], tree.body[0])
+        assert_is(result.body[2], tree.body[2])
+        assert_false(result.body[1] is tree.body[1])
+        assert_is(result.body[1].body[0], tree.body[1].body[0])
+
+    def test_only_the_modified_path_is_new(self):
+        tree = ast.parse(sample_source)
+        result = transform_shared(tree, ChangeConstant().visit)
+        original_nodes = set(id(node) for node in ast.walk(tree))
+        new_nodes = [node for node in ast.walk(result) if id(node) not in original_nodes]
+
+        assert_equal(
+            [type(node).__name__ for node in new_nodes],
+            ['Module', 'FunctionDef', 'Return', 'BinOp', 'Num']
+        )
+        assert_equal(ast.dump(result), ast.dump(ast.parse(sample_source.replace('2', '20'))))
+
+    def test_a_transform_that_changes_nothing_shares_all_but_the_root(self):
+        tree = ast.parse(sample_source)
+        result = transform_shared(tree, ast.NodeTransformer().visit)
+
+        assert_false(result is tree)
+        assert_false(result.body is tree.body)
+        assert_equal([id(function) for function in result.body], [id(function) for function in tree.body])
+
+    def test_equal_replacement_values_count_as_unchanged(self):
+        class SameName(ast.NodeTransformer):
+            def visit_Name(self, node):
+                node.id = ''.join(list(node.id))
+                return node
+
+        tree = ast.parse(sample_source)
+        result = transform_shared(tree, SameName().visit)
+
+        assert_equal([id(function) for function in result.body], [id(function) for function in tree.body])
+
+    def test_deep_trees(self):
+        def change_last_constant(tree_copy):
+            tree_copy.body[0].value.right.n = 20
+            return tree_copy
+
+        tree = ast.parse("x = " + " + ".join(["1"] * 3000) + " + 2")
+        result = transform_shared(tree, change_last_constant)
+
+        assert_is(result.body[0].value.left, tree.body[0].value.left)
+        assert_equal(result.body[0].value.right.n, 20)
+
+    def test_copy_without_sharing(self):
+        tree = ast.parse(sample_source)
+        result = transform_copy(tree, RenameFunction().visit, share_unchanged=False)
+        original_nodes = set(id(node) for node in ast.walk(tree))
+
+        assert_false(any(id(node) in original_nodes for node in ast.walk(result)))
+
+
+sample_source = """
+def first(a):
+    return a + 1
+
+def second(b):
+    return b * 3
+
+def third(c):
+    return c - 2
+"""
@@ -0,0 +1,60 @@
+import unittest
+import ast
+
+from nose.tools import assert_equal, assert_is, assert_is_none, assert_true
+
+from ast_tool_box.models.code_models.ast_row import AstRow
+from ast_tool_box.models.code_models.span_index import SpanIndex
+
+
+class TestSpanIndex(unittest.TestCase):
+    def setUp(self):
+        self.root = AstRow(ast.parse(sample_source), '"sample"')
+        self.index = SpanIndex(self.root)
+
+    def row_at(self, line, column):
+        ast_row = self.index.row_at(line, column)
+        return ast_row.ast_node if ast_row is not None else None
+
+    def test_innermost_node_at_a_position(self):
+        assert_is_none(self.row_at(1, 0))
+        assert_equal(self.row_at(2, 0).name, "first")
+        assert_true(isinstance(self.row_at(3, 4), ast.Return))
+        assert_equal(self.row_at(3, 11).id, "x")
+        assert_equal(self.row_at(6, 11).id, "first")
+        assert_equal(self.row_at(6, 17).id, "y")
+        assert_equal(self.row_at(6, 99).__class__, ast.Num)
+
+    def test_spans_nest(self):
+        for ast_row, (start, end) in self.index.spans.items():
+            assert_true(start <= end)
+            for ancestor in ast_row.ancestors():
+                if ancestor in self.index.spans:
+                    ancestor_start, ancestor_end = self.index.spans[ancestor]
+                    assert_true(ancestor_start <= start and end <= ancestor_end)
+                    break
+
+    def test_lookup_agrees_with_a_scan_for_the_innermost_span(self):
+        for line in range(1, 8):
+            for column in range(0, 25):
+                covering = [
+                    ast_row for ast_row, (start, end) in self.index.spans.items()
+                    if start <= (line, column) < end
+                ]
+                expected = max(covering, key=lambda ast_row: len(list(ast_row.ancestors()))) if covering else None
+                assert_is(self.index.row_at(line, column), expected)
+
+    def test_span_of_rows_without_positions_uses_the_ancestor(self):
+        function_row = self.index.row_at(2, 0)
+        arguments_row = [row for row in function_row.children() if row.field_name == 'args'][0]
+        assert_equal(self.index.span_of(arguments_row), self.index.spans[function_row])
+        assert_is_none(self.index.span_of(self.root))
+
+
+sample_source = """
+def first(x):
+    return x * x
+
+def second(y):
+    return first(y) + 1
+"""
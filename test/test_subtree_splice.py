@@ -0,0 +1,91 @@
+import unittest
+import ast
+
+from nose.tools import assert_equal, assert_true, assert_false, assert_is, assert_raises
+
+from ast_tool_box.models.code_models.ast_row import AstRow
+from ast_tool_box.models.code_models.subtree_splice import node_path, splice, transform_subtree
+
+
+class UpperNames(ast.NodeTransformer):
+    def visit_Name(self, node):
+        node.id = node.id.upper()
+        return node
+
+
+class DropStatements(ast.NodeTransformer):
+    def visit_Assign(self, node):
+        return None
+
+
+class DuplicateStatements(ast.NodeTransformer):
+    def visit_Assign(self, node):
+        return [node, ast.Pass()]
+
+
+sample_source = """
+def first():
+    a = b
+
+def second():
+    c = d
+    e = f
+"""
+
+
+def row_path_to(tree, node):
+    for ast_row in AstRow(tree, "root").walk():
+        if ast_row.ast_node is node:
+            return ast_row.path()
+    raise ValueError("node not in tree")
+
+
+def names(tree):
+    return [node.id for node in ast.walk(tree) if isinstance(node, ast.Name)]
+
+
+class TestSubtreeSplice(unittest.TestCase):
+    def setUp(self):
+        self.tree = ast.parse(sample_source)
+        self.second = self.tree.body[1]
+        self.assign = self.second.body[0]
+
+    def test_node_path(self):
+        path = node_path(self.tree, row_path_to(self.tree, self.assign))
+
+        assert_equal([type(node).__name__ for node in path], ['Module', 'FunctionDef', 'Assign'])
+        assert_is(path[-1], self.assign)
+
+    def test_only_the_path_is_copied(self):
+        before = ast.dump(self.tree, include_attributes=True)
+        result = transform_subtree(self.tree, row_path_to(self.tree, self.assign), UpperNames().visit)
+
+        assert_equal(ast.dump(self.tree, include_attributes=True), before)
+        assert_equal(names(result), ['a', 'b', 'C', 'D', 'e', 'f'])
+        assert_false(result is self.tree)
+        assert_false(result.body[1] is self.second)
+        assert_is(result.body[0], self.tree.body[0])
+        assert_is(result.body[1].body[1], self.second.body[1])
+        assert_is(result.body[1].args, self.second.args)
+
+    def test_statement_lists_take_lists_and_none(self):
+        row_path = row_path_to(self.tree, self.assign)
+
+        dropped = transform_subtree(self.tree, row_path, DropStatements().visit)
+        assert_equal(len(dropped.body[1].body), 1)
+
+        duplicated = transform_subtree(self.tree, row_path, DuplicateStatements().visit)
+        assert_equal([type(node).__name__ for node in duplicated.body[1].body], ['Assign', 'Pass', 'Assign'])
+        assert_equal(len(self.second.body), 2)
+
+    def test_single_fields_only_take_nodes(self):
+        nodes = node_path(self.tree, row_path_to(self.tree, self.assign.value))
+
+        assert_raises(ValueError, splice, nodes, [ast.Name(id='x', ctx=ast.Load())])
+        assert_true(splice(nodes, None).body[1].body[0].value is None)
+
+    def test_root_path_transforms_everything(self):
+        result = transform_subtree(self.tree, [], UpperNames().visit)
+
+        assert_equal(names(result), ['A', 'B', 'C', 'D', 'E', 'F'])
+        assert_false(result is self.tree)
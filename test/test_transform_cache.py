@@ -0,0 +1,192 @@
+import unittest
+import ast
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from nose.tools import assert_equal, assert_not_equal, assert_is, assert_true, assert_false
+
+import ast_tool_box.models.transform_models.transform_cache as transform_cache
+from ast_tool_box.models.transform_models.transform_cache import TransformCache, tree_fingerprint, module_files
+from ast_tool_box.models.ast_transformer_manager import AstTransformerItem
+from ast_tool_box.transformers.identity_transform import IdentityTransform
+
+
+class RenameNames(ast.NodeTransformer):
+    def visit_Name(self, node):
+        node.id = node.id.upper()
+        return node
+
+
+class TestTransformCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_fingerprints(self):
+        assert_equal(tree_fingerprint(ast.parse(sample_source)), tree_fingerprint(ast.parse(sample_source)))
+        assert_not_equal(
+            tree_fingerprint(ast.parse(sample_source)),
+            tree_fingerprint(ast.parse(sample_source.replace('a + 1', 'a + 2')))
+        )
+        assert_not_equal(tree_fingerprint(ast.parse("a\nb")), tree_fingerprint(ast.parse("a\n\nb")))
+        assert_equal(len(tree_fingerprint(ast.parse("x = " + " + ".join(["1"] * 3000)))), 40)
+
+    def test_ctree_attributes_outside_fields_count(self):
+        try:
+            from ctypes import c_int, c_double
+            from ctree.c.nodes import FunctionDecl, SymbolRef, Return
+        except ImportError:
+            return
+
+        def kernel(return_type, name, is_global=False):
+            return FunctionDecl(return_type, name, [SymbolRef("x", c_int(), _global=is_global)],
+                                [Return(SymbolRef("x"))])
+
+        assert_equal(tree_fingerprint(kernel(c_int(), "kernel_a")), tree_fingerprint(kernel(c_int(), "kernel_a")))
+        assert_not_equal(tree_fingerprint(kernel(c_int(), "kernel_a")), tree_fingerprint(kernel(c_int(), "kernel_b")))
+        assert_not_equal(tree_fingerprint(kernel(c_int(), "kernel_a")), tree_fingerprint(kernel(c_double(), "kernel_a")))
+        assert_not_equal(
+            tree_fingerprint(kernel(c_int(), "kernel_a")), tree_fingerprint(kernel(c_int(), "kernel_a", True))
+        )
+
+    def test_repeated_nodes_are_fingerprinted_once(self):
+        tree = ast.parse("x = 1")
+        tree.body[0].parent = tree
+
+        assert_equal(len(tree_fingerprint(tree)), 40)
+        assert_not_equal(tree_fingerprint(tree), tree_fingerprint(ast.parse("x = 1")))
+
+    def test_results_are_reused(self):
+        cache = TransformCache()
+        transform_item = AstTransformerItem(RenameNames)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return transform_item.copy_and_transform(tree)
+
+        tree = ast.parse(sample_source)
+        first = cache.result(tree, transform_item, (), compute)
+        second = cache.result(ast.parse(sample_source), transform_item, (), compute)
+        third = cache.result(tree, transform_item, (1,), compute)
+
+        assert_is(first, second)
+        assert_false(first is third)
+        assert_equal(len(calls), 2)
+        assert_equal((cache.hits, cache.disk_hits, cache.misses), (1, 0, 2))
+
+    def test_different_transforms_have_different_keys(self):
+        cache = TransformCache()
+        tree = ast.parse(sample_source)
+
+        assert_not_equal(
+            cache.key(tree, AstTransformerItem(RenameNames), ()),
+            cache.key(tree, AstTransformerItem(IdentityTransform), ())
+        )
+
+    def test_least_recently_used_results_are_evicted(self):
+        cache = TransformCache()
+        cache.entry_limit = 2
+        transform_item = AstTransformerItem(RenameNames)
+        trees = [ast.parse("a%d = 1" % index) for index in range(3)]
+
+        for tree in trees:
+            cache.result(tree, transform_item, (), lambda: 'result')
+        cache.result(trees[0], transform_item, (), lambda: 'result')
+
+        assert_equal(len(cache), 2)
+        assert_equal((cache.hits, cache.misses), (0, 4))
+
+    def test_disk_tier_is_shared(self):
+        transform_item = AstTransformerItem(RenameNames)
+        tree = ast.parse(sample_source)
+        writer = TransformCache(directory=self.directory)
+        written = writer.result(tree, transform_item, (), lambda: transform_item.copy_and_transform(tree))
+
+        reader = TransformCache(directory=self.directory)
+        read = reader.result(tree, transform_item, (), lambda: None)
+
+        assert_equal((reader.hits, reader.disk_hits, reader.misses), (0, 1, 0))
+        assert_equal(ast.dump(read), ast.dump(written))
+        assert_true("A" in ast.dump(read))
+
+    def test_unpicklable_results_stay_in_memory(self):
+        cache = TransformCache(directory=self.directory)
+        transform_item = AstTransformerItem(RenameNames)
+        tree = ast.parse(sample_source)
+        result = cache.result(tree, transform_item, (), lambda: lambda: None)
+
+        assert_is(cache.result(tree, transform_item, (), lambda: None), result)
+        assert_equal(cache.load(cache.key(tree, transform_item, ())), None)
+
+    def test_an_interrupted_save_leaves_no_temporary_file(self):
+        cache = TransformCache(directory=self.directory)
+
+        def interrupted_rename(source, destination):
+            raise KeyboardInterrupt()
+
+        self.addCleanup(setattr, transform_cache.os, 'rename', os.rename)
+        transform_cache.os.rename = interrupted_rename
+        with self.assertRaises(KeyboardInterrupt):
+            cache.save("interrupted", ast.parse(sample_source))
+
+        assert_equal(os.listdir(self.directory), [])
+
+    def test_left_over_temporary_files_are_trimmed(self):
+        cache = TransformCache(directory=self.directory)
+        left_over = os.path.join(self.directory, "left_over.tmp")
+        being_written = os.path.join(self.directory, "being_written.tmp")
+        for name in (left_over, being_written):
+            open(name, "w").close()
+        long_ago = time.time() - 2 * cache.temporary_file_age
+        os.utime(left_over, (long_ago, long_ago))
+
+        cache.trim_directory()
+
+        assert_equal(os.listdir(self.directory), ["being_written.tmp"])
+
+    def test_editing_a_helper_module_changes_the_key(self):
+        with open(os.path.join(self.directory, "cache_helper_module.py"), "w") as helper_file:
+            helper_file.write("def rename(name):\n    return name.upper()\n")
+        with open(os.path.join(self.directory, "cache_transform_module.py"), "w") as transform_file:
+            transform_file.write(helper_transform_source)
+        sys.path.insert(0, self.directory)
+        try:
+            import cache_transform_module
+        finally:
+            sys.path.remove(self.directory)
+        self.addCleanup(sys.modules.pop, "cache_helper_module", None)
+        self.addCleanup(sys.modules.pop, "cache_transform_module", None)
+        transform_item = AstTransformerItem(cache_transform_module.HelperRename)
+
+        helper_name = os.path.realpath(os.path.join(self.directory, "cache_helper_module.py"))
+        assert_true(helper_name in module_files(cache_transform_module.HelperRename))
+
+        cache = TransformCache()
+        tree = ast.parse(sample_source)
+        key = cache.key(tree, transform_item, ())
+        assert_equal(cache.key(tree, transform_item, ()), key)
+        os.utime(helper_name, (0, 0))
+        assert_not_equal(cache.key(tree, transform_item, ()), key)
+
+
+helper_transform_source = """
+import ast
+from cache_helper_module import rename
+
+
+class HelperRename(ast.NodeTransformer):
+    def visit_Name(self, node):
+        node.id = rename(node.id)
+        return node
+"""
+
+sample_source = """
+def first(a):
+    return a + 1
+"""
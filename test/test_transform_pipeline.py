@@ -0,0 +1,79 @@
+import unittest
+import ast
+import os
+import shutil
+import tempfile
+
+from nose.tools import assert_equal, assert_true, assert_false, assert_raises
+
+from ast_tool_box.controllers.tree_transform_controller import TreeTransformController
+from ast_tool_box.models.transform_models.transform_pipeline import TransformPipeline
+
+
+class PipelineSuffixNames(ast.NodeTransformer):
+    def __init__(self, suffix='_x'):
+        super(PipelineSuffixNames, self).__init__()
+        self.suffix = suffix
+
+    def visit_Name(self, node):
+        node.id += self.suffix
+        return node
+
+
+class PipelineUpperNames(ast.NodeTransformer):
+    def visit_Name(self, node):
+        node.id = node.id.upper()
+        return node
+
+
+def names(tree):
+    return [node.id for node in ast.walk(tree) if isinstance(node, ast.Name)]
+
+
+class TestTransformPipeline(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.controller = TreeTransformController()
+        self.pipeline = TransformPipeline(name="names")
+        self.pipeline.add_step("PipelineSuffixNames", ["'_a'"])
+        self.pipeline.add_step("PipelineUpperNames")
+        self.pipeline.add_step("PipelineSuffixNames")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_steps_run_in_order(self):
+        stages = self.pipeline.run(self.controller, ast.parse("a = b"))
+
+        assert_equal([names(stage.tree) for stage in stages], [
+            ['a_a', 'b_a'], ['A_A', 'B_A'], ['A_A_x', 'B_A_x']
+        ])
+        assert_equal([stage.computed for stage in stages], [True, True, True])
+
+    def test_editing_a_step_only_recomputes_from_that_step(self):
+        tree = ast.parse("a = b")
+        self.pipeline.run(self.controller, tree)
+        self.pipeline.set_step(1, "PipelineSuffixNames", ["'_b'"])
+        stages = self.pipeline.run(self.controller, tree)
+
+        assert_equal([stage.computed for stage in stages], [False, True, True])
+        assert_equal(names(stages[-1].tree), ['a_a_b_x', 'b_a_b_x'])
+        assert_equal(names(tree), ['a', 'b'])
+
+    def test_save_and_load(self):
+        file_name = os.path.join(self.directory, "names.json")
+        self.pipeline.modules.append("ast_tool_box.transformers.identity_transform")
+        self.pipeline.save(file_name)
+        loaded = TransformPipeline.load(file_name)
+
+        assert_equal(str(loaded), str(self.pipeline))
+        assert_equal(loaded.modules, self.pipeline.modules)
+        assert_equal(
+            [names(stage.tree) for stage in loaded.run(self.controller, ast.parse("a"))],
+            [['a_a'], ['A_A'], ['A_A_x']]
+        )
+
+    def test_unknown_transforms(self):
+        self.pipeline.add_step("NoSuchTransform")
+
+        assert_raises(ValueError, self.pipeline.run, self.controller, ast.parse("a"))
@@ -0,0 +1,63 @@
+import unittest
+import ast
+
+from nose.tools import assert_equal, assert_true, assert_false, assert_greater
+
+from ast_tool_box.controllers.tree_transform_controller import TreeTransformController
+from ast_tool_box.models.ast_transformer_manager import AstTransformerItem
+from ast_tool_box.models.transform_models.transform_profile import TransformProfile
+
+
+class ProfileRewrites(ast.NodeTransformer):
+    def visit_Name(self, node):
+        if node.id == 'drop':
+            return ast.copy_location(ast.Name(id='kept', ctx=node.ctx), node)
+        return node
+
+    def visit_Expr(self, node):
+        self.generic_visit(node)
+        if isinstance(node.value, ast.Num):
+            return None
+        return node
+
+
+class TestTransformProfile(unittest.TestCase):
+    def test_visits_are_counted_by_node_type(self):
+        profile = TransformProfile("ProfileRewrites")
+        transformer = profile.instrument(ProfileRewrites())
+        result = profile.timed(lambda: transformer.visit(ast.parse("a = drop\n1\nb")))
+
+        assert_equal(len(result.body), 2)
+        assert_equal(profile.stats['Name'].visits, 3)
+        assert_equal(profile.stats['Expr'].visits, 2)
+        assert_equal(profile.stats['Module'].visits, 1)
+        assert_true(profile.stats['Name'].handled)
+        assert_false(profile.stats['Assign'].handled)
+        assert_equal(profile.replaced, 1)
+        assert_equal(profile.removed, 1)
+        assert_equal(profile.visits(), sum(row[1] for row in profile.rows()))
+        assert_greater(profile.seconds, 0.0)
+
+    def test_self_time_excludes_nested_visits(self):
+        profile = TransformProfile()
+        profile.instrument(ProfileRewrites()).visit(ast.parse("a = b + c"))
+        module_stats = profile.stats['Module']
+        total_own = sum(node_stats.own for node_stats in profile.stats.values())
+
+        assert_true(module_stats.own <= module_stats.cumulative)
+        assert_true(abs(total_own - module_stats.cumulative) < 1e-3)
+        assert_equal(profile.rows()[0][0], 'Module')
+        assert_true(str(profile).startswith("None:"))
+
+    def test_controller_profiles_without_the_cache(self):
+        controller = TreeTransformController()
+        controller.ast_tree_manager.new_item_from_source("a = drop")
+        transform = AstTransformerItem(ProfileRewrites)
+
+        new_ast_item = controller.profile_transform(0, transform)
+
+        assert_equal(new_ast_item.ast_tree.body[0].value.id, 'kept')
+        assert_equal(controller.ast_tree_manager[0].ast_tree.body[0].value.id, 'drop')
+        assert_true(controller.last_profile is new_ast_item.transform_profile)
+        assert_equal(controller.last_profile.replaced, 1)
+        assert_equal(controller.transform_cache.misses, 0)
@@ -0,0 +1,105 @@
+import unittest
+import ast
+import threading
+
+from nose.tools import assert_equal, assert_true, assert_false, assert_is, assert_is_none
+
+from ast_tool_box.models.code_models.code_model import AstTreeItem
+from ast_tool_box.models.code_models.shared_tree import transform_copy
+from ast_tool_box.models.code_models.type_summary import (
+    TypeSummary, handled_types, prune, pruned_transform_copy
+)
+from ast_tool_box.models.transform_models.fused_transform import FusedNodeTransformer
+
+
+class UpperCallNames(ast.NodeTransformer):
+    def __init__(self):
+        super(UpperCallNames, self).__init__()
+        self.visited = []
+
+    def visit_Call(self, node):
+        self.visited.append(node)
+        if isinstance(node.func, ast.Name):
+            node.func.id = node.func.id.upper()
+        return self.generic_visit(node)
+
+
+class CountingVisit(ast.NodeTransformer):
+    def visit(self, node):
+        return super(CountingVisit, self).visit(node)
+
+
+sample_source = """
+def f(a):
+    x = a + 1
+    return x
+
+def g(b):
+    return h(b, k(b))
+"""
+
+
+class TestTypeSummary(unittest.TestCase):
+    def setUp(self):
+        self.tree = ast.parse(sample_source)
+        self.summary = TypeSummary(self.tree)
+
+    def test_types_below(self):
+        f, g = self.tree.body
+
+        assert_true('Call' in self.summary.types_below(g))
+        assert_false('Call' in self.summary.types_below(f))
+        assert_true(set(['FunctionDef', 'Assign', 'BinOp', 'Return']) <= self.summary.types_below(f))
+        assert_is_none(self.summary.types_below(ast.Pass()))
+
+    def test_can_change(self):
+        f, g = self.tree.body
+
+        assert_false(self.summary.can_change(f, UpperCallNames))
+        assert_true(self.summary.can_change(g, UpperCallNames))
+        assert_true(self.summary.can_change(f, CountingVisit))
+        assert_equal(handled_types(UpperCallNames), set(['Call']))
+        assert_is_none(handled_types(CountingVisit))
+
+    def test_pruned_transform_matches_full_transform(self):
+        full = transform_copy(self.tree, UpperCallNames().visit)
+        transformer = UpperCallNames()
+        pruned = pruned_transform_copy(self.tree, self.summary, transformer)
+
+        assert_equal(ast.dump(pruned), ast.dump(full))
+        assert_equal(len(transformer.visited), 2)
+        assert_is(pruned.body[0], self.tree.body[0])
+        assert_equal(ast.dump(self.tree), ast.dump(ast.parse(sample_source)))
+
+        unshared = pruned_transform_copy(self.tree, self.summary, UpperCallNames(), share_unchanged=False)
+        assert_equal(ast.dump(unshared), ast.dump(full))
+        assert_false(unshared.body[0] is self.tree.body[0])
+
+    def test_prune_visits_only_relevant_subtrees(self):
+        visited = []
+        transformer = UpperCallNames()
+        plain_visit = transformer.visit
+
+        def counted_visit(node):
+            visited.append(type(node).__name__)
+            return plain_visit(node)
+
+        transformer.visit = counted_visit
+        prune(transformer, self.summary).visit(self.tree.body[0])
+        assert_equal(visited, [])
+
+        fused = prune(FusedNodeTransformer([UpperCallNames()]), self.summary)
+        assert_equal(ast.dump(fused.visit(self.tree.body[0])), ast.dump(ast.parse(sample_source).body[0]))
+
+    def test_summary_is_built_once_by_threads_asking_together(self):
+        code_item = AstTreeItem(self.tree)
+        assert_is_none(code_item.built_type_summary())
+        summaries = []
+        threads = [threading.Thread(target=lambda: summaries.append(code_item.type_summary())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert_equal(len(summaries), 4)
+        assert_true(all(summary is code_item.built_type_summary() for summary in summaries))